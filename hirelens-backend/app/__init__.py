@@ -2,12 +2,16 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from config import Config
+from app.runtime import configure_runtime
 
 jwt = JWTManager()
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    
+    # Size OpenCV/PyTorch thread pools before any model is loaded
+    configure_runtime(app.config['RUNTIME_PRESET'])
 
     # Initialize extensions
     jwt.init_app(app)
@@ -45,6 +49,16 @@ def create_app():
     app.register_blueprint(routes)
     app.register_blueprint(auth, url_prefix='/auth')
 
+    # Pick the session store, then restore interrupted interviews and keep
+    # checkpointing the live ones
+    from app.routes import configure_session_store, start_session_checkpoints
+    configure_session_store(app.config['SESSION_STORE'], app.config['SESSION_STORE_PATH'])
+    start_session_checkpoints(app.config['SESSION_CHECKPOINT_DIR'], app.config['SESSION_CHECKPOINT_INTERVAL'])
+
+    # Evict abandoned sessions in the background
+    from app.routes import start_session_reaper
+    start_session_reaper(app.config['SESSION_IDLE_TTL'], app.config['SESSION_REAP_INTERVAL'])
+
     # Add favicon route to prevent 500 errors
     @app.route('/favicon.ico')
     def favicon():
@@ -0,0 +1,235 @@
+import bisect
+import hashlib
+import io
+import itertools
+import os
+import threading
+import time
+import requests
+from urllib3.exceptions import NewConnectionError
+from werkzeug.wrappers import Request, Response
+
+# Points per worker on the hash ring. More points spread sessions more evenly;
+# adding or removing a worker only moves the sessions on its own points.
+RING_REPLICAS = 160
+
+# Hop-by-hop headers are for one connection only and must not be forwarded
+HOP_BY_HOP = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade", "content-length", "host"
+}
+
+PROXY_TIMEOUT = (5, 300)  # (connect, read) seconds; stopping an interview can take a while
+RETRY_AFTER = 30.0  # Seconds a worker that refused a connection is skipped
+
+# Safe to send again to another worker even if the first one may have seen them
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.sha1(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring mapping keys (session IDs) to worker URLs"""
+    def __init__(self, nodes=(), replicas=RING_REPLICAS):
+        self.replicas = replicas
+        self.points = []  # Sorted hashes
+        self.owners = {}  # hash -> node
+        self.nodes = set()
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.replicas):
+            point = _hash(f"{node}#{i}")
+            if point in self.owners:
+                continue
+            self.owners[point] = node
+            bisect.insort(self.points, point)
+
+    def remove(self, node):
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        self.points = [point for point in self.points if self.owners[point] != node]
+        self.owners = {point: owner for point, owner in self.owners.items() if owner != node}
+
+    def nodes_for(self, key):
+        """Distinct nodes in ring order starting at the key; the first one owns it"""
+        if not self.points:
+            return []
+        start = bisect.bisect(self.points, _hash(key))
+        nodes = []
+        for i in range(len(self.points)):
+            node = self.owners[self.points[(start + i) % len(self.points)]]
+            if node not in nodes:
+                nodes.append(node)
+                if len(nodes) == len(self.nodes):
+                    break
+        return nodes
+
+    def node_for(self, key):
+        nodes = self.nodes_for(key)
+        return nodes[0] if nodes else None
+
+
+def never_sent(error):
+    """True if a requests error happened before the request reached the worker (refused or connect timeout)"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, "reason", reason)  # urllib3 MaxRetryError wraps the cause
+    return isinstance(reason, (NewConnectionError, ConnectionRefusedError))
+
+
+def read_body(environ):
+    """
+    The whole request body, or None if it can't be read: a chunked body
+    without a Content-Length is only readable when the server has decoded it
+    (wsgi.input_terminated).
+    """
+    stream = environ["wsgi.input"]
+    if environ.get("CONTENT_LENGTH"):
+        return stream.read(int(environ["CONTENT_LENGTH"]))
+    if environ.get("wsgi.input_terminated"):
+        return stream.read()
+    if "chunked" in environ.get("HTTP_TRANSFER_ENCODING", "").lower():
+        return None
+    return b""
+
+
+def session_key(request):
+    """The session_id a request belongs to, from the query string, JSON body or form"""
+    session_id = request.args.get("session_id")
+    if not session_id and request.is_json:
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict):
+            session_id = payload.get("session_id")
+    if not session_id and request.mimetype in ("multipart/form-data", "application/x-www-form-urlencoded"):
+        session_id = request.form.get("session_id")
+    return str(session_id) if session_id else None
+
+
+class AffinityRouter:
+    """
+    Front WSGI app that forwards every request to one of several backend
+    workers, so that all requests of an interview session reach the same
+    worker and its warm analyzers and tracking graphs. Requests without a
+    session_id (history, results, auth) are spread round-robin.
+
+    A worker that refuses connections is skipped for RETRY_AFTER seconds and
+    its sessions fall through to the next worker on the ring; the others keep
+    their placement. A request is only sent to another worker when the first
+    one never received it, or when its method is idempotent, so a POST such
+    as /interview/stop is never replayed. Run the workers with
+    SESSION_STORE=sqlite so a session that moves can still be found.
+    """
+    def __init__(self, workers, replicas=RING_REPLICAS):
+        self.ring = HashRing(workers, replicas)
+        self.workers = list(workers)
+        self.round_robin = itertools.cycle(self.workers)
+        self.down = {}  # worker -> time it was marked down
+        self.lock = threading.Lock()
+        self.http = requests.Session()
+
+    def add_worker(self, worker):
+        with self.lock:
+            self.ring.add(worker)
+            if worker not in self.workers:
+                self.workers.append(worker)
+                self.round_robin = itertools.cycle(self.workers)
+
+    def remove_worker(self, worker):
+        with self.lock:
+            self.ring.remove(worker)
+            if worker in self.workers:
+                self.workers.remove(worker)
+                self.round_robin = itertools.cycle(self.workers)
+            self.down.pop(worker, None)
+
+    def _available(self, worker, now):
+        marked = self.down.get(worker)
+        return marked is None or now - marked > RETRY_AFTER
+
+    def candidates(self, key, now):
+        """Workers to try for a request, preferred first"""
+        with self.lock:
+            if key:
+                ordered = self.ring.nodes_for(key)
+            else:
+                first = next(self.round_robin)
+                index = self.workers.index(first)
+                ordered = self.workers[index:] + self.workers[:index]
+            available = [worker for worker in ordered if self._available(worker, now)]
+        return available or ordered
+
+    def _forward(self, worker, request, body):
+        url = worker.rstrip("/") + request.full_path.rstrip("?")
+        headers = {name: value for name, value in request.headers.items()
+                   if name.lower() not in HOP_BY_HOP}
+        headers["X-Forwarded-For"] = request.remote_addr or ""
+        return self.http.request(request.method, url, headers=headers, data=body,
+                                 timeout=PROXY_TIMEOUT, stream=True, allow_redirects=False)
+
+    def __call__(self, environ, start_response):
+        # Buffer the body so it can be inspected for a session_id and replayed
+        body = read_body(environ)
+        if body is None:
+            response = Response('{"status": "error", "message": "Content-Length is required"}',
+                                status=411, mimetype="application/json")
+            return response(environ, start_response)
+        environ["CONTENT_LENGTH"] = str(len(body))
+        environ["wsgi.input"] = io.BytesIO(body)
+        request = Request(environ)
+        key = session_key(request)
+        environ["wsgi.input"] = io.BytesIO(body)
+
+        now = time.time()
+        for worker in self.candidates(key, now):
+            try:
+                upstream = self._forward(worker, request, body)
+            except requests.ConnectionError as e:
+                if not never_sent(e) and request.method not in IDEMPOTENT_METHODS:
+                    # The worker may have acted on it; replaying could e.g. store an interview twice
+                    print(f"Worker {worker} dropped a {request.method} {request.path}: {str(e)}")
+                    response = Response('{"status": "error", "message": "Backend worker connection lost"}',
+                                        status=502, mimetype="application/json")
+                    return response(environ, start_response)
+                print(f"Worker {worker} unavailable, trying the next one: {str(e)}")
+                with self.lock:
+                    self.down[worker] = now
+                continue
+            with self.lock:
+                self.down.pop(worker, None)
+            headers = [(name, value) for name, value in upstream.raw.headers.items()
+                       if name.lower() not in HOP_BY_HOP]
+            # Pass the body through undecoded, it keeps its Content-Encoding
+            response = Response(upstream.raw.stream(64 * 1024, decode_content=False),
+                                status=upstream.status_code, headers=headers)
+            response.call_on_close(upstream.close)
+            return response(environ, start_response)
+
+        response = Response('{"status": "error", "message": "No backend worker available"}',
+                            status=503, mimetype="application/json")
+        return response(environ, start_response)
+
+
+def main():
+    """Run the router: AFFINITY_WORKERS is a comma-separated list of worker base URLs"""
+    import werkzeug.serving
+    workers = [url.strip() for url in os.getenv("AFFINITY_WORKERS", "").split(",") if url.strip()]
+    if not workers:
+        print("Set AFFINITY_WORKERS, e.g. http://127.0.0.1:5001,http://127.0.0.1:5002")
+        return
+    port = int(os.getenv("AFFINITY_PORT", "5000"))
+    print(f"Routing port {port} to {len(workers)} worker(s): {', '.join(workers)}")
+    werkzeug.serving.run_simple("0.0.0.0", port, AffinityRouter(workers),
+                                use_reloader=False, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
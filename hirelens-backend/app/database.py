@@ -1,5 +1,5 @@
 from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, CollectionInvalid
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -16,6 +16,11 @@ MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
 client = None
 db = None
 interviews = None
+frame_metrics = None
+landmarks = None
+
+# Per-frame metrics live in a time-series collection keyed by interview
+FRAME_METRICS_COLLECTION = 'frame_metrics'
 
 def get_client():
     """Get or create MongoDB client with proper Atlas settings"""
@@ -44,12 +49,44 @@ def get_interviews_collection():
         interviews = get_db()['interviews']
     return interviews
 
+def get_frame_metrics_collection():
+    """Get the per-frame metrics time-series collection"""
+    global frame_metrics
+    if frame_metrics is None:
+        frame_metrics = get_db()[FRAME_METRICS_COLLECTION]
+    return frame_metrics
+
+def get_landmarks_collection():
+    """Get the collection of per-interview landmark arrays used for rescoring"""
+    global landmarks
+    if landmarks is None:
+        landmarks = get_db()['landmarks']
+    return landmarks
+
+def init_frame_metrics_collection():
+    """Create the frame metrics time-series collection if it doesn't exist yet"""
+    try:
+        get_db().create_collection(
+            FRAME_METRICS_COLLECTION,
+            timeseries={
+                "timeField": "ts",
+                "metaField": "meta",
+                "granularity": "seconds"
+            }
+        )
+        print("Frame metrics time-series collection created")
+    except CollectionInvalid:
+        pass  # Already exists
+    get_frame_metrics_collection().create_index([("meta.interview_id", 1), ("ts", 1)])
+
 def init_indexes():
     """Initialize database indexes - call this after connection is verified"""
     try:
         collection = get_interviews_collection()
         collection.create_index([("userId", 1)])
         collection.create_index([("date", -1)])
+        init_frame_metrics_collection()
+        get_landmarks_collection().create_index([("interview_id", 1)], unique=True)
         print("Database indexes created successfully")
         return True
     except Exception as e:
@@ -2,19 +2,15 @@ import cv2
 import mediapipe as mp
 import numpy as np
 from collections import deque
+from .frame_context import FrameContext
+from .results import ExpressionFrame, ExpressionSummary
+from .landmarks import FACE_LANDMARKS, SMILE_THRESHOLD, smile_scores
+from .filters import TimeWeightedScore, frame_time
 
 # Initialize MediaPipe Face Mesh
 mp_face_mesh = mp.solutions.face_mesh
 mp_drawing = mp.solutions.drawing_utils
 
-# Initialize face mesh detector
-face_mesh = mp_face_mesh.FaceMesh(
-    static_image_mode=False,
-    max_num_faces=1,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
-)
-
 # Facial landmarks for improved expression detection
 MOUTH_CORNERS = [61, 291]  # Left and right mouth corners
 UPPER_LIP = [13]  # Upper lip center
@@ -23,10 +19,6 @@ EYEBROWS = [107, 336]  # Left and right eyebrow centers
 INNER_EYEBROWS = [55, 285]  # Inner eyebrow points
 OUTER_EYEBROWS = [70, 300]  # Outer eyebrow points
 
-# Buffer for smoothing measurements
-BUFFER_SIZE = 10
-expression_history = deque(maxlen=BUFFER_SIZE)
-
 class ExpressionAnalyzer:
     def __init__(self):
         self.emotion_history = deque(maxlen=30)  # Store last 30 frames of emotions
@@ -36,33 +28,14 @@ class ExpressionAnalyzer:
         }
         self.total_frames = 0        # Total frames processed
         self.smiling_frames = 0      # Frames where smile was detected
+        self.smile_time = TimeWeightedScore()  # Time spent smiling, by frame timestamps
         
     def _calculate_facial_metrics(self, landmarks):
-        """Direct smile detection based on mouth shape"""
-        # Get all mouth points
-        left_corner = np.array([landmarks[61].x, landmarks[61].y])
-        right_corner = np.array([landmarks[291].x, landmarks[291].y])
-        upper_lip = np.array([landmarks[13].x, landmarks[13].y])
-        lower_lip = np.array([landmarks[14].x, landmarks[14].y])
-        
-        # Calculate mouth shape
-        mouth_width = abs(right_corner[0] - left_corner[0])  # Horizontal width
-        mouth_height = abs(upper_lip[1] - lower_lip[1])      # Vertical height
-        
-        # Calculate corner positions relative to center
-        mouth_center_y = (upper_lip[1] + lower_lip[1]) / 2
-        left_lift = mouth_center_y - left_corner[1]
-        right_lift = mouth_center_y - right_corner[1]
-        
-        # More sensitive smile metrics
-        width_score = mouth_width * 8.0  # Increased width scaling
-        lift_score = (left_lift + right_lift) * 3.0  # Increased lift scaling
-        
-        return {
-            'width': width_score,
-            'lift': lift_score,
-            'mouth_height': mouth_height
-        }
+        """Direct smile detection based on mouth shape (see landmarks.smile_scores)"""
+        face = np.full((1, FACE_LANDMARKS, 3), np.nan, dtype=np.float32)
+        for idx in MOUTH_CORNERS + UPPER_LIP + LOWER_LIP:
+            face[0, idx] = (landmarks[idx].x, landmarks[idx].y, landmarks[idx].z)
+        return {'smile_score': float(smile_scores(face)[0])}
         
     def _detect_emotions(self, metrics):
         """Simple smile detection based on width and lift"""
@@ -71,16 +44,11 @@ class ExpressionAnalyzer:
             'smile_percent': 0.0
         }
         
-        # More sensitive smile detection with larger neutral window
-        width_component = max(0, metrics['width'] - 0.25)  # Increased width threshold
-        lift_component = max(0, metrics['lift'] * 3.0)    # Keep lift scaling
-        
-        # Combined score with higher weight on lift
-        smile_score = (width_component * 0.4 + lift_component * 0.6)  # Emphasize lift more
+        smile_score = metrics['smile_score']
         emotions['smile_score'] = min(1.0, max(0.0, smile_score))
         
-        # Count frame as smiling only if the score exceeds our "Slight Smile" threshold (0.15)
-        if smile_score > 0.15:  # Match the threshold from _analyze_expression
+        # Count frame as smiling only if the score exceeds our "Slight Smile" threshold
+        if smile_score > SMILE_THRESHOLD:
             self.smiling_frames += 1
             
         # Update total frames and calculate percentage
@@ -90,8 +58,40 @@ class ExpressionAnalyzer:
             
         return emotions
 
-    def analyze_frame(self, frame, face_mesh_results):
+    def analyze(self, face_mesh_results, timestamp=None):
+        """
+        Score the smile for one frame's face mesh results (taken at timestamp
+        seconds, if known) and return an ExpressionFrame
+        """
         if not face_mesh_results.multi_face_landmarks:
+            return ExpressionFrame(False, 0.0, 0.0, False)
+            
+        t = frame_time(timestamp, self.total_frames)
+        landmarks = face_mesh_results.multi_face_landmarks[0].landmark
+        metrics = self._calculate_facial_metrics(landmarks)
+        smiling_before = self.smiling_frames
+        
+        emotions = self._detect_emotions(metrics)
+        self.emotion_history.append(emotions)
+        smoothed_emotions = self._smooth_emotions()
+        smiling = self.smiling_frames > smiling_before
+        self.smile_time.add(t, smiling)
+        return ExpressionFrame(
+            True,
+            emotions['smile_score'],
+            smoothed_emotions['smile_score'],
+            smiling
+        )
+
+    def analyze_frame(self, frame, face_mesh_results):
+        """
+        Analyze the expression in a single frame (BGR array or shared FrameContext)
+        and draw the face mesh and smile feedback on it.
+        """
+        context = FrameContext.wrap(frame)
+        frame = context.bgr
+        result = self.analyze(face_mesh_results, context.timestamp)
+        if not result.face_detected:
             cv2.putText(frame, "No face detected", (10, 30),
                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
             return None, "No face detected", []
@@ -101,9 +101,8 @@ class ExpressionAnalyzer:
         
         # Debug info focusing on current state
         debug_info = [
-            f"Width Score: {metrics['width']:.3f}",
-            f"Lift Score: {metrics['lift']:.3f}",
-            f"Current Smile: {self._detect_emotions(metrics)['smile_score']:.1%}"
+            f"Raw Smile Score: {metrics['smile_score']:.3f}",
+            f"Current Smile: {result.smile_score:.1%}"
         ]
         
         y_offset = frame.shape[0] - 80
@@ -112,14 +111,16 @@ class ExpressionAnalyzer:
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
             y_offset += 20
         
-        emotions = self._detect_emotions(metrics)
-        self.emotion_history.append(emotions)
         smoothed_emotions = self._smooth_emotions()
         status, message, details = self._analyze_expression(smoothed_emotions)
         self._draw_face_mesh(frame, face_mesh_results.multi_face_landmarks[0])
         self._draw_expression_feedback(frame, status, message, smoothed_emotions, details)
         return status, message, details
 
+    def summary(self):
+        """Final time spent smiling, weighted by frame timestamps"""
+        return ExpressionSummary(self.smile_time.percentage(), self.smiling_frames, self.total_frames)
+
     def _smooth_emotions(self):
         """Apply temporal smoothing to emotion detection"""
         if not self.emotion_history:
@@ -148,7 +149,7 @@ class ExpressionAnalyzer:
             details.append("Big Smile")
         elif current_score > 0.2:  # Keep regular smile the same
             details.append("Smile")
-        elif current_score > 0.15:  # Increased from 0.1
+        elif current_score > SMILE_THRESHOLD:
             details.append("Slight Smile")
         else:
             details.append("Not Smiling")
@@ -280,9 +281,7 @@ def main():
     if last_status is not None:
         print("\n=== Final Expression Analysis Report ===")
         print(f"Overall Performance: {last_message}")
-        # Extract smile time percentage from details
-        smile_time = next((detail for detail in last_details if "Time Spent Smiling" in detail), "0%")
-        print(f"Total {smile_time}")
+        print(f"Total Time Spent Smiling: {analyzer.summary().smile_percentage:.1f}%")
         print("\nThank you for participating!")
     else:
         print("\nNo valid expression analysis results were obtained.")
@@ -1,38 +1,33 @@
 import cv2
-import mediapipe as mp
 import numpy as np
-from collections import deque
-
-# Initialize MediaPipe Face Mesh
-mp_face_mesh = mp.solutions.face_mesh
+from .frame_context import FrameContext
+from .results import EyeContactFrame, EyeContactSummary
+from .filters import TimeWindow, TimeWeightedScore, frame_time
+from .landmarks import GAZE_WINDOW, GAZE_GOOD_RATIO
+from .graph_pool import FACE_MESH_OPTIONS, create_face_mesh
 
 class EyeContactAnalyzer:
-    def __init__(self):
+    def __init__(self, face_mesh=None):
         # Detection confidence thresholds
-        self.DETECTION_CONFIDENCE = 0.5
-        self.TRACKING_CONFIDENCE = 0.5
+        self.DETECTION_CONFIDENCE = FACE_MESH_OPTIONS["min_detection_confidence"]
+        self.TRACKING_CONFIDENCE = FACE_MESH_OPTIONS["min_tracking_confidence"]
         
-        # Initialize MediaPipe Face Mesh with configurable parameters
-        self.face_mesh = mp_face_mesh.FaceMesh(
-            static_image_mode=False,
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=self.DETECTION_CONFIDENCE,
-            min_tracking_confidence=self.TRACKING_CONFIDENCE
-        )
+        # Use a pooled Face Mesh graph when given one (see graph_pool), else a private one
+        self.face_mesh = face_mesh if face_mesh is not None else create_face_mesh()
         
         # Eye landmark indices
         self.LEFT_EYE_INDICES = [33, 160, 158, 133, 153, 144]
         self.RIGHT_EYE_INDICES = [362, 385, 387, 263, 373, 380]
         
-        # Frame counters
+        # Frame counters; the score itself is weighted by frame timestamps
         self.frame_count = 0
         self.looking_at_camera_frames = 0
+        self.eye_contact_time = TimeWeightedScore()
         
-        # Temporal smoothing parameters
-        self.BUFFER_SIZE = 5
-        self.GOOD_GAZE_RATIO = 0.6  # Ratio of good frames needed for positive detection
-        self.gaze_history = deque(maxlen=self.BUFFER_SIZE)
+        # Temporal smoothing parameters (window in seconds, not frames)
+        self.BUFFER_SIZE = GAZE_WINDOW
+        self.GOOD_GAZE_RATIO = GAZE_GOOD_RATIO  # Ratio of good frames needed for positive detection
+        self.gaze_history = TimeWindow(self.BUFFER_SIZE)
         
         # Eye region parameters
         self.EYE_PADDING = 5  # Pixels to add around eye region
@@ -46,7 +41,7 @@ class EyeContactAnalyzer:
         self.ADAPTIVE_THRESHOLD_C = 4
 
     def _get_eye_region(self, face_landmarks, eye_indices, frame):
-        """Extract eye region with configurable padding"""
+        """Extract eye region (from the RGB view) with configurable padding"""
         eye = [(int(face_landmarks.landmark[i].x * frame.shape[1]), 
                 int(face_landmarks.landmark[i].y * frame.shape[0])) for i in eye_indices]
 
@@ -63,8 +58,8 @@ class EyeContactAnalyzer:
         if eye_frame is None or eye_frame.size == 0:
             return None
 
-        # Convert to grayscale and reduce noise
-        gray = cv2.cvtColor(eye_frame, cv2.COLOR_BGR2GRAY)
+        # Convert the RGB crop to grayscale and reduce noise
+        gray = cv2.cvtColor(eye_frame, cv2.COLOR_RGB2GRAY)
         gray = cv2.GaussianBlur(gray, (5, 5), 0)
 
         # Adaptive thresholding with configurable parameters
@@ -86,10 +81,10 @@ class EyeContactAnalyzer:
             
         return None
 
-    def _get_gaze_status(self, left_pupil_x, right_pupil_x, pupil_y, eye_width, eye_height):
+    def _is_looking_at_camera(self, left_pupil_x, right_pupil_x, pupil_y, eye_width, eye_height):
         """Determine gaze direction with configurable thresholds"""
         if left_pupil_x is None or right_pupil_x is None or pupil_y is None:
-            return "Not Looking at Camera"
+            return False
 
         # Compute average pupil position
         avg_pupil_x = (left_pupil_x + right_pupil_x) // 2
@@ -100,91 +95,111 @@ class EyeContactAnalyzer:
         up_threshold = eye_height * self.VERTICAL_GAZE_THRESHOLD
         down_threshold = eye_height * (1 - self.VERTICAL_GAZE_THRESHOLD)
 
-        if (left_threshold <= avg_pupil_x <= right_threshold and 
-            up_threshold <= pupil_y <= down_threshold):
-            return "Looking at Camera"
-        return "Looking Away"
-
-    def analyze_frame(self, frame):
-        """Analyze eye contact in a single frame with temporal smoothing"""
+        return (left_threshold <= avg_pupil_x <= right_threshold and
+                up_threshold <= pupil_y <= down_threshold)
+
+    def analyze(self, frame, face_mesh_results=None):
+        """
+        Analyze eye contact in a single frame with temporal smoothing and return
+        an EyeContactFrame. frame is a BGR array or a shared FrameContext. Face
+        mesh results computed elsewhere (e.g. shared with the expression
+        analyzer) can be passed in to skip running the graph again.
+        """
+        context = FrameContext.wrap(frame)
+        t = frame_time(context.timestamp, self.frame_count)
         self.frame_count += 1
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(frame_rgb)
+        result = self._analyze(t, context, face_mesh_results)
+        if result.looking_at_camera:
+            self.looking_at_camera_frames += 1
+        self.eye_contact_time.add(t, result.looking_at_camera)
+        return result
+
+    def _analyze(self, t, context, face_mesh_results):
+        """Gaze detection for one frame at time t (seconds)"""
+        if face_mesh_results is None:
+            face_mesh_results = self.face_mesh.process(context.rgb)
+        results = face_mesh_results
+
+        if not results.multi_face_landmarks:
+            return EyeContactFrame(False, False, False, None, None)
+
+        face_landmarks = results.multi_face_landmarks[0]
+        
+        # Extract eye regions
+        left_eye_frame, left_eye_coords = self._get_eye_region(
+            face_landmarks, self.LEFT_EYE_INDICES, context.rgb
+        )
+        right_eye_frame, right_eye_coords = self._get_eye_region(
+            face_landmarks, self.RIGHT_EYE_INDICES, context.rgb
+        )
 
-        gaze_status = "Not Looking at Camera"
-        highlight_color = (0, 0, 255)  # Default: Red
+        if left_eye_frame is None or right_eye_frame is None:
+            return EyeContactFrame(True, False, False, None, None)
 
-        if results.multi_face_landmarks:
-            face_landmarks = results.multi_face_landmarks[0]
-            
-            # Extract eye regions
-            left_eye_frame, left_eye_coords = self._get_eye_region(
-                face_landmarks, self.LEFT_EYE_INDICES, frame
-            )
-            right_eye_frame, right_eye_coords = self._get_eye_region(
-                face_landmarks, self.RIGHT_EYE_INDICES, frame
-            )
-
-            if left_eye_frame is not None and right_eye_frame is not None:
-                left_pupil = self._detect_pupil(left_eye_frame)
-                right_pupil = self._detect_pupil(right_eye_frame)
-
-                # Fallback for single eye detection
-                if left_pupil is None and right_pupil is not None:
-                    left_pupil = right_pupil
-                elif right_pupil is None and left_pupil is not None:
-                    right_pupil = left_pupil
-
-                if left_pupil and right_pupil:
-                    # Draw pupils
-                    cv2.circle(frame,
-                            (left_pupil[0] + left_eye_coords[0],
-                             left_pupil[1] + left_eye_coords[1]),
-                            5, (255, 0, 0), -1)
-                    cv2.circle(frame,
-                            (right_pupil[0] + right_eye_coords[0],
-                             right_pupil[1] + right_eye_coords[1]),
-                            5, (255, 0, 0), -1)
-                    
-                    # Get gaze status
-                    gaze_status = self._get_gaze_status(
-                        left_pupil[0], right_pupil[0],
-                        left_pupil[1],
-                        left_eye_coords[2] - left_eye_coords[0],
-                        left_eye_coords[3] - left_eye_coords[1]
-                    )
-
-                    # Update history and check ratio
-                    self.gaze_history.append(gaze_status == "Looking at Camera")
-                    good_gaze_ratio = sum(self.gaze_history) / len(self.gaze_history)
-
-                    if good_gaze_ratio >= self.GOOD_GAZE_RATIO:
-                        highlight_color = (0, 255, 0)  # Green
-                        self.looking_at_camera_frames += 1
-                        gaze_status = "Looking at Camera"
-                    else:
-                        highlight_color = (0, 255, 255)  # Yellow
-                        gaze_status = "Looking Away"
+        left_pupil = self._detect_pupil(left_eye_frame)
+        right_pupil = self._detect_pupil(right_eye_frame)
+
+        # Fallback for single eye detection
+        if left_pupil is None and right_pupil is not None:
+            left_pupil = right_pupil
+        elif right_pupil is None and left_pupil is not None:
+            right_pupil = left_pupil
+
+        if not (left_pupil and right_pupil):
+            return EyeContactFrame(True, False, False, None, None)
+
+        # Get gaze direction for this frame
+        looking = self._is_looking_at_camera(
+            left_pupil[0], right_pupil[0],
+            left_pupil[1],
+            left_eye_coords[2] - left_eye_coords[0],
+            left_eye_coords[3] - left_eye_coords[1]
+        )
+
+        # Update history and check ratio
+        self.gaze_history.add(t, looking)
+        looking_at_camera = self.gaze_history.ratio() >= self.GOOD_GAZE_RATIO
+
+        return EyeContactFrame(
+            True, True, looking_at_camera,
+            (left_pupil[0] + left_eye_coords[0], left_pupil[1] + left_eye_coords[1]),
+            (right_pupil[0] + right_eye_coords[0], right_pupil[1] + right_eye_coords[1])
+        )
+
+    def analyze_frame(self, frame, face_mesh_results=None):
+        """Analyze eye contact and draw the pupils and gaze status on the frame"""
+        context = FrameContext.wrap(frame)
+        result = self.analyze(context, face_mesh_results)
+        frame = context.bgr
+
+        if not result.tracked:
+            highlight_color = (0, 0, 255)  # Red
+        elif result.looking_at_camera:
+            highlight_color = (0, 255, 0)  # Green
+        else:
+            highlight_color = (0, 255, 255)  # Yellow
+
+        # Draw pupils
+        if result.tracked:
+            cv2.circle(frame, result.left_pupil, 5, (255, 0, 0), -1)
+            cv2.circle(frame, result.right_pupil, 5, (255, 0, 0), -1)
 
         # Add status text
-        cv2.putText(frame, f"Eye Contact: {gaze_status}", (10, 50),
+        cv2.putText(frame, f"Eye Contact: {result.status}", (10, 50),
                     cv2.FONT_HERSHEY_SIMPLEX, 1, highlight_color, 2)
 
-        return gaze_status, frame
+        return result.status, frame
+
+    def summary(self):
+        """Final eye contact score: share of the session time spent looking at the camera"""
+        return EyeContactSummary(self.eye_contact_time.percentage(), self.frame_count)
 
     def get_eye_contact_score(self):
         """Calculate the overall eye contact score"""
-        if self.frame_count == 0:
-            return {
-                "eye_contact_score": 0,
-                "total_frames": 0
-            }
-        
-        eye_contact_score = (self.looking_at_camera_frames / self.frame_count) * 100
-        
+        summary = self.summary()
         return {
-            "eye_contact_score": round(eye_contact_score, 2),
-            "total_frames": self.frame_count
+            "eye_contact_score": round(summary.eye_contact_score, 2),
+            "total_frames": summary.total_frames
         }
 
 def main():
@@ -0,0 +1,206 @@
+import math
+import numpy as np
+from collections import deque
+
+# Time-aware smoothing and scoring, so the analyzers give the same results at
+# 2-3 fps as at the 10 fps they were tuned on.
+NOMINAL_FPS = 10.0  # Used to derive a time when a frame carries no timestamp
+MAX_FRAME_GAP = 1.0  # Seconds a single frame may count for in a score
+MIN_WINDOW_FRAMES = 3  # Frames a smoothing window keeps even when they span more than its seconds
+
+# One-Euro filter defaults for normalized (0-1) landmark coordinates
+MIN_CUTOFF = 1.0  # Hz; lower means smoother when the landmarks are still
+BETA = 1.0  # Cutoff increase per unit/s of speed; higher means less lag on motion
+D_CUTOFF = 1.0  # Hz, for the speed estimate
+
+
+def frame_time(timestamp, frame_index):
+    """Frame timestamp in seconds, or a nominal one derived from the frame index"""
+    return float(timestamp) if timestamp is not None else frame_index / NOMINAL_FPS
+
+
+def frame_durations(times, max_gap=MAX_FRAME_GAP):
+    """
+    Weight of each frame in a time-weighted score: the time until the next
+    frame (capped at max_gap), with the last frame repeating the previous gap.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    if len(times) < 2:
+        return np.ones(len(times))
+    gaps = np.clip(np.diff(times), 0.0, max_gap)
+    return np.append(gaps, gaps[-1])
+
+
+class TimeWindow:
+    """
+    Values seen within the last `seconds`, evicted by timestamp rather than
+    count. At low frame rates the last min_frames values are kept anyway, so
+    a window never shrinks to a single unsmoothed frame.
+    """
+    def __init__(self, seconds, min_frames=MIN_WINDOW_FRAMES):
+        self.seconds = seconds
+        self.min_frames = min_frames
+        self.items = deque()
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, t, value):
+        self.items.append((t, value))
+        while len(self.items) > self.min_frames and self.items[0][0] <= t - self.seconds:
+            self.items.popleft()
+
+    def ratio(self):
+        """Mean of the values in the window"""
+        return sum(value for _, value in self.items) / len(self.items)
+
+
+class TimeWeightedScore:
+    """
+    Share of time a condition held. Each frame counts for the time until the
+    next frame (see frame_durations), so dropped or sparse frames don't skew
+    the score the way a plain frame count does.
+    """
+    def __init__(self, max_gap=MAX_FRAME_GAP):
+        self.max_gap = max_gap
+        self.frames = 0
+        self.good_time = 0.0
+        self.total_time = 0.0
+        self._last = None  # (t, value) of the frame whose duration is still open
+        self._last_gap = None
+
+    def add(self, t, value):
+        if self._last is not None:
+            gap = min(max(t - self._last[0], 0.0), self.max_gap)
+            self.total_time += gap
+            if self._last[1]:
+                self.good_time += gap
+            self._last_gap = gap
+        self._last = (t, bool(value))
+        self.frames += 1
+
+    def totals(self):
+        """(seconds the condition held, seconds covered), the last frame counting for the previous gap"""
+        if self._last is None:
+            return 0.0, 0.0
+        gap = self._last_gap if self._last_gap is not None else 1.0
+        return self.good_time + (gap if self._last[1] else 0.0), self.total_time + gap
+
+    def percentage(self):
+        if self._last is None:
+            return 0.0
+        good, total = self.totals()
+        if total <= 0:
+            return 100.0 if self._last[1] else 0.0
+        return good / total * 100
+
+
+def combined_percentage(scores):
+    """Share of time a condition held across several TimeWeightedScores (e.g. one per question)"""
+    good = total = 0.0
+    for score in scores:
+        score_good, score_total = score.totals()
+        good += score_good
+        total += score_total
+    return good / total * 100 if total > 0 else 0.0
+
+
+class OneEuroFilter:
+    """
+    One-Euro filter (Casiez et al. 2012) over a numpy array of coordinates.
+    Smooths jitter when the input is still and follows it closely when it
+    moves; the smoothing adapts to the actual time between samples. The
+    filter resets on missing (NaN) input or after gaps longer than max_gap.
+    """
+    def __init__(self, min_cutoff=MIN_CUTOFF, beta=BETA, d_cutoff=D_CUTOFF, max_gap=MAX_FRAME_GAP):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.max_gap = max_gap
+        self.reset()
+
+    def reset(self):
+        self.t_prev = None
+        self.x_prev = None
+        self.dx_prev = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, t, x):
+        x = np.asarray(x, dtype=np.float32)
+        if np.isnan(x).any():
+            self.reset()
+            return x
+        if self.x_prev is None or x.shape != self.x_prev.shape or t - self.t_prev > self.max_gap:
+            self.t_prev, self.x_prev, self.dx_prev = t, x, np.zeros_like(x)
+            return x
+        dt = t - self.t_prev
+        if dt <= 0:
+            return self.x_prev
+
+        dx = (x - self.x_prev) / dt
+        dx_hat = self.dx_prev + self._alpha(self.d_cutoff, dt) * (dx - self.dx_prev)
+        cutoff = self.min_cutoff + self.beta * np.abs(dx_hat)
+        x_hat = self.x_prev + self._alpha(cutoff, dt) * (x - self.x_prev)
+
+        self.t_prev, self.x_prev, self.dx_prev = t, x_hat, dx_hat
+        return x_hat
+
+
+def _write_back(landmarks, values, fields):
+    """Copy filtered coordinates back into MediaPipe landmark messages"""
+    for landmark, row in zip(landmarks, values.tolist()):
+        for field, value in zip(fields, row):
+            setattr(landmark, field, value)
+
+
+class LandmarkFilter:
+    """
+    Per-session One-Euro filtering of the FaceMesh and Pose landmarks. The
+    results are filtered in place, so every analyzer downstream sees the
+    same smoothed landmarks.
+    """
+    def __init__(self, **params):
+        self.face_filter = OneEuroFilter(**params)
+        self.pose_filter = OneEuroFilter(**params)
+        self.face_frames = 0
+        self.pose_frames = 0
+
+    def face(self, timestamp, face_mesh_results):
+        """Filter the first face of FaceMesh results taken at timestamp (seconds)"""
+        t = frame_time(timestamp, self.face_frames)
+        self.face_frames += 1
+        if not face_mesh_results.multi_face_landmarks:
+            self.face_filter.reset()
+            return face_mesh_results
+        landmarks = face_mesh_results.multi_face_landmarks[0].landmark
+        values = np.array([(lm.x, lm.y, lm.z) for lm in landmarks], dtype=np.float32)
+        _write_back(landmarks, self.face_filter(t, values), ("x", "y", "z"))
+        return face_mesh_results
+
+    def pose(self, timestamp, pose_results):
+        """Filter Pose landmark positions (visibility is left untouched)"""
+        t = frame_time(timestamp, self.pose_frames)
+        self.pose_frames += 1
+        if not pose_results.pose_landmarks:
+            self.pose_filter.reset()
+            return pose_results
+        landmarks = pose_results.pose_landmarks.landmark
+        values = np.array([(lm.x, lm.y, lm.z) for lm in landmarks], dtype=np.float32)
+        _write_back(landmarks, self.pose_filter(t, values), ("x", "y", "z"))
+        return pose_results
+
+
+def smooth_landmarks(data, **params):
+    """One-Euro filter stacked landmark arrays (see LandmarkSequence.stack) over time"""
+    face_filter = OneEuroFilter(**params)
+    pose_filter = OneEuroFilter(**params)
+    face = data["face"].astype(np.float32)
+    pose = data["pose"].astype(np.float32)
+    for i, t in enumerate(data["t"].tolist()):
+        face[i] = face_filter(t, face[i])
+        pose[i, :, :3] = pose_filter(t, pose[i, :, :3])
+    return dict(data, face=face, pose=pose)
@@ -0,0 +1,123 @@
+import cv2
+import numpy as np
+
+# OpenCV >= 4.10 can decode straight into the RGB layout MediaPipe expects
+IMREAD_COLOR_RGB = getattr(cv2, "IMREAD_COLOR_RGB", None)
+
+
+class FrameContext:
+    """
+    A decoded frame shared by every analyzer.
+
+    The frame is decoded once (into RGB when OpenCV supports it, since that is
+    what the MediaPipe graphs consume) and every derived view - BGR for drawing,
+    RGB, grayscale, downscaled copies - is computed lazily at most once.
+    """
+    __slots__ = ("timestamp", "encoded", "_bgr", "_rgb", "_gray", "_scaled")
+
+    def __init__(self, bgr=None, rgb=None, timestamp=None, encoded=None):
+        if bgr is None and rgb is None:
+            raise ValueError("FrameContext needs a BGR or RGB image")
+        self.timestamp = timestamp
+        self.encoded = encoded  # Original JPEG/PNG bytes, kept for checkpointing
+        self._bgr = bgr
+        self._rgb = rgb
+        self._gray = None
+        self._scaled = {}
+
+    @staticmethod
+    def _decode(data):
+        """(rgb, bgr) decoded from encoded bytes; one of them is None, both if decoding fails"""
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        if IMREAD_COLOR_RGB is not None:
+            return cv2.imdecode(buffer, IMREAD_COLOR_RGB), None
+        return None, cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+    @classmethod
+    def from_bytes(cls, data, timestamp=None):
+        """Decode an encoded image (JPEG/PNG) once; returns None if it can't be decoded"""
+        rgb, bgr = cls._decode(data)
+        if rgb is None and bgr is None:
+            return None
+        return cls(bgr=bgr, rgb=rgb, timestamp=timestamp, encoded=bytes(data))
+
+    def _image(self):
+        """Decode the encoded bytes again if drop_views() released the image"""
+        if self._rgb is None and self._bgr is None:
+            self._rgb, self._bgr = self._decode(self.encoded)
+
+    @classmethod
+    def wrap(cls, frame, timestamp=None):
+        """Return frame unchanged if it already is a FrameContext, else wrap a BGR array"""
+        if isinstance(frame, cls):
+            if frame.timestamp is None:
+                frame.timestamp = timestamp
+            return frame
+        return cls(bgr=frame, timestamp=timestamp)
+
+    @property
+    def nbytes(self):
+        """Memory held by the encoded bytes and every decoded view"""
+        total = len(self.encoded or b"")
+        for view in (self._bgr, self._rgb, self._gray, *self._scaled.values()):
+            if view is not None:
+                total += view.nbytes
+        return total
+
+    @property
+    def shape(self):
+        self._image()
+        return (self._rgb if self._rgb is not None else self._bgr).shape
+
+    @property
+    def bgr(self):
+        """BGR view (OpenCV drawing/display layout)"""
+        self._image()
+        if self._bgr is None:
+            self._bgr = cv2.cvtColor(self._rgb, cv2.COLOR_RGB2BGR)
+        return self._bgr
+
+    @property
+    def rgb(self):
+        """RGB view (MediaPipe input layout)"""
+        self._image()
+        if self._rgb is None:
+            self._rgb = cv2.cvtColor(self._bgr, cv2.COLOR_BGR2RGB)
+        return self._rgb
+
+    @property
+    def gray(self):
+        """Single-channel luminance view"""
+        if self._gray is None:
+            self._image()
+            if self._rgb is not None:
+                self._gray = cv2.cvtColor(self._rgb, cv2.COLOR_RGB2GRAY)
+            else:
+                self._gray = cv2.cvtColor(self._bgr, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    def downscaled_gray(self, max_width):
+        """Grayscale view no wider than max_width, cached per width"""
+        view = self._scaled.get(max_width)
+        if view is None:
+            gray = self.gray
+            if gray.shape[1] <= max_width:
+                view = gray
+            else:
+                height = int(gray.shape[0] * max_width / gray.shape[1])
+                view = cv2.resize(gray, (max_width, height), interpolation=cv2.INTER_AREA)
+            self._scaled[max_width] = view
+        return view
+
+    def drop_views(self, keep_image=True):
+        """
+        Free derived views once a frame has been analyzed, keeping only the
+        decoded image. With keep_image=False the image goes too when the
+        encoded bytes can restore it, so a stored frame costs only its JPEG.
+        """
+        if self._rgb is not None and self._bgr is not None:
+            self._bgr = None
+        if not keep_image and self.encoded is not None:
+            self._rgb = self._bgr = None
+        self._gray = None
+        self._scaled = {}
@@ -0,0 +1,175 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .frame_context import FrameContext
+from .quality import assess_image, assess_landmarks
+from .filters import LandmarkFilter
+from app.runtime import get_thread_budget, enforce_thread_budget
+
+# Parallel stages per frame: the face and pose branches plus their analyzers
+STAGES_PER_FRAME = 3
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_stage_executor():
+    """Shared pool for per-frame stages, sized from the runtime vision budget"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = get_thread_budget()["vision_workers"] * STAGES_PER_FRAME
+            _executor = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix="frame-stage",
+                initializer=enforce_thread_budget
+            )
+    return _executor
+
+
+def _gated(analyze):
+    """Wrap an analyzer stage so it only runs on frames that passed the quality gate"""
+    def stage(quality, *args):
+        return analyze(*args) if quality.usable else None
+    return stage
+
+
+class StageGraph:
+    """
+    A small DAG of named stages. Each stage is (name, dependencies, function)
+    and is called with the outputs of its dependencies as positional arguments.
+    A stage is submitted as soon as all of its dependencies have finished, so
+    independent branches run concurrently.
+    """
+    def __init__(self, stages):
+        self.stages = {name: (tuple(deps), fn) for name, deps, fn in stages}
+        self.dependents = {name: [] for name in self.stages}
+        for name, (deps, _) in self.stages.items():
+            for dep in deps:
+                if dep in self.dependents:
+                    self.dependents[dep].append(name)
+
+    def run(self, executor, **inputs):
+        """
+        Execute the graph on the executor and return every stage output by name.
+        If a stage fails, no further stages are started and the first error is
+        raised once every stage already running has finished, so no stage is
+        still using the caller's graphs after run() returns.
+        """
+        results = dict(inputs)
+        pending = {
+            name: {dep for dep in deps if dep not in inputs}
+            for name, (deps, _) in self.stages.items()
+        }
+        lock = threading.Lock()
+        finished = threading.Event()
+        errors = []
+        roots = [name for name, deps in pending.items() if not deps]
+        in_flight = [len(roots)]  # Submitted (or about to be) and not done yet
+
+        def submit(name):
+            deps, fn = self.stages[name]
+            try:
+                future = executor.submit(fn, *[results[dep] for dep in deps])
+            except Exception as e:
+                # e.g. the executor is shutting down; count the stage as failed
+                with lock:
+                    errors.append(e)
+                    in_flight[0] -= 1
+                    if in_flight[0] == 0:
+                        finished.set()
+                return
+            future.add_done_callback(lambda f: on_done(name, f))
+
+        def on_done(name, future):
+            ready = []
+            with lock:
+                in_flight[0] -= 1
+                if future.exception() is not None:
+                    errors.append(future.exception())
+                elif not errors:
+                    results[name] = future.result()
+                    for dependent in self.dependents[name]:
+                        pending[dependent].discard(name)
+                        if not pending[dependent]:
+                            ready.append(dependent)
+                    in_flight[0] += len(ready)
+                if in_flight[0] == 0:
+                    finished.set()
+            for dependent in ready:
+                submit(dependent)
+
+        for name in roots:
+            submit(name)
+        finished.wait()
+
+        if errors:
+            raise errors[0]
+        return results
+
+
+class FramePipeline:
+    """
+    Per-frame analysis as a DAG:
+
+        frame -> quality gate -> RGB -> FaceMesh -> filter -> {eye contact, expression}
+                                     -> Pose     -> filter -> landmark quality -> posture
+
+    FaceMesh and Pose are independent, and the MediaPipe graphs release the GIL
+    while they run, so a frame costs roughly its slowest branch instead of the
+    sum of all stages. FaceMesh runs once and is shared by the eye contact and
+    expression analyzers. Every stage reads the same FrameContext, so the frame
+    is converted to RGB once and never copied or drawn on, and each analyzer
+    returns a typed result without formatting any strings.
+
+    Blurry, dark or overexposed frames are rejected before any graph runs, and
+    frames whose head and shoulders are barely visible to the pose graph skip
+    the analyzers, so unusable frames never reach the scores.
+
+    Landmarks are One-Euro filtered against the frame timestamps before any
+    analyzer sees them, so sparse (2-3 fps) input is smoothed as well as 10 fps
+    input. Frames must be processed in order; use one pipeline per session.
+    """
+    def __init__(self, eye_contact_analyzer, posture_analyzer, expression_analyzer, executor=None,
+                 landmark_filter=None):
+        self.eye_contact_analyzer = eye_contact_analyzer
+        self.posture_analyzer = posture_analyzer
+        self.expression_analyzer = expression_analyzer
+        self.executor = executor
+        self.landmark_filter = landmark_filter or LandmarkFilter()
+        landmark_filter = self.landmark_filter
+
+        # Reuse the analyzers' own graphs (FaceMesh with refined landmarks, Pose)
+        face_mesh = eye_contact_analyzer.face_mesh
+        pose = posture_analyzer.pose
+
+        # The RGB view is materialized once, before the branches fan out.
+        # Analyzer stages return None when the landmark quality check fails.
+        self.graph = StageGraph([
+            ("rgb", ("frame",), lambda context: context.rgb),
+            ("face_mesh", ("rgb",), face_mesh.process),
+            ("pose", ("rgb",), pose.process),
+            ("face_filtered", ("frame", "face_mesh"),
+             lambda context, results: landmark_filter.face(context.timestamp, results)),
+            ("pose_filtered", ("frame", "pose"),
+             lambda context, results: landmark_filter.pose(context.timestamp, results)),
+            ("quality", ("image_quality", "pose_filtered"), assess_landmarks),
+            ("eye_contact", ("quality", "frame", "face_filtered"), _gated(eye_contact_analyzer.analyze)),
+            ("expression", ("quality", "frame", "face_filtered"), _gated(
+                lambda context, results: expression_analyzer.analyze(results, context.timestamp))),
+            ("posture", ("quality", "frame", "pose_filtered"), _gated(posture_analyzer.analyze))
+        ])
+
+    def process(self, frame):
+        """
+        Run every stage for one frame (BGR array or FrameContext stamped with its
+        capture time in seconds) and return the stage outputs: 'quality' ->
+        FrameQuality, 'eye_contact' -> EyeContactFrame, 'posture' -> PostureFrame,
+        'expression' -> ExpressionFrame, plus the MediaPipe results (filtered in
+        place). When outputs['quality'].usable is False the analyzer
+        outputs are missing or None and the frame was not counted.
+        """
+        context = FrameContext.wrap(frame)
+        quality = assess_image(context)
+        if not quality.usable:
+            return {"frame": context, "quality": quality}
+        return self.graph.run(self.executor or get_stage_executor(), frame=context, image_quality=quality)
@@ -0,0 +1,112 @@
+import threading
+from contextlib import contextmanager
+import mediapipe as mp
+from app.runtime import get_thread_budget
+
+mp_face_mesh = mp.solutions.face_mesh
+mp_pose = mp.solutions.pose
+
+# Graph settings shared by the analyzers and the pool
+FACE_MESH_OPTIONS = {
+    "static_image_mode": False,
+    "max_num_faces": 1,
+    "refine_landmarks": True,
+    "min_detection_confidence": 0.5,
+    "min_tracking_confidence": 0.5
+}
+POSE_OPTIONS = {
+    "static_image_mode": False,
+    "model_complexity": 2,
+    "min_detection_confidence": 0.5,
+    "min_tracking_confidence": 0.5
+}
+
+
+def create_face_mesh():
+    return mp_face_mesh.FaceMesh(**FACE_MESH_OPTIONS)
+
+
+def create_pose():
+    return mp_pose.Pose(**POSE_OPTIONS)
+
+
+class GraphSet:
+    """One FaceMesh and one Pose graph, used by a single session at a time"""
+    __slots__ = ("face_mesh", "pose")
+
+    def __init__(self):
+        self.face_mesh = create_face_mesh()
+        self.pose = create_pose()
+
+    def reset(self):
+        """Clear the tracking state so the next session starts from detection"""
+        for name, factory in (("face_mesh", create_face_mesh), ("pose", create_pose)):
+            graph = getattr(self, name)
+            if hasattr(graph, "reset"):
+                graph.reset()
+            else:
+                graph.close()
+                setattr(self, name, factory())
+
+    def close(self):
+        self.face_mesh.close()
+        self.pose.close()
+
+
+class GraphPool:
+    """
+    Reusable MediaPipe graph sets. With static_image_mode=False the graphs
+    track landmarks from frame to frame, so a set is leased for a whole
+    interview or recording and is never shared between concurrent requests.
+    Its tracking state is reset before it goes back to the pool so nothing
+    carries over to the next candidate. Sets are created on demand (building
+    the Pose graph takes far longer than resetting it) and at most max_idle
+    are kept.
+    """
+    def __init__(self, max_idle=None):
+        self.max_idle = max_idle if max_idle is not None else get_thread_budget()["vision_workers"]
+        self.idle = []
+        self.lock = threading.Lock()
+        self.created = 0
+
+    def acquire(self):
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+            self.created += 1
+        return GraphSet()
+
+    def release(self, graphs):
+        try:
+            graphs.reset()
+        except Exception as e:
+            print(f"Error resetting MediaPipe graphs, discarding them: {str(e)}")
+            graphs.close()
+            return
+        with self.lock:
+            if len(self.idle) < self.max_idle:
+                self.idle.append(graphs)
+                return
+        graphs.close()
+
+    @contextmanager
+    def lease(self):
+        """Hold one graph set for the duration of the block"""
+        graphs = self.acquire()
+        try:
+            yield graphs
+        finally:
+            self.release(graphs)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_graph_pool():
+    """Process-wide graph pool, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = GraphPool()
+        return _pool
@@ -1,84 +1,161 @@
 import cv2
 import numpy as np
-import mediapipe as mp
+import threading
+import time
+from collections import deque
 from .posture_analyzer import PostureAnalyzer
 from .eye_contact_analyzer import EyeContactAnalyzer
 from .expression_analyzer import ExpressionAnalyzer
+from .frame_pipeline import FramePipeline
+from .frame_context import FrameContext
+from .quality import QualityStats
+from app.runtime import get_thread_budget, enforce_thread_budget
 
-# Initialize MediaPipe Face Mesh
-mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(
-    static_image_mode=False,
-    max_num_faces=1,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
-)
+# Bounded queue sizes between the pipeline stages
+ANALYSIS_QUEUE_SIZE = 1  # Analysis always works on the freshest frame
+DISPLAY_QUEUE_SIZE = 2
+
+class DropOldestQueue:
+    """Bounded queue that discards the oldest item instead of blocking the producer"""
+    def __init__(self, maxsize):
+        self._items = deque(maxlen=maxsize)
+        self._condition = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._condition:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest queued item, or None if nothing arrived before the timeout"""
+        with self._condition:
+            if not self._items:
+                self._condition.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+class RateCounter:
+    """Counts events and reports the achieved rate in events per second"""
+    def __init__(self):
+        self.count = 0
+        self.start_time = None
+        self.last_time = None
+
+    def tick(self):
+        now = time.perf_counter()
+        if self.start_time is None:
+            self.start_time = now
+        self.last_time = now
+        self.count += 1
+
+    def fps(self):
+        if self.count < 2 or self.last_time == self.start_time:
+            return 0.0
+        return (self.count - 1) / (self.last_time - self.start_time)
 
 def main():
     """
-    Main function for running the interview monitor
+    Main function for running the interview monitor.
+    Capture, analysis and display run as separate stages connected by
+    drop-oldest queues, so the preview keeps the camera rate while the
+    analyzers run as fast as the CPU allows.
     """
-    cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
+    # Use the process's budget (RUNTIME_PRESET when run on its own)
+    get_thread_budget()
     
+    cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
+    cap.set(cv2.CAP_PROP_FPS, 30)
+
     # Initialize analyzers
     eye_contact_analyzer = EyeContactAnalyzer()
     posture_analyzer = PostureAnalyzer()
     expression_analyzer = ExpressionAnalyzer()
-    
+    pipeline = FramePipeline(eye_contact_analyzer, posture_analyzer, expression_analyzer)
+
     print("\nInterview monitoring started...")
     print("Recording your interview. Just act natural!")
     print("Press 'q' to stop and see your scores.\n")
-    
+
     window_name = 'Interview Recording'
     cv2.namedWindow(window_name)
-    
-    frame_count = 0
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            print("Error reading from camera")
-            break
-            
-        frame_count += 1
-        
-        # Show plain camera feed first, before any processing
-        cv2.imshow(window_name, frame)
-            
-        # Process frame with face mesh
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = face_mesh.process(frame_rgb)
-        
-        # Process frame with each analyzer silently (without drawing)
-        # Use deep copies to prevent any modifications to original frame
-        eye_status, _ = eye_contact_analyzer.analyze_frame(frame.copy())
-        posture_status, _ = posture_analyzer.analyze_frame(frame.copy())
-        _, _, expression_details = expression_analyzer.analyze_frame(frame.copy(), results)
-        
+
+    stop_event = threading.Event()
+    display_queue = DropOldestQueue(DISPLAY_QUEUE_SIZE)
+    analysis_queue = DropOldestQueue(ANALYSIS_QUEUE_SIZE)
+    capture_rate = RateCounter()
+    analysis_rate = RateCounter()
+    quality_stats = QualityStats()
+
+    def capture_stage():
+        """Read frames at the camera rate and hand them to display and analysis"""
+        while not stop_event.is_set() and cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                print("Error reading from camera")
+                break
+            capture_rate.tick()
+            display_queue.put(frame)
+            # Stamp frames at capture so smoothing and scores follow real time
+            analysis_queue.put(FrameContext(bgr=frame, timestamp=time.monotonic()))
+        stop_event.set()
+
+    def analysis_stage():
+        """Run the per-frame stage graph on the most recent captured frame"""
+        enforce_thread_budget()
+        while not stop_event.is_set():
+            frame = analysis_queue.get(timeout=0.1)
+            if frame is None:
+                continue
+
+            # FaceMesh and Pose branches run in parallel; the analyzers accumulate their own scores
+            outputs = pipeline.process(frame)
+            quality_stats.record(outputs["quality"])
+            analysis_rate.tick()
+
+    capture_thread = threading.Thread(target=capture_stage, daemon=True)
+    analysis_thread = threading.Thread(target=analysis_stage, daemon=True)
+    capture_thread.start()
+    analysis_thread.start()
+
+    # Display stays on the main thread (required by HighGUI on most platforms)
+    while not stop_event.is_set():
+        frame = display_queue.get(timeout=0.1)
+        if frame is not None:
+            preview = frame.copy()
+            cv2.putText(preview, f"Capture: {capture_rate.fps():.1f} fps | Analysis: {analysis_rate.fps():.1f} fps",
+                        (10, preview.shape[0] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+            cv2.imshow(window_name, preview)
+
         # Break loop on 'q' press
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
-    
+
+    stop_event.set()
+    capture_thread.join()
+    analysis_thread.join()
+    frame_count = analysis_rate.count
+
     # Clean up camera and windows
     cap.release()
     cv2.destroyAllWindows()
     cv2.waitKey(1)
-    
+
     if frame_count == 0:
         print("No frames were processed. Please check if your camera is connected and not in use by another application.")
         return
-    
+
+    print(f"\nCaptured {capture_rate.count} frames at {capture_rate.fps():.1f} fps, "
+          f"analyzed {frame_count} frames at {analysis_rate.fps():.1f} fps "
+          f"({analysis_queue.dropped} skipped)")
+
     # Generate final report
     eye_contact_report = eye_contact_analyzer.get_eye_contact_score()
     posture_report = posture_analyzer.get_posture_score()
-    
-    # Get final expression details
-    smile_percentage = 0.0
-    if expression_details:
-        smile_time = next((detail for detail in expression_details if "Time Spent Smiling" in detail), "0%")
-        try:
-            smile_percentage = float(smile_time.split(":")[1].strip().rstrip('%'))
-        except:
-            smile_percentage = 0.0
+    smile_percentage = expression_analyzer.summary().smile_percentage
     
     # Calculate overall score
     overall_score = (
@@ -103,6 +180,10 @@ def main():
     print("\n" + "-"*50)
     print(f"OVERALL SCORE: {overall_score:.1f}%")
     print("-"*50)
+    print(f"Capture rate: {capture_rate.fps():.1f} fps | Analysis rate: {analysis_rate.fps():.1f} fps")
+    quality = quality_stats.report()
+    print(f"Frame quality: {quality['skipped_frames']} of {frame_count} frames skipped "
+          f"({quality['skip_rate']:.1f}%) {quality['skip_reasons']}")
     
     # Save detailed report to file
     with open("interview_report.txt", "w") as file:
@@ -122,6 +203,10 @@ def main():
         file.write("\n" + "-"*50 + "\n")
         file.write(f"OVERALL SCORE: {overall_score:.1f}%\n")
         file.write("-"*50 + "\n")
+
+        file.write(f"\nCapture rate: {capture_rate.fps():.1f} fps\n")
+        file.write(f"Analysis rate: {analysis_rate.fps():.1f} fps\n")
+        file.write(f"Frames skipped for quality: {quality['skipped_frames']} ({quality['skip_rate']:.1f}%)\n")
     
     print(f"\nDetailed report saved to interview_report.txt")
 
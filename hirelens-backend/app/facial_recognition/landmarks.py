@@ -0,0 +1,400 @@
+import io
+import struct
+import numpy as np
+from .filters import frame_durations, MIN_WINDOW_FRAMES
+
+# Landmark-first scoring: the pipeline keeps compact per-frame landmark arrays
+# and every threshold below is applied vectorized over the stacked arrays, so a
+# whole interview can be rescored without frames or models.
+#
+#   face: (N, 478, 3) float16 - FaceMesh x, y, z with refined iris points
+#   pose: (N, 33, 4)  float16 - Pose x, y, z, visibility
+#   gaze: (N,)        float32 - the live EyeContactAnalyzer's decision (1/0),
+#                               NaN for client landmarks
+#
+# Frames where nothing was detected are stored as NaN rows.
+
+FACE_LANDMARKS = 478
+POSE_LANDMARKS = 33
+STORAGE_DTYPE = np.float16
+
+# Pose landmark indices (mp.solutions.pose.PoseLandmark)
+NOSE = 0
+LEFT_EAR, RIGHT_EAR = 7, 8
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_HIP, RIGHT_HIP = 23, 24
+
+# Face mesh indices
+MOUTH_LEFT, MOUTH_RIGHT = 61, 291
+UPPER_LIP, LOWER_LIP = 13, 14
+LEFT_EYE = [33, 160, 158, 133, 153, 144]
+RIGHT_EYE = [362, 385, 387, 263, 373, 380]
+LEFT_IRIS, RIGHT_IRIS = 468, 473  # Iris centers (refine_landmarks=True)
+
+# Posture checks: metric -> (issue name, threshold, "significant" multiplier)
+POSTURE_CHECKS = {
+    'shoulder_slope': ("Uneven Shoulders", 0.20, 2.5),
+    'head_offset': ("Off-Center Head", 0.10, 2.0),
+    'head_forward': ("Forward Head", 0.15, 2.0),
+    'spine_angle': ("Slouching", 0.25, 2.0),
+    'shoulder_rotation': ("Poor Shoulder Alignment", 0.30, 2.5),
+}
+POSTURE_GOOD_CHECKS = 0.50  # Share of passed checks for a good posture frame
+POSTURE_EXCELLENT_CHECKS = 0.70  # Only used for the live per-frame rating
+POSTURE_WINDOW = 0.45  # Seconds of history (the last 5 frames at 10 fps, at least MIN_WINDOW_FRAMES)
+POSTURE_EXCELLENT_RATIO = 0.60  # Share of good frames in the window
+POSTURE_GOOD_RATIO = 0.40
+
+# Smile detection
+SMILE_THRESHOLD = 0.15  # "Slight Smile" and up counts as smiling
+
+# Binary packets of client-computed landmarks (browser MediaPipe), little-endian:
+#   header: magic b"HLLM", version u8, flags u8 (bit 0 face, bit 1 pose),
+#           face point count u16 (must be 478: FaceMesh with refineLandmarks, since
+#           gaze is scored from the iris points), timestamp f64 (seconds since the
+#           interview session started, on the client's clock; packets in one body
+#           must be in time order)
+#   body:   face points * 3 float16 if bit 0, then 33 * 4 float16 if bit 1
+PACKET_MAGIC = b"HLLM"
+PACKET_VERSION = 1
+PACKET_HEADER = struct.Struct("<4sBBHd")
+PACKET_FACE = 0x01
+PACKET_POSE = 0x02
+
+# Gaze: iris center must sit in the middle band of the eye box
+GAZE_THRESHOLD = 0.40
+GAZE_WINDOW = 0.45  # Seconds of history (the last 5 frames at 10 fps, at least MIN_WINDOW_FRAMES)
+GAZE_GOOD_RATIO = 0.6
+
+
+def face_array(face_mesh_results):
+    """(478, 3) float32 face landmarks of the first face, or NaN if none was detected"""
+    face = np.full((FACE_LANDMARKS, 3), np.nan, dtype=np.float32)
+    if face_mesh_results is not None and face_mesh_results.multi_face_landmarks:
+        points = [(lm.x, lm.y, lm.z) for lm in face_mesh_results.multi_face_landmarks[0].landmark]
+        face[:len(points)] = points[:FACE_LANDMARKS]
+    return face
+
+
+def pose_array(pose_results):
+    """(33, 4) float32 pose landmarks, or NaN if no pose was detected"""
+    pose = np.full((POSE_LANDMARKS, 4), np.nan, dtype=np.float32)
+    if pose_results is not None and pose_results.pose_landmarks:
+        pose[:] = [(lm.x, lm.y, lm.z, lm.visibility) for lm in pose_results.pose_landmarks.landmark]
+    return pose
+
+
+def landmark_arrays(face_mesh_results, pose_results):
+    """Storage-dtype (face, pose) arrays of one frame's MediaPipe results"""
+    return (face_array(face_mesh_results).astype(STORAGE_DTYPE),
+            pose_array(pose_results).astype(STORAGE_DTYPE))
+
+
+def _present(landmarks):
+    """Per-frame mask of frames where the landmarks were detected"""
+    return ~np.isnan(landmarks[:, 0, 0])
+
+
+def _window_ratio(times, values, seconds):
+    """Mean of each value and the values less than `seconds` (or MIN_WINDOW_FRAMES frames) before it, like filters.TimeWindow"""
+    values = np.asarray(values, dtype=np.float32)
+    if len(values) == 0:
+        return values
+    totals = np.concatenate(([0.0], np.cumsum(values)))
+    end = np.arange(1, len(values) + 1)
+    start = np.searchsorted(times, times - seconds, side='right')
+    start = np.minimum(start, np.maximum(end - MIN_WINDOW_FRAMES, 0))
+    return (totals[end] - totals[start]) / (end - start)
+
+
+def _time_weighted(times, values):
+    """Percentage of time values held (see filters.TimeWeightedScore)"""
+    if len(times) == 0:
+        return 0.0
+    weights = frame_durations(times)
+    if np.sum(weights) <= 0:
+        return float(np.mean(values) * 100)
+    return float(np.sum(weights * values) / np.sum(weights) * 100)
+
+
+def posture_metrics(pose):
+    """Posture angles for (N, 33, 4) pose landmarks, one (N,) array per metric"""
+    pose = np.asarray(pose, dtype=np.float32)
+    left_shoulder, right_shoulder = pose[:, LEFT_SHOULDER, :2], pose[:, RIGHT_SHOULDER, :2]
+    left_hip, right_hip = pose[:, LEFT_HIP, :2], pose[:, RIGHT_HIP, :2]
+    left_ear, right_ear = pose[:, LEFT_EAR, :2], pose[:, RIGHT_EAR, :2]
+    nose = pose[:, NOSE, :2]
+
+    # Shoulder slope normalized by shoulder width to make it scale-invariant
+    shoulder_vector = right_shoulder - left_shoulder
+    shoulder_width = np.linalg.norm(shoulder_vector, axis=1)
+    shoulder_center = (left_shoulder + right_shoulder) / 2
+    ear_center = (left_ear + right_ear) / 2
+    hip_center = (left_hip + right_hip) / 2
+    spine_vector = shoulder_center - hip_center
+    shoulder_depth = np.abs(left_shoulder[:, 0] - right_shoulder[:, 0])
+
+    return {
+        'shoulder_slope': np.abs(shoulder_vector[:, 1]) / (shoulder_width + 1e-6),
+        'head_offset': np.abs(nose[:, 0] - shoulder_center[:, 0]),
+        'head_forward': nose[:, 0] - ear_center[:, 0],  # Positive means forward head
+        'spine_angle': np.abs(np.arctan2(spine_vector[:, 0], -spine_vector[:, 1])),
+        'shoulder_rotation': np.clip(1.0 - shoulder_depth / (shoulder_width + 1e-6), 0.0, 1.0)
+    }
+
+
+def posture_checks(metrics):
+    """
+    Apply POSTURE_CHECKS to posture_metrics() output (arrays or single-frame
+    floats). Returns (passed, significant), both dicts of bools keyed by metric.
+    """
+    passed, significant = {}, {}
+    for name, (_, threshold, multiplier) in POSTURE_CHECKS.items():
+        value = np.abs(metrics[name])
+        passed[name] = value < threshold
+        significant[name] = value >= threshold * multiplier
+    return passed, significant
+
+
+def score_posture(times, pose):
+    """
+    Per-frame posture for (N, 33, 4) pose landmarks taken at times (seconds)
+    with the same temporal smoothing as PostureAnalyzer. Returns a dict of
+    (N,) arrays: detected, good (counted towards the score) and excellent.
+    """
+    detected = _present(pose)
+    passed, significant = posture_checks(posture_metrics(pose))
+    passed_share = np.mean([passed[name] for name in POSTURE_CHECKS], axis=0)
+    has_issue = ~np.all([passed[name] for name in POSTURE_CHECKS], axis=0)
+    has_significant = np.any(
+        [~passed[name] & significant[name] for name in POSTURE_CHECKS], axis=0
+    )
+
+    # The smoothing window only holds frames where a pose was detected
+    good_frame = passed_share[detected] >= POSTURE_GOOD_CHECKS
+    ratio = np.zeros(len(pose), dtype=np.float32)
+    ratio[detected] = _window_ratio(times[detected], good_frame, POSTURE_WINDOW)
+
+    excellent = detected & (ratio >= POSTURE_EXCELLENT_RATIO) & ~has_issue
+    good = excellent | (detected & (ratio >= POSTURE_GOOD_RATIO) & ~has_significant)
+    return {"detected": detected, "good": good, "excellent": excellent}
+
+
+def smile_scores(face):
+    """Raw smile score (unclamped) for (N, 478, 3) face landmarks"""
+    face = np.asarray(face, dtype=np.float32)
+    left_corner, right_corner = face[:, MOUTH_LEFT, :2], face[:, MOUTH_RIGHT, :2]
+    upper_lip, lower_lip = face[:, UPPER_LIP, :2], face[:, LOWER_LIP, :2]
+
+    width = np.abs(right_corner[:, 0] - left_corner[:, 0]) * 8.0
+    mouth_center_y = (upper_lip[:, 1] + lower_lip[:, 1]) / 2
+    lift = ((mouth_center_y - left_corner[:, 1]) + (mouth_center_y - right_corner[:, 1])) * 3.0
+
+    # Emphasize lift over width, with a neutral window for both
+    width_component = np.maximum(0.0, width - 0.25)
+    lift_component = np.maximum(0.0, lift * 3.0)
+    return width_component * 0.4 + lift_component * 0.6
+
+
+def score_expression(face):
+    """Per-frame smile for (N, 478, 3) face landmarks: detected, smile_score (0-1) and smiling"""
+    detected = _present(face)
+    raw = np.where(detected, smile_scores(face), 0.0)
+    return {
+        "detected": detected,
+        "smile_score": np.clip(raw, 0.0, 1.0),
+        "smiling": detected & (raw > SMILE_THRESHOLD)
+    }
+
+
+def _iris_ratio(face, eye, iris):
+    """Iris center position inside the eye's bounding box, (N, 2) in 0-1"""
+    points = face[:, eye, :2]
+    low, high = np.min(points, axis=1), np.max(points, axis=1)
+    return (face[:, iris, :2] - low) / np.maximum(high - low, 1e-6)
+
+
+def score_gaze(times, face):
+    """
+    Per-frame eye contact for (N, 478, 3) face landmarks, using the refined
+    iris centers in place of the pixel pupil detector. Returns tracked and
+    looking_at_camera (smoothed like EyeContactAnalyzer) as (N,) arrays.
+    """
+    face = np.asarray(face, dtype=np.float32)
+    left = _iris_ratio(face, LEFT_EYE, LEFT_IRIS)
+    right = _iris_ratio(face, RIGHT_EYE, RIGHT_IRIS)
+    tracked = ~np.isnan(left).any(axis=1) & ~np.isnan(right).any(axis=1)
+
+    horizontal = (left[:, 0] + right[:, 0]) / 2
+    vertical = left[:, 1]
+    low, high = GAZE_THRESHOLD, 1 - GAZE_THRESHOLD
+    with np.errstate(invalid='ignore'):
+        centered = (horizontal >= low) & (horizontal <= high) & (vertical >= low) & (vertical <= high)
+
+    looking = np.zeros(len(face), dtype=bool)
+    looking[tracked] = _window_ratio(times[tracked], centered[tracked], GAZE_WINDOW) >= GAZE_GOOD_RATIO
+    return {"tracked": tracked, "looking_at_camera": looking}
+
+
+def eye_contact(times, data):
+    """
+    Per-frame eye contact for stacked landmarks: the live analyzer's stored
+    decision (pixel pupils) where there is one, else the iris estimate of
+    score_gaze. The two are not interchangeable, so the method is returned
+    too: "pupil", "iris" or "mixed". Returns (looking (N,) bool, method).
+    """
+    gaze = data.get("gaze")
+    recorded = np.zeros(len(times), dtype=bool) if gaze is None else ~np.isnan(gaze)
+    if len(times) and recorded.all():
+        return np.asarray(gaze) > 0.5, "pupil"
+    looking = score_gaze(times, data["face"])["looking_at_camera"]
+    if not recorded.any():
+        return looking, "iris"
+    looking[recorded] = np.asarray(gaze)[recorded] > 0.5
+    return looking, "mixed"
+
+
+def score_landmarks(data):
+    """
+    Final scores for stacked landmarks (see LandmarkSequence.stack). Runs in
+    milliseconds for a whole interview; no frames or models are needed.
+    Scores are time-weighted, like the live analyzers. eye_contact_method
+    says whether eye contact comes from the live decisions (see eye_contact).
+    """
+    times = np.asarray(data["t"], dtype=np.float64)
+    total = len(times)
+    if total == 0:
+        return {"posture_score": 0.0, "smile_percentage": 0.0, "eye_contact_score": 0.0, "total_frames": 0,
+                "eye_contact_method": None}
+
+    posture = score_posture(times, data["pose"])
+    expression = score_expression(data["face"])
+    looking, method = eye_contact(times, data)
+    faces = expression["detected"]
+    return {
+        "posture_score": round(_time_weighted(times, posture["good"]), 2),
+        "smile_percentage": round(_time_weighted(times[faces], expression["smiling"][faces]), 2),
+        "eye_contact_score": round(_time_weighted(times, looking), 2),
+        "eye_contact_method": method,
+        "total_frames": total
+    }
+
+
+def frame_metrics(data):
+    """Per-frame timeline entries (same shape as results.FrameRecord.metrics)"""
+    times = np.asarray(data["t"], dtype=np.float64)
+    posture = score_posture(times, data["pose"])
+    expression = score_expression(data["face"])
+    looking, _ = eye_contact(times, data)
+    faces = _present(data["face"])
+    return [{
+        "t": round(float(data["t"][i]), 3),
+        "eye_contact": (1.0 if looking[i] else 0.0) if faces[i] else None,
+        "posture": (1.0 if posture["good"][i] else 0.0) if posture["detected"][i] else None,
+        "smile": round(float(expression["smile_score"][i]), 4) if expression["detected"][i] else None
+    } for i in range(len(data["t"]))]
+
+
+def parse_packets(data):
+    """
+    Decode concatenated binary landmark packets (see PACKET_HEADER) into a list
+    of (timestamp, face, pose) with face (478, 3) and pose (33, 4) float16
+    arrays, NaN where the client detected nothing. Raises ValueError on
+    malformed input.
+    """
+    packets = []
+    offset = 0
+    previous = None
+    while offset < len(data):
+        if len(data) - offset < PACKET_HEADER.size:
+            raise ValueError(f"Truncated packet header at byte {offset}")
+        magic, version, flags, face_points, timestamp = PACKET_HEADER.unpack_from(data, offset)
+        if magic != PACKET_MAGIC or version != PACKET_VERSION:
+            raise ValueError(f"Unknown packet format at byte {offset}")
+        if flags & PACKET_FACE and face_points != FACE_LANDMARKS:
+            raise ValueError(f"Face packets need {FACE_LANDMARKS} points (FaceMesh refineLandmarks: true), "
+                             f"got {face_points}")
+        if not np.isfinite(timestamp) or timestamp < 0:
+            raise ValueError(f"Invalid timestamp at byte {offset}")
+        if previous is not None and timestamp < previous:
+            raise ValueError(f"Packet at byte {offset} is older than the one before it")
+        previous = timestamp
+        offset += PACKET_HEADER.size
+
+        face = np.full((FACE_LANDMARKS, 3), np.nan, dtype=STORAGE_DTYPE)
+        pose = np.full((POSE_LANDMARKS, 4), np.nan, dtype=STORAGE_DTYPE)
+        for flag, target, count in ((PACKET_FACE, face, face_points * 3),
+                                    (PACKET_POSE, pose, POSE_LANDMARKS * 4)):
+            if not flags & flag:
+                continue
+            size = count * 2
+            if len(data) - offset < size:
+                raise ValueError(f"Truncated packet body at byte {offset}")
+            values = np.frombuffer(data, dtype="<f2", count=count, offset=offset)
+            target.reshape(-1)[:count] = values
+            offset += size
+        packets.append((timestamp, face, pose))
+    return packets
+
+
+class LandmarkSequence:
+    """Accumulates per-frame face and pose landmarks for later rescoring"""
+    def __init__(self):
+        self.times = []
+        self.faces = []
+        self.poses = []
+        self.gaze = []  # Live eye contact decision per frame, NaN if unknown
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def nbytes(self):
+        """Memory held by the landmark arrays"""
+        return sum(face.nbytes for face in self.faces) + sum(pose.nbytes for pose in self.poses)
+
+    def append(self, timestamp, face_mesh_results, pose_results, looking_at_camera=None):
+        """Record the landmarks of one analyzed frame and the live eye contact decision"""
+        face, pose = landmark_arrays(face_mesh_results, pose_results)
+        self.append_arrays(timestamp, face, pose,
+                           np.nan if looking_at_camera is None else float(looking_at_camera))
+
+    def order(self):
+        """Frame indices in time order; frames can arrive out of order from several requests or workers"""
+        return np.argsort(np.asarray(self.times, dtype=np.float64), kind="stable")
+
+    def stack(self):
+        """Stacked arrays in time order (see order): t (N,), face (N, 478, 3), pose (N, 33, 4) and gaze (N,)"""
+        if not self.times:
+            return {
+                "t": np.empty(0, dtype=np.float64),
+                "gaze": np.empty(0, dtype=np.float32),
+                "face": np.empty((0, FACE_LANDMARKS, 3), dtype=STORAGE_DTYPE),
+                "pose": np.empty((0, POSE_LANDMARKS, 4), dtype=STORAGE_DTYPE)
+            }
+        order = self.order()
+        return {
+            "t": np.asarray(self.times, dtype=np.float64)[order],
+            "gaze": np.asarray(self.gaze, dtype=np.float32)[order],
+            "face": np.stack(self.faces)[order],
+            "pose": np.stack(self.poses)[order]
+        }
+
+    def to_bytes(self):
+        """Serialize the stacked arrays as a compressed .npz blob"""
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **self.stack())
+        return buffer.getvalue()
+
+    def append_arrays(self, timestamp, face, pose, gaze=np.nan):
+        """Record landmarks that were computed elsewhere, e.g. in the browser"""
+        self.times.append(float(timestamp))
+        self.faces.append(np.asarray(face, dtype=STORAGE_DTYPE))
+        self.poses.append(np.asarray(pose, dtype=STORAGE_DTYPE))
+        self.gaze.append(float(gaze))
+
+    @staticmethod
+    def load(data):
+        """Load stacked arrays from a blob written by to_bytes(); older blobs have no gaze"""
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            return {name: arrays[name] for name in ("t", "face", "pose", "gaze") if name in arrays.files}
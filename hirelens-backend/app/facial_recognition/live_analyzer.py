@@ -0,0 +1,72 @@
+import threading
+from .eye_contact_analyzer import EyeContactAnalyzer
+from .posture_analyzer import PostureAnalyzer
+from .expression_analyzer import ExpressionAnalyzer
+from .frame_pipeline import FramePipeline
+from .frame_context import FrameContext
+from .graph_pool import get_graph_pool
+from app.runtime import vision_slot
+
+
+class LiveFrameAnalyzer:
+    """
+    Scores the frames of one live interview as they arrive.
+
+    A graph set is leased from the pool for the whole interview and a single
+    FramePipeline is kept, so MediaPipe tracking, landmark filtering and the
+    analyzers' time-based smoothing carry over from one frame to the next.
+    Each result is recorded on the session (InterviewSession.record_analysis),
+    so the per-question scores, quality stats and timeline can be derived
+    at any time. Frames of one session are analyzed one at a time.
+    """
+    def __init__(self, pool=None):
+        self.pool = pool or get_graph_pool()
+        self.graphs = self.pool.acquire()
+        self.pipeline = FramePipeline(
+            EyeContactAnalyzer(face_mesh=self.graphs.face_mesh),
+            PostureAnalyzer(pose=self.graphs.pose),
+            ExpressionAnalyzer()
+        )
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def _analyze(self, session, frame, question):
+        with vision_slot():
+            outputs = self.pipeline.process(frame)
+        # The frame stays in the session for checkpoints; keep only its JPEG
+        frame.drop_views(keep_image=False)
+        session.record_analysis(frame.timestamp, question, outputs, recorded=True)
+
+    def analyze(self, session, frame, question):
+        """Analyze one FrameContext stamped with its session time (seconds); returns False once closed"""
+        with self.lock:
+            if self.closed:
+                return False
+            self._analyze(session, frame, question)
+            return True
+
+    def analyze_pending(self, session, recorded):
+        """
+        Analyze the recorded (time, frame, question) tuples the ingest path
+        hasn't scored yet, e.g. frames received before a restart or by another
+        worker. Also waits for any frame that is still being analyzed.
+        Returns the number of frames analyzed.
+        """
+        with self.lock:
+            scored = session.scored_frames()
+            count = 0
+            for t, frame, question in recorded:
+                # Frames of other workers may be older than ones scored here
+                if t in scored or self.closed:
+                    continue
+                self._analyze(session, FrameContext.wrap(frame, t), question)
+                count += 1
+            return count
+
+    def close(self):
+        """Return the graphs to the pool; later analyze() calls are ignored"""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        self.pool.release(self.graphs)
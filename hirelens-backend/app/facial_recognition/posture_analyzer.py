@@ -1,214 +1,156 @@
 import cv2
 import mediapipe as mp
 import numpy as np
-from collections import deque
+from .frame_context import FrameContext
+from .results import PostureFrame, PostureIssue, PostureSummary
+from .filters import TimeWindow, TimeWeightedScore, frame_time
+from .landmarks import (
+    POSTURE_CHECKS, POSTURE_GOOD_CHECKS, POSTURE_EXCELLENT_CHECKS, POSTURE_WINDOW,
+    POSTURE_EXCELLENT_RATIO, POSTURE_GOOD_RATIO, posture_metrics, posture_checks
+)
+
+from .graph_pool import create_pose
 
 # Initialize MediaPipe Pose
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
 
-# Initialize pose detector
-pose = mp_pose.Pose(
-    static_image_mode=False,
-    model_complexity=1,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
-)
-
-# Buffer for smoothing measurements
-BUFFER_SIZE = 5
-posture_history = deque(maxlen=BUFFER_SIZE)
-
 class PostureAnalyzer:
-    def __init__(self):
+    def __init__(self, pose=None):
         self.frame_count = 0
         self.good_posture_frames = 0
-        self.BUFFER_SIZE = 5  # Reduced from 10 for even more lenient temporal evaluation
-        self.posture_history = deque(maxlen=self.BUFFER_SIZE)
-        
-        # Initialize pose detector with very forgiving confidence thresholds
-        self.pose = mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=2,
-            min_detection_confidence=0.5,  # Reduced from 0.6
-            min_tracking_confidence=0.5    # Reduced from 0.6
-        )
+        self.posture_time = TimeWeightedScore()  # Score weighted by frame timestamps
+        self.BUFFER_SIZE = POSTURE_WINDOW  # Seconds of history for lenient temporal evaluation
+        self.posture_history = TimeWindow(self.BUFFER_SIZE)
         
-    def _calculate_angles(self, landmarks):
-        """Calculate key angles for posture analysis"""
-        # Get key landmarks
-        left_shoulder = np.array([landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER].x,
-                                landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER].y])
-        right_shoulder = np.array([landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER].x,
-                                 landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER].y])
-        nose = np.array([landmarks[mp_pose.PoseLandmark.NOSE].x,
-                        landmarks[mp_pose.PoseLandmark.NOSE].y])
-        left_hip = np.array([landmarks[mp_pose.PoseLandmark.LEFT_HIP].x,
-                           landmarks[mp_pose.PoseLandmark.LEFT_HIP].y])
-        right_hip = np.array([landmarks[mp_pose.PoseLandmark.RIGHT_HIP].x,
-                            landmarks[mp_pose.PoseLandmark.RIGHT_HIP].y])
-        left_ear = np.array([landmarks[mp_pose.PoseLandmark.LEFT_EAR].x,
-                           landmarks[mp_pose.PoseLandmark.LEFT_EAR].y])
-        right_ear = np.array([landmarks[mp_pose.PoseLandmark.RIGHT_EAR].x,
-                            landmarks[mp_pose.PoseLandmark.RIGHT_EAR].y])
-        
-        # Calculate shoulder slope with normalization by shoulder width
-        shoulder_vector = right_shoulder - left_shoulder
-        shoulder_width = np.linalg.norm(shoulder_vector)
-        # Normalize shoulder slope by width to make it scale-invariant
-        shoulder_slope = abs(shoulder_vector[1]) / (shoulder_width + 1e-6)
-        
-        # Calculate head tilt (nose should be centered between shoulders)
-        shoulder_center = (left_shoulder + right_shoulder) / 2
-        head_offset = abs(nose[0] - shoulder_center[0])
-        
-        # Calculate forward head posture using ear position
-        ear_center = (left_ear + right_ear) / 2
-        head_forward = nose[0] - ear_center[0]  # Positive means forward head
-        
-        # Calculate spine angle (should be close to vertical)
-        hip_center = (left_hip + right_hip) / 2
-        spine_vector = shoulder_center - hip_center
-        spine_angle = abs(np.arctan2(spine_vector[0], -spine_vector[1]))  # Negative y for correct angle
-        
-        # Calculate shoulder rotation with improved normalization
-        shoulder_depth = abs(left_shoulder[0] - right_shoulder[0])
-        shoulder_rotation = 1.0 - (shoulder_depth / (shoulder_width + 1e-6))
-        shoulder_rotation = max(0.0, min(1.0, shoulder_rotation))  # Clamp between 0 and 1
+        # Use a pooled Pose graph when given one (see graph_pool), else a private
+        # one; both use very forgiving confidence thresholds (0.5)
+        self.pose = pose if pose is not None else create_pose()
         
-        return {
-            'shoulder_slope': shoulder_slope,
-            'head_offset': head_offset,
-            'head_forward': head_forward,
-            'spine_angle': spine_angle,
-            'shoulder_rotation': shoulder_rotation
-        }
+    def _calculate_angles(self, landmarks):
+        """Calculate key angles for posture analysis (see landmarks.posture_metrics)"""
+        pose = np.array([[(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks]], dtype=np.float32)
+        return {name: float(value[0]) for name, value in posture_metrics(pose).items()}
         
     def _analyze_posture(self, angles):
-        """Analyze posture based on calculated angles with very forgiving thresholds"""
-        # Define very forgiving thresholds for good posture
-        SHOULDER_THRESHOLD = 0.20  # Much more forgiving (was 0.12)
-        HEAD_OFFSET_THRESHOLD = 0.10  # Unchanged
-        HEAD_FORWARD_THRESHOLD = 0.15  # Unchanged
-        SPINE_ANGLE_THRESHOLD = 0.25  # Unchanged
-        SHOULDER_ROTATION_THRESHOLD = 0.30  # Much more forgiving (was 0.20)
-        
-        # Check each aspect of posture
-        good_shoulders = angles['shoulder_slope'] < SHOULDER_THRESHOLD
-        good_head_position = angles['head_offset'] < HEAD_OFFSET_THRESHOLD
-        good_head_forward = abs(angles['head_forward']) < HEAD_FORWARD_THRESHOLD
-        good_spine = angles['spine_angle'] < SPINE_ANGLE_THRESHOLD
-        good_shoulder_rotation = angles['shoulder_rotation'] < SHOULDER_ROTATION_THRESHOLD
+        """Analyze posture based on calculated angles with the shared POSTURE_CHECKS thresholds"""
+        passed, significant = posture_checks(angles)
         
         # Calculate detailed status with very forgiving grading
-        issues = []
-        if not good_shoulders:
-            severity = "Slightly" if angles['shoulder_slope'] < SHOULDER_THRESHOLD * 2.5 else "Significantly"  # Even more forgiving
-            issues.append(f"{severity} Uneven Shoulders")
-        if not good_head_position:
-            severity = "Slightly" if angles['head_offset'] < HEAD_OFFSET_THRESHOLD * 2.0 else "Significantly"
-            issues.append(f"{severity} Off-Center Head")
-        if not good_head_forward:
-            severity = "Slightly" if abs(angles['head_forward']) < HEAD_FORWARD_THRESHOLD * 2.0 else "Significantly"
-            issues.append(f"{severity} Forward Head")
-        if not good_spine:
-            severity = "Slightly" if angles['spine_angle'] < SPINE_ANGLE_THRESHOLD * 2.0 else "Significantly"
-            issues.append(f"{severity} Slouching")
-        if not good_shoulder_rotation:
-            severity = "Slightly" if angles['shoulder_rotation'] < SHOULDER_ROTATION_THRESHOLD * 2.5 else "Significantly"  # Even more forgiving
-            issues.append(f"{severity} Poor Shoulder Alignment")
-        
-        # Calculate overall posture quality score with very forgiving weights
-        posture_score = (
-            (good_shoulders * 0.2) +       # Reduced from 0.25
-            (good_head_position * 0.2) +
-            (good_head_forward * 0.2) +
-            (good_spine * 0.2) +
-            (good_shoulder_rotation * 0.2)  # All equal weights
-        )
+        issues = [
+            PostureIssue(issue, bool(significant[name]))
+            for name, (issue, _, _) in POSTURE_CHECKS.items()
+            if not passed[name]
+        ]
+        
+        # All checks weigh the same
+        posture_score = sum(bool(ok) for ok in passed.values()) / len(passed)
         
         # Very forgiving thresholds for overall status
-        if posture_score >= 0.70:  # Reduced from 0.80
+        if posture_score >= POSTURE_EXCELLENT_CHECKS:
             return True, "Excellent Posture", issues
-        elif posture_score >= 0.50:  # Reduced from 0.65
+        elif posture_score >= POSTURE_GOOD_CHECKS:
             return True, "Good Posture", issues
-        elif posture_score >= 0.35:  # Reduced from 0.50
+        elif posture_score >= 0.35:
             return False, "Fair Posture", issues
         else:
             return False, "Poor Posture", issues
         
-    def analyze_frame(self, frame):
-        """Analyze posture in a single frame with improved accuracy"""
+    def analyze(self, frame, pose_results=None):
+        """
+        Analyze posture in a single frame and return a PostureFrame.
+        frame is a BGR array or a shared FrameContext. Pose results computed
+        elsewhere can be passed in to skip running the graph.
+        """
+        context = FrameContext.wrap(frame)
+        t = frame_time(context.timestamp, self.frame_count)
         self.frame_count += 1
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.pose.process(frame_rgb)
+        if pose_results is None:
+            pose_results = self.pose.process(context.rgb)
         
-        if not results.pose_landmarks:
-            return "No pose detected", frame
+        result = self._rate_posture(t, pose_results)
+        if result.good_posture:
+            self.good_posture_frames += 1
+        self.posture_time.add(t, result.good_posture)
+        return result
+        
+    def _rate_posture(self, t, pose_results):
+        """Posture rating for one frame at time t (seconds)"""
+        if not pose_results.pose_landmarks:
+            return PostureFrame(False, False, "Poor Posture", ())
         
         # Calculate angles
-        angles = self._calculate_angles(results.pose_landmarks.landmark)
+        angles = self._calculate_angles(pose_results.pose_landmarks.landmark)
         
         # Analyze posture
-        is_good_posture, status, issues = self._analyze_posture(angles)
+        is_good_posture, _, issues = self._analyze_posture(angles)
         
         # Add to history for temporal smoothing
-        self.posture_history.append(is_good_posture)
+        self.posture_history.add(t, is_good_posture)
         
         # Calculate the percentage of good posture frames in history
-        good_posture_ratio = sum(self.posture_history) / len(self.posture_history)
-        
-        # Determine status and color based on both current issues and history (very forgiving)
-        if good_posture_ratio >= 0.60 and not issues:  # Reduced from 0.75
-            self.good_posture_frames += 1
-            status = "Excellent Posture"
+        good_posture_ratio = self.posture_history.ratio()
+        
+        # Determine rating based on both current issues and history (very forgiving)
+        if good_posture_ratio >= POSTURE_EXCELLENT_RATIO and not issues:
+            return PostureFrame(True, True, "Excellent Posture", tuple(issues))
+        if good_posture_ratio >= POSTURE_GOOD_RATIO and not any(issue.significant for issue in issues):
+            return PostureFrame(True, True, "Good Posture", tuple(issues))
+        return PostureFrame(True, False, "Poor Posture", tuple(issues))
+        
+    def analyze_frame(self, frame, pose_results=None):
+        """Analyze posture in a single frame and draw the pose and feedback on it"""
+        context = FrameContext.wrap(frame)
+        if pose_results is None:
+            pose_results = self.pose.process(context.rgb)
+        result = self.analyze(context, pose_results)
+        frame = context.bgr
+        
+        if not result.pose_detected:
+            return result.status, frame
+        
+        if result.rating == "Excellent Posture":
             highlight_color = (0, 255, 0)  # Green
-        elif good_posture_ratio >= 0.40 and all("Significantly" not in issue for issue in issues):  # Reduced from 0.60
-            self.good_posture_frames += 1
-            status = "Good Posture"
+        elif result.good_posture:
             highlight_color = (0, 255, 255)  # Yellow
         else:
-            status = "Poor Posture: " + ", ".join(issues)
             highlight_color = (0, 0, 255)  # Red
         
         # Draw pose landmarks and status
         mp_drawing.draw_landmarks(
             frame,
-            results.pose_landmarks,
+            pose_results.pose_landmarks,
             mp_pose.POSE_CONNECTIONS,
             landmark_drawing_spec=mp_drawing.DrawingSpec(color=(255, 255, 0), thickness=2, circle_radius=2),
             connection_drawing_spec=mp_drawing.DrawingSpec(color=(255, 255, 255), thickness=2)
         )
         
         # Add status text
-        cv2.putText(frame, status, (10, 30),
+        cv2.putText(frame, result.status, (10, 30),
                     cv2.FONT_HERSHEY_SIMPLEX, 1, highlight_color, 2)
         
         # Add detailed feedback if posture is poor
-        if issues:
+        if result.issues:
             y_pos = 60
-            for issue in issues:
-                cv2.putText(frame, f"- {issue}", (20, y_pos),
+            for issue in result.issues:
+                cv2.putText(frame, f"- {issue.label}", (20, y_pos),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, highlight_color, 1)
                 y_pos += 25
         
-        return status, frame
+        return result.status, frame
+
+    def summary(self):
+        """Final posture score: share of the session time in good posture"""
+        return PostureSummary(self.posture_time.percentage(), self.frame_count)
 
     def get_posture_score(self):
         """
         Calculate the overall posture score
         """
-        if self.frame_count == 0:
-            return {
-                "posture_score": 0,
-                "total_frames": 0
-            }
-        
-        posture_score = (self.good_posture_frames / self.frame_count) * 100
-        
+        summary = self.summary()
         return {
-            "posture_score": round(posture_score, 2),
-            "total_frames": self.frame_count
+            "posture_score": round(summary.posture_score, 2),
+            "total_frames": summary.total_frames
         }
 
 def main():
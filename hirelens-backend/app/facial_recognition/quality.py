@@ -0,0 +1,87 @@
+import cv2
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+# Cheap checks run before the MediaPipe graphs. Sharpness and brightness are
+# measured on a small grayscale view so the gate costs well under a millisecond.
+QUALITY_WIDTH = 320
+MIN_SHARPNESS = 40.0  # Variance of the Laplacian on the QUALITY_WIDTH view
+MIN_BRIGHTNESS = 40.0  # Mean luminance, 0-255
+MAX_BRIGHTNESS = 225.0
+MIN_LANDMARK_CONFIDENCE = 0.5  # Mean pose visibility of the head and shoulders
+
+# Pose landmarks that must be visible for the face and upper body to be usable:
+# nose, inner eyes, mouth corners and shoulders
+KEY_POSE_LANDMARKS = (0, 1, 4, 9, 10, 11, 12)
+
+
+@dataclass
+class FrameQuality:
+    __slots__ = ("sharpness", "brightness", "landmark_confidence", "issue")
+    sharpness: float
+    brightness: float
+    landmark_confidence: Optional[float]  # None until the pose graph has run
+    issue: Optional[str]  # "blurry", "dark", "overexposed" or "occluded"
+
+    @property
+    def usable(self):
+        return self.issue is None
+
+
+def assess_image(frame):
+    """Pixel checks for one FrameContext: blur (Laplacian variance) and exposure"""
+    gray = frame.downscaled_gray(QUALITY_WIDTH)
+    sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    brightness = float(gray.mean())
+
+    issue = None
+    if brightness < MIN_BRIGHTNESS:
+        issue = "dark"
+    elif brightness > MAX_BRIGHTNESS:
+        issue = "overexposed"
+    elif sharpness < MIN_SHARPNESS:
+        issue = "blurry"
+    return FrameQuality(sharpness, brightness, None, issue)
+
+
+def assess_landmarks(quality, pose_results):
+    """
+    Add the landmark confidence from the pose graph to an image quality result.
+    Frames where a pose was found but the head or shoulders are barely visible
+    are tagged as occluded; frames without any pose are left to the analyzers.
+    """
+    if not quality.usable or pose_results is None or not pose_results.pose_landmarks:
+        return quality
+    landmarks = pose_results.pose_landmarks.landmark
+    confidence = sum(landmarks[i].visibility for i in KEY_POSE_LANDMARKS) / len(KEY_POSE_LANDMARKS)
+    issue = "occluded" if confidence < MIN_LANDMARK_CONFIDENCE else None
+    return FrameQuality(quality.sharpness, quality.brightness, float(confidence), issue)
+
+
+class QualityStats:
+    """Counts analyzed and skipped frames for the interview result"""
+    def __init__(self):
+        self.analyzed = 0
+        self.skipped = Counter()
+
+    def record(self, quality):
+        if quality.usable:
+            self.analyzed += 1
+        else:
+            self.skipped[quality.issue] += 1
+
+    @property
+    def total(self):
+        """Frames that went through the gate"""
+        return self.analyzed + sum(self.skipped.values())
+
+    def report(self):
+        skipped = sum(self.skipped.values())
+        total = self.analyzed + skipped
+        return {
+            "analyzed_frames": self.analyzed,
+            "skipped_frames": skipped,
+            "skip_rate": round(skipped / total * 100, 1) if total else 0.0,
+            "skip_reasons": dict(self.skipped)
+        }
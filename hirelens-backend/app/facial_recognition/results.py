@@ -0,0 +1,126 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# Typed per-frame and final results produced by the analyzers.
+# The hot path only fills these in; display strings are derived on demand.
+
+
+@dataclass
+class EyeContactFrame:
+    __slots__ = ("face_detected", "tracked", "looking_at_camera", "left_pupil", "right_pupil")
+    face_detected: bool
+    tracked: bool  # Both pupils located
+    looking_at_camera: bool  # Smoothed over the gaze history
+    left_pupil: Optional[Tuple[int, int]]
+    right_pupil: Optional[Tuple[int, int]]
+
+    @property
+    def status(self):
+        if not self.tracked:
+            return "Not Looking at Camera"
+        return "Looking at Camera" if self.looking_at_camera else "Looking Away"
+
+
+@dataclass
+class PostureIssue:
+    __slots__ = ("name", "significant")
+    name: str
+    significant: bool
+
+    @property
+    def label(self):
+        return f"{'Significantly' if self.significant else 'Slightly'} {self.name}"
+
+
+@dataclass
+class PostureFrame:
+    __slots__ = ("pose_detected", "good_posture", "rating", "issues")
+    pose_detected: bool
+    good_posture: bool  # Counted towards the posture score after smoothing
+    rating: str  # "Excellent Posture", "Good Posture" or "Poor Posture"
+    issues: Tuple[PostureIssue, ...]
+
+    @property
+    def status(self):
+        if not self.pose_detected:
+            return "No pose detected"
+        if self.good_posture:
+            return self.rating
+        return "Poor Posture: " + ", ".join(issue.label for issue in self.issues)
+
+
+@dataclass
+class ExpressionFrame:
+    __slots__ = ("face_detected", "smile_score", "smoothed_smile_score", "smiling")
+    face_detected: bool
+    smile_score: float  # Current frame, 0-1
+    smoothed_smile_score: float  # Weighted over the recent history, 0-1
+    smiling: bool  # Counted towards the time spent smiling
+
+
+@dataclass
+class EyeContactSummary:
+    __slots__ = ("eye_contact_score", "total_frames")
+    eye_contact_score: float  # Percentage
+    total_frames: int
+
+
+@dataclass
+class PostureSummary:
+    __slots__ = ("posture_score", "total_frames")
+    posture_score: float  # Percentage
+    total_frames: int
+
+
+@dataclass
+class ExpressionSummary:
+    __slots__ = ("smile_percentage", "smiling_frames", "total_frames")
+    smile_percentage: float  # Percentage of frames spent smiling
+    smiling_frames: int
+    total_frames: int
+
+
+@dataclass
+class FrameRecord:
+    """What one analyzed frame contributes to a session's scores, kept instead of the aggregates"""
+    __slots__ = ("t", "question", "recorded", "issue", "face_detected", "looking_at_camera",
+                 "pose_detected", "good_posture", "smile_detected", "smile_score", "smiling")
+    t: float  # Seconds since the session started
+    question: Optional[str]
+    recorded: bool  # A recorded session frame (t is its time), not a frame of an upload
+    issue: Optional[str]  # Quality gate issue, None if the frame was usable
+    face_detected: bool
+    looking_at_camera: bool
+    pose_detected: bool
+    good_posture: bool
+    smile_detected: bool
+    smile_score: float
+    smiling: bool
+
+    @classmethod
+    def from_outputs(cls, t, question, outputs, recorded=False):
+        """Record the FramePipeline outputs of a frame taken at t seconds"""
+        quality = outputs["quality"]
+        if not quality.usable:
+            return cls(float(t), question, recorded, quality.issue,
+                       False, False, False, False, False, 0.0, False)
+        eye_contact = outputs["eye_contact"]
+        posture = outputs["posture"]
+        expression = outputs["expression"]
+        return cls(float(t), question, recorded, None,
+                   bool(eye_contact.face_detected), bool(eye_contact.looking_at_camera),
+                   bool(posture.pose_detected), bool(posture.good_posture),
+                   expression.face_detected, float(expression.smile_score), bool(expression.smiling))
+
+    @property
+    def usable(self):
+        return self.issue is None
+
+    def metrics(self):
+        """Per-frame timeline entry (None = not detected)"""
+        return {
+            "t": round(self.t, 3),
+            "eye_contact": (1.0 if self.looking_at_camera else 0.0) if self.face_detected else None,
+            "posture": (1.0 if self.good_posture else 0.0) if self.pose_detected else None,
+            "smile": round(self.smile_score, 4) if self.smile_detected else None
+        }
@@ -0,0 +1,97 @@
+import numpy as np
+from .filters import TimeWeightedScore, combined_percentage
+from .landmarks import score_landmarks
+
+
+class QuestionSegment:
+    """Running vision scores for the frames recorded while one question was active"""
+    def __init__(self, question):
+        self.question = question
+        self.frames = 0
+        self.skipped_frames = 0
+        self.eye_contact = TimeWeightedScore()
+        self.posture = TimeWeightedScore()
+        self.smile = TimeWeightedScore()
+
+    def add(self, record):
+        """Fold one analyzed frame (a results.FrameRecord) into the scores"""
+        self.frames += 1
+        if not record.usable:
+            self.skipped_frames += 1
+            return
+        self.eye_contact.add(record.t, record.looking_at_camera)
+        self.posture.add(record.t, record.good_posture)
+        if record.smile_detected:
+            self.smile.add(record.t, record.smiling)
+
+    def scores(self):
+        return {
+            "question": self.question,
+            "frames": self.frames,
+            "skipped_frames": self.skipped_frames,
+            "eye_contact_score": round(self.eye_contact.percentage(), 1),
+            "posture_score": round(self.posture.percentage(), 1),
+            "smile_percentage": round(self.smile.percentage(), 1)
+        }
+
+
+class QuestionSegments:
+    """Per-question partition of the analyzed frames, in the order questions were asked"""
+    def __init__(self):
+        self.segments = {}
+
+    def __len__(self):
+        return len(self.segments)
+
+    @classmethod
+    def from_records(cls, records):
+        """Segments of FrameRecords in any order; they are folded in by time"""
+        segments = cls()
+        for record in sorted(records, key=lambda record: record.t):
+            segments.add(record)
+        return segments
+
+    def add(self, record):
+        segment = self.segments.get(record.question)
+        if segment is None:
+            segment = self.segments[record.question] = QuestionSegment(record.question)
+        segment.add(record)
+
+    def report(self):
+        return [segment.scores() for segment in self.segments.values()]
+
+    @property
+    def frames(self):
+        """Frames folded in so far, including the ones the quality gate skipped"""
+        return sum(segment.frames for segment in self.segments.values())
+
+    def overall(self):
+        """Session-wide scores over every question, time-weighted like the per-question ones"""
+        segments = list(self.segments.values())
+        return {
+            "eye_contact_score": round(combined_percentage(s.eye_contact for s in segments), 1),
+            "posture_score": round(combined_percentage(s.posture for s in segments), 1),
+            "smile_percentage": round(combined_percentage(s.smile for s in segments), 1),
+            "total_frames": self.frames
+        }
+
+
+def score_landmarks_by_question(data, questions):
+    """
+    Per-question scores for stacked landmarks (see LandmarkSequence.stack),
+    where questions[i] is the question that was active when frame i arrived.
+    """
+    questions = list(questions)
+    report = []
+    for question in dict.fromkeys(questions):
+        index = np.array([i for i, q in enumerate(questions) if q == question])
+        scores = score_landmarks({name: values[index] for name, values in data.items()})
+        report.append({
+            "question": question,
+            "frames": scores["total_frames"],
+            "skipped_frames": 0,
+            "eye_contact_score": round(scores["eye_contact_score"], 1),
+            "posture_score": round(scores["posture_score"], 1),
+            "smile_percentage": round(scores["smile_percentage"], 1)
+        })
+    return report
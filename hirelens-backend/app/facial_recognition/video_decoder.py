@@ -0,0 +1,71 @@
+import cv2
+
+# Default sampling for uploaded recordings
+DEFAULT_SAMPLE_FPS = 2.0
+MAX_SAMPLE_FPS = 10.0  # Upper bound accepted from clients
+DEFAULT_MAX_FRAMES = 100
+
+
+def _get_duration_ms(cap):
+    """Return the video duration in milliseconds, or None if the container has no index"""
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    if fps and fps > 0 and frame_count and frame_count > 0:
+        return (frame_count / fps) * 1000.0
+    return None
+
+
+def probe_duration_ms(video_path):
+    """Return the duration of a recording in milliseconds, or None if the container doesn't say"""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        return _get_duration_ms(cap) if cap.isOpened() else None
+    finally:
+        cap.release()
+
+
+def iter_sampled_frames(video_path, sample_fps=DEFAULT_SAMPLE_FPS, max_frames=DEFAULT_MAX_FRAMES):
+    """
+    Stream-decode a recorded answer and yield (timestamp_ms, frame) pairs.
+
+    Only the sampled frames are decoded: when the container reports its
+    duration we seek straight to each sampled timestamp, otherwise (e.g.
+    MediaRecorder WebM without cues) we walk the stream with grab() and
+    only retrieve the frames that fall on a sample point.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video file: {video_path}")
+
+    try:
+        duration_ms = _get_duration_ms(cap)
+        count = 0
+
+        if duration_ms:
+            # Spread samples over the whole recording, never denser than sample_fps
+            interval = max(1000.0 / sample_fps, duration_ms / max_frames)
+            timestamp = 0.0
+            while timestamp < duration_ms and count < max_frames:
+                cap.set(cv2.CAP_PROP_POS_MSEC, timestamp)
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield timestamp, frame
+                count += 1
+                timestamp += interval
+        else:
+            # No seek index - grab sequentially and only decode sampled frames
+            interval = 1000.0 / sample_fps
+            next_sample = 0.0
+            while count < max_frames and cap.grab():
+                timestamp = cap.get(cv2.CAP_PROP_POS_MSEC)
+                if timestamp < next_sample:
+                    continue
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                yield timestamp, frame
+                count += 1
+                next_sample = timestamp + interval
+    finally:
+        cap.release()
@@ -0,0 +1,116 @@
+import threading
+import time
+
+
+def model_bytes(model):
+    """Size of a PyTorch module's parameters and buffers, 0 for anything else"""
+    if model is None or not hasattr(model, "parameters"):
+        return 0
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of heavy, read-only models. Each model is built by
+    its factory on first use, exactly once even when many request threads ask
+    for it at the same time, and every caller gets the same shared instance.
+    Each model has its own lock, so a slow load doesn't block access to the
+    models that are already loaded.
+    """
+    def __init__(self):
+        self.factories = {}
+        self.instances = {}
+        self.load_seconds = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    def register(self, name, factory):
+        with self.lock:
+            self.factories[name] = factory
+            self.locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        instance = self.instances.get(name)
+        if instance is not None:
+            return instance
+        if name not in self.factories:
+            raise KeyError(f"Unknown model '{name}'")
+        with self.locks[name]:
+            instance = self.instances.get(name)
+            if instance is None:
+                started = time.perf_counter()
+                instance = self.factories[name]()
+                self.load_seconds[name] = time.perf_counter() - started
+                self.instances[name] = instance
+                print(f"Loaded model '{name}' in {self.load_seconds[name]:.1f}s")
+        return instance
+
+    def preload(self, *names):
+        """Load the given models (all registered ones by default), logging failures"""
+        for name in names or list(self.factories):
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"[WARNING] Error loading model '{name}': {str(e)}")
+
+    def report(self):
+        """Loaded models with their load time and weight size"""
+        report = {}
+        for name, instance in list(self.instances.items()):
+            model = getattr(instance, "model", None)
+            report[name] = {
+                "load_seconds": round(self.load_seconds.get(name, 0.0), 2),
+                "weight_bytes": model_bytes(model)
+            }
+        return report
+
+
+def _answer_analyzer():
+    from app.answer_analysis.analyzer import AnswerAnalyzer
+    return AnswerAnalyzer()
+
+
+def _sentiment_model():
+    from app.sentiment_analysis.sentiment_analysis_functions import sentiment_analysis
+    return sentiment_analysis()
+
+
+def _sentiment_analyzer():
+    from app.speech_to_text.sentiment_analysis import SentimentAnalyzer
+    return SentimentAnalyzer()
+
+
+def _file_transcriber():
+    from RealtimeSTT import AudioToTextRecorder
+    return AudioToTextRecorder(model="base", language="en")
+
+
+model_registry = ModelRegistry()
+model_registry.register("answer_analyzer", _answer_analyzer)
+model_registry.register("sentiment", _sentiment_model)
+model_registry.register("sentiment_analyzer", _sentiment_analyzer)
+model_registry.register("file_transcriber", _file_transcriber)
+
+# The file transcriber keeps per-call decoding state, so calls take turns
+file_transcriber_lock = threading.Lock()
+
+
+def get_answer_analyzer():
+    """Shared AnswerAnalyzer (answer sheet CSV loaded once)"""
+    return model_registry.get("answer_analyzer")
+
+
+def get_sentiment_model():
+    """Shared DistilBERT sentiment_analysis instance"""
+    return model_registry.get("sentiment")
+
+
+def get_sentiment_analyzer():
+    """Shared SentimentAnalyzer wrapper (rule-based fallback when the model fails)"""
+    return model_registry.get("sentiment_analyzer")
+
+
+def get_file_transcriber():
+    """Shared RealtimeSTT recorder for transcribing files; use under file_transcriber_lock"""
+    return model_registry.get("file_transcriber")
@@ -0,0 +1,94 @@
+import time
+from datetime import datetime
+from pymongo import UpdateOne
+from app.database import get_interviews_collection
+from app.model_registry import get_sentiment_model
+
+# Interviews scored per predict_batch call and Mongo bulk write
+REANALYSIS_CHUNK = 256
+
+# Same mapping and weights as the stop route uses for the stored scores
+SENTIMENT_SCORES = {"positive": 100, "neutral": 50, "negative": 0}
+SCORE_WEIGHTS = {
+    "posture_score": 0.3,
+    "smile_percentage": 0.2,
+    "eye_contact_score": 0.2,
+    "answer_quality_score": 0.2,
+    "overall_sentiment": 0.1
+}
+
+
+def _usable(transcript):
+    """Placeholder transcripts ("[Inaudible ...]", "[Error ...]") are not scored"""
+    return bool(transcript) and len(transcript.strip()) >= 10 and not transcript.lstrip().startswith("[")
+
+
+def _rescored(scores, label):
+    """scores.* fields to $set for a new sentiment label: overall_sentiment and the overall_score built on it"""
+    sentiment = SENTIMENT_SCORES.get(label, 50)
+    update = {"scores.overall_sentiment": sentiment}
+    scores = dict(scores or {}, overall_sentiment=sentiment)
+    if all(isinstance(scores.get(name), (int, float)) for name in SCORE_WEIGHTS):
+        update["scores.overall_score"] = round(sum(scores[name] * weight for name, weight in SCORE_WEIGHTS.items()), 1)
+    return update
+
+
+def reanalyze_sentiment(query=None, chunk_size=REANALYSIS_CHUNK, dry_run=False):
+    """
+    Re-score the stored answer transcripts of interviews with the current
+    sentiment model; the sentiment part of scores (overall_sentiment and
+    overall_score) is updated with the label. Transcripts are scored chunk_size at a time through
+    predict_batch and written back with one bulk update per chunk. query
+    narrows the interviews (e.g. {"userId": ...}); dry_run only counts changes.
+    """
+    model = get_sentiment_model()
+    collection = get_interviews_collection()
+    filter_ = {"answer_analysis.transcript": {"$exists": True, "$nin": [None, ""]}}
+    filter_.update(query or {})
+    cursor = collection.find(filter_, {
+        "answer_analysis.transcript": 1,
+        "answer_analysis.sentiment": 1,
+        **{f"scores.{name}": 1 for name in SCORE_WEIGHTS}
+    })
+
+    started = time.perf_counter()
+    stats = {"scanned": 0, "scored": 0, "changed": 0}
+
+    def flush(documents):
+        results = model.predict_batch([document["answer_analysis"]["transcript"] for document in documents])
+        updates = []
+        for document, result in zip(documents, results):
+            if result["label"] != document["answer_analysis"].get("sentiment"):
+                stats["changed"] += 1
+            updates.append(UpdateOne({"_id": document["_id"]}, {"$set": {
+                "answer_analysis.sentiment": result["label"],
+                "answer_analysis.sentiment_probabilities": result["probabilities"],
+                "answer_analysis.sentiment_rescored_at": datetime.utcnow(),
+                **_rescored(document.get("scores"), result["label"])
+            }}))
+        stats["scored"] += len(documents)
+        if updates and not dry_run:
+            collection.bulk_write(updates, ordered=False)
+
+    chunk = []
+    for document in cursor:
+        stats["scanned"] += 1
+        if not _usable(document.get("answer_analysis", {}).get("transcript")):
+            continue
+        chunk.append(document)
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+    seconds = time.perf_counter() - started
+    stats["seconds"] = round(seconds, 2)
+    stats["transcripts_per_second"] = round(stats["scored"] / seconds, 1) if seconds > 0 else 0.0
+    stats["dry_run"] = dry_run
+    return stats
+
+
+if __name__ == "__main__":
+    import sys
+    print(reanalyze_sentiment(dry_run="--dry-run" in sys.argv))
@@ -0,0 +1,40 @@
+from datetime import datetime
+from bson.binary import Binary
+from app.database import get_landmarks_collection
+from app.facial_recognition.landmarks import LandmarkSequence, score_landmarks
+
+
+def store_landmarks(interview_id, user_id, sequence):
+    """
+    Persist the landmark arrays of an interview as one compressed blob.
+    float16 face (N, 478, 3) and pose (N, 33, 4) arrays are a few KB per frame
+    before compression, so a whole interview fits in a single document.
+    """
+    get_landmarks_collection().replace_one(
+        {"interview_id": interview_id},
+        {
+            "interview_id": interview_id,
+            "userId": user_id,
+            "frames": len(sequence),
+            "created_at": datetime.utcnow(),
+            "data": Binary(sequence.to_bytes())
+        },
+        upsert=True
+    )
+    return len(sequence)
+
+
+def load_landmarks(interview_id):
+    """Stacked landmark arrays of an interview, or None if none were stored"""
+    document = get_landmarks_collection().find_one({"interview_id": interview_id}, {"data": 1})
+    if not document:
+        return None
+    return LandmarkSequence.load(bytes(document["data"]))
+
+
+def rescore_interview(interview_id):
+    """Recompute the vision scores of an interview from its stored landmarks"""
+    data = load_landmarks(interview_id)
+    if data is None:
+        return None
+    return score_landmarks(data)
@@ -7,13 +7,31 @@ import base64
 import numpy as np
 from flask_cors import CORS
 import time
-import mediapipe as mp
 from .facial_recognition.eye_contact_analyzer import EyeContactAnalyzer
 from .facial_recognition.posture_analyzer import PostureAnalyzer
 from .facial_recognition.expression_analyzer import ExpressionAnalyzer
-from datetime import datetime
+from .facial_recognition.video_decoder import iter_sampled_frames, probe_duration_ms, DEFAULT_SAMPLE_FPS, MAX_SAMPLE_FPS
+from .facial_recognition.frame_pipeline import FramePipeline
+from .facial_recognition.graph_pool import get_graph_pool
+from .facial_recognition.live_analyzer import LiveFrameAnalyzer
+from .facial_recognition.frame_context import FrameContext
+from .facial_recognition.quality import QualityStats
+from .facial_recognition.results import FrameRecord
+from .facial_recognition.landmarks import LandmarkSequence, parse_packets, score_landmarks, landmark_arrays
+from .facial_recognition.landmarks import frame_metrics as landmark_frame_metrics
+from .facial_recognition.filters import smooth_landmarks
+from .facial_recognition.segments import QuestionSegments, score_landmarks_by_question
+from datetime import datetime, timezone
 import uuid
 from app.database import get_interviews_collection
+from app.timeline import store_frame_metrics, query_timeline
+from app.rescoring import store_landmarks, rescore_interview
+from app.reanalysis import reanalyze_sentiment
+from app.session_checkpoint import SessionCheckpointer
+from app.session_store import InProcessSessionStore, create_session_store
+from app.session_store import STARTING, RUNNING, FINALIZING, DONE
+from app.session_reaper import SessionReaper, session_memory
+from app.runtime import vision_slot
 
 import os
 import sys
@@ -21,8 +39,9 @@ import threading
 import wave
 from RealtimeSTT import AudioToTextRecorder
 import pyaudio
-from app.answer_analysis.analyzer import AnswerAnalyzer
-from app.sentiment_analysis.sentiment_analysis_functions import sentiment_analysis
+from app.model_registry import (
+    model_registry, get_answer_analyzer, get_sentiment_model, get_sentiment_analyzer
+)
 
 # Add the project root to Python path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -32,27 +51,37 @@ routes = Blueprint('routes', __name__)
 CORS(routes)  # Enable CORS for all routes
 
 # Global variables to manage interview state
-interview_sessions = {}  # Store multiple session states
+# interview_sessions is defined below InterviewSession (see configure_session_store)
 
 # Import the InterviewRecorder from speech_to_text module
 from app.speech_to_text.stt import InterviewRecorder
 
 # Add to global variables to manage interview state
+# Recorders own a microphone stream and a thread, so they always stay in the
+# process that started them, whatever the session store backend
 audio_recorders = {}  # Store audio recorders for each session
 
-# Initialize MediaPipe Face Mesh for expression analysis
-mp_face_mesh = mp.solutions.face_mesh.FaceMesh(
-    static_image_mode=False,
-    max_num_faces=1,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
-)
+# Live frame analyzers hold leased MediaPipe graphs and tracking state, so
+# like recorders they stay in the process that created them
+frame_analyzers = {}  # session_id -> LiveFrameAnalyzer
+
+# Periodic on-disk snapshots of interview_sessions (see start_session_checkpoints)
+session_checkpointer = None
+
+# Background eviction of abandoned sessions (see start_session_reaper)
+session_reaper = None
 
 class InterviewSession:
     def __init__(self, session_id):
         self.session_id = session_id
         self.running = False
+        self.state = STARTING  # Lifecycle state, changed only through the session store
         self.frames = []  # Store frames only
+        self.frame_times = []  # Seconds since session start for each stored frame
+        self.frame_questions = []  # Question active when each stored frame arrived
+        self.frame_records = []  # One FrameRecord per analyzed frame; the vision scores derive from these
+        self.landmarks = LandmarkSequence()  # Per-frame face/pose landmarks for rescoring
+        self.landmark_questions = []  # Question active when each landmark frame was taken
         self.last_update = time.time()
         self.start_time = datetime.utcnow()
         self.email = ""
@@ -62,21 +91,28 @@ class InterviewSession:
         self.answers = {}  # Store answers for each question
         self.transcript = ""  # Store the transcript
         self.audio_requested = False  # Flag to track if audio recording was requested
+        self.recording_scores = []  # Scores of each uploaded recording, in upload order
+        self.client_landmarks = False  # Landmarks were computed in the browser
         
-        # Initialize analyzers
-        self.answer_analyzer = AnswerAnalyzer()
-        self.sentiment_analyzer = sentiment_analysis()
+        # Shared analyzers (loaded once per process, see app/model_registry.py)
+        self.answer_analyzer = get_answer_analyzer()
+        self.sentiment_analyzer = get_sentiment_model()
 
     def add_frame(self, frame):
-        """Add a frame to the session"""
+        """Add a frame to the session, tagged with the active question"""
+        frame.timestamp = (datetime.utcnow() - self.start_time).total_seconds()
         self.frames.append(frame)
+        self.frame_times.append(frame.timestamp)
+        self.frame_questions.append(self.current_question)
         self.last_update = time.time()
         
     def add_question(self, question):
-        """Add a question to the session history"""
-        if question and question not in self.questions_asked:
+        """Add a question to the session history and make it the active one"""
+        if not question:
+            return
+        self.current_question = question
+        if question not in self.questions_asked:
             self.questions_asked.append(question)
-            self.current_question = question
             self.answers[question] = {
                 "audio_transcript": "",
                 "analysis": None,
@@ -84,9 +120,86 @@ class InterviewSession:
                 "start_time": datetime.utcnow()
             }
 
-    def process_interview(self):
-        """Process all frames and return final scores"""
-        if not self.frames:
+    def record_analysis(self, timestamp, question, outputs, recorded=False):
+        """
+        Record one frame's FramePipeline outputs (taken at timestamp seconds
+        since the session started) through the session store, which holds the
+        session's lock while it appends. recorded marks a recorded session
+        frame, so it is never scored twice. Returns False if it already was.
+        """
+        record = FrameRecord.from_outputs(timestamp, question, outputs, recorded)
+        face = pose = None
+        if record.usable:
+            face, pose = landmark_arrays(outputs["face_mesh"], outputs["pose"])
+        return interview_sessions.record_analysis(self, record, face, pose)
+
+    def add_analysis(self, record, face=None, pose=None):
+        """Append a FrameRecord and, for usable frames, its landmarks (called by the session store)"""
+        self.frame_records.append(record)
+        if face is not None:
+            self.landmarks.append_arrays(record.t, face, pose, float(record.looking_at_camera))
+            self.landmark_questions.append(record.question)
+
+    def scored_frames(self):
+        """Times of the recorded frames already analyzed"""
+        return {record.t for record in list(self.frame_records) if record.recorded}
+
+    def summarize(self):
+        """
+        Vision aggregates over every analyzed frame, in time order: the
+        per-question scores (QuestionSegments), the quality gate stats
+        (QualityStats) and the per-frame timeline entries.
+        """
+        records = sorted(list(self.frame_records), key=lambda record: record.t)
+        quality = QualityStats()
+        for record in records:
+            quality.record(record)
+        frame_metrics = [record.metrics() for record in records if record.usable]
+        return QuestionSegments.from_records(records), quality, frame_metrics
+
+    def process_interview(self, frames=None):
+        """
+        Process frames and return final scores.
+        Uses the stored session frames unless an iterable of
+        (timestamp_seconds, frame) pairs (e.g. a decoded recording stream)
+        is passed in. Every frame is recorded on the session (see
+        record_analysis), so several uploaded recordings all count towards
+        the final scores; the returned scores cover only the frames of this
+        call. Passed-in frames count towards the active question.
+        """
+        recorded = frames is None
+        if recorded:
+            frames = zip(self.frame_times, self.frames, self.frame_questions)
+        else:
+            frames = ((timestamp, frame, self.current_question) for timestamp, frame in frames)
+            
+        # Lease tracking graphs that no other request is using; they are reset
+        # when they go back to the pool
+        with get_graph_pool().lease() as graphs:
+            # Initialize analyzers
+            eye_contact_analyzer = EyeContactAnalyzer(face_mesh=graphs.face_mesh)
+            posture_analyzer = PostureAnalyzer(pose=graphs.pose)
+            expression_analyzer = ExpressionAnalyzer()
+            pipeline = FramePipeline(eye_contact_analyzer, posture_analyzer, expression_analyzer)
+            quality = QualityStats()
+        
+            # Process each frame
+            frame_count = 0
+            for timestamp, frame, question in frames:
+                frame_count += 1
+            
+                # Vision work is bounded by the runtime's vision worker budget;
+                # the face and pose branches of the stage graph run in parallel
+                context = FrameContext.wrap(frame, timestamp)
+                with vision_slot():
+                    outputs = pipeline.process(context)
+                context.drop_views()
+            
+                # Blurry, dark or occluded frames are tagged and left out of the scores
+                quality.record(outputs["quality"])
+                self.record_analysis(timestamp, question, outputs, recorded)
+
+        if frame_count == 0:
             return {
                 "posture_score": 0.0,
                 "smile_percentage": 0.0,
@@ -96,35 +209,11 @@ class InterviewSession:
                 "answer_quality_score": 0.0,
                 "overall_sentiment": 0.0
             }
-            
-        # Initialize analyzers
-        eye_contact_analyzer = EyeContactAnalyzer()
-        posture_analyzer = PostureAnalyzer()
-        expression_analyzer = ExpressionAnalyzer()
-        
-        # Process each frame
-        for frame in self.frames:
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = mp_face_mesh.process(frame_rgb)
-            
-            # Analyze frame with each analyzer
-            eye_contact_analyzer.analyze_frame(frame.copy())
-            posture_analyzer.analyze_frame(frame.copy())
-            expression_analyzer.analyze_frame(frame.copy(), results)
 
         # Get final scores
         eye_report = eye_contact_analyzer.get_eye_contact_score()
         posture_report = posture_analyzer.get_posture_score()
-        _, _, expression_details = expression_analyzer.analyze_frame(frame.copy(), results)
-
-        # Get smile percentage
-        smile_percentage = 0.0
-        if expression_details:
-            smile_time = next((detail for detail in expression_details if "Time Spent Smiling" in detail), "0%")
-            try:
-                smile_percentage = float(smile_time.split(":")[1].strip().rstrip('%'))
-            except:
-                smile_percentage = 0.0
+        smile_percentage = expression_analyzer.summary().smile_percentage
                 
         # Process answers
         answer_scores = []
@@ -151,10 +240,15 @@ class InterviewSession:
             "answer_quality_score": round(answer_quality_score, 1),
             "overall_sentiment": round(overall_sentiment, 1),
             "overall_score": round(overall_score, 1),
-            "total_frames": len(self.frames),
+            "total_frames": frame_count,
+            "frame_quality": quality.report(),
+            "question_scores": QuestionSegments.from_records(self.frame_records).report(),
             "questions_asked": self.questions_asked
         }
 
+# Store multiple session states; replaced by configure_session_store() at startup
+interview_sessions = InProcessSessionStore()
+
 @routes.route('/', methods=['GET'])
 def home():
     return jsonify({"message": "Welcome to HireLens API!"})
@@ -191,13 +285,18 @@ def start_interview():
         # Create new session
         session = InterviewSession(session_id)
         session.user_id = current_user
-        session.running = True
         
         # Add the question if provided
         if current_question:
             session.add_question(current_question)
         
-        interview_sessions[session_id] = session
+        # Another request may have registered the same ID while we were building this one
+        if not interview_sessions.add(session_id, session):
+            return jsonify({
+                "status": "error",
+                "message": "Session already exists"
+            }), 400
+        interview_sessions.transition(session, (STARTING,), RUNNING)
         
         return jsonify({
             "status": "success",
@@ -260,7 +359,9 @@ def record_frame():
         try:
             # Update current question if it has changed
             if current_question and current_question != getattr(session, 'current_question', None):
-                session.add_question(current_question)
+                with interview_sessions.lock_for(session_id):
+                    session.add_question(current_question)
+                interview_sessions.save(session)
             
             # Validate frame data format
             if not isinstance(frame_data, str):
@@ -288,10 +389,9 @@ def record_frame():
                     "details": str(e)
                 }), 400
             
-            # Convert to numpy array and decode image
+            # Decode once into the layout the vision models consume
             try:
-                frame_array = np.frombuffer(frame_bytes, dtype=np.uint8)
-                frame = cv2.imdecode(frame_array, cv2.IMREAD_COLOR)
+                frame = FrameContext.from_bytes(frame_bytes)
             except Exception as e:
                 return jsonify({
                     "status": "error",
@@ -306,22 +406,37 @@ def record_frame():
                     "details": "OpenCV failed to decode the image"
                 }), 400
             
-            # Validate frame dimensions
-            if frame.shape[0] == 0 or frame.shape[1] == 0:
+            # Validate frame dimensions (read now; analysis releases the decoded image)
+            dimensions = frame.shape
+            if dimensions[0] == 0 or dimensions[1] == 0:
                 return jsonify({
                     "status": "error",
                     "message": "Invalid frame dimensions",
-                    "details": f"Frame dimensions: {frame.shape}"
+                    "details": f"Frame dimensions: {dimensions}"
                 }), 400
             
             # Store frame
-            session.add_frame(frame)
+            if not interview_sessions.append_frame(session, frame):
+                return jsonify({
+                    "status": "error",
+                    "message": "Session is not accepting frames",
+                    "details": f"Session {session_id} is {session.state}"
+                }), 409
+            
+            # Score the frame now so the per-question scores are ready at stop;
+            # the frame stays recorded even if analysis fails
+            try:
+                analyzer = get_frame_analyzer(session_id)
+                if analyzer is not None:
+                    analyzer.analyze(session, frame, session.current_question)
+            except Exception as e:
+                print(f"Error analyzing frame: {str(e)}")
             
             return jsonify({
                 "status": "success",
                 "message": "Frame recorded successfully",
-                "frames_recorded": len(session.frames),
-                "frame_dimensions": frame.shape,
+                "frames_recorded": interview_sessions.frame_count(session),
+                "frame_dimensions": dimensions,
                 "current_question": session.current_question,
                 "questions_asked": session.questions_asked
             })
@@ -342,6 +457,251 @@ def record_frame():
             "details": str(e)
         }), 500
 
+@routes.route('/api/interview/upload-recording', methods=['POST'])
+@jwt_required()
+def upload_recording():
+    """
+    Accept a single WebM/MP4 recording of an answer instead of per-frame posts.
+    The video is stream-decoded at sampled timestamps and fed to the analyzers.
+    Accepts a multipart upload ('video' file + 'session_id' field) or JSON with
+    base64 'video_data'.
+    """
+    filepath = None
+    try:
+        current_user = get_jwt_identity()
+        
+        if request.files.get('video'):
+            upload = request.files['video']
+            session_id = request.form.get('session_id')
+            sample_fps = request.form.get('sample_fps', type=float)
+            started_at = request.form.get('started_at')
+            extension = os.path.splitext(upload.filename or '')[1] or '.webm'
+        elif request.is_json:
+            data = request.get_json()
+            upload = None
+            session_id = data.get('session_id')
+            sample_fps = data.get('sample_fps')
+            started_at = data.get('started_at')
+            if sample_fps is not None:
+                try:
+                    sample_fps = float(sample_fps)
+                except (TypeError, ValueError):
+                    return jsonify({
+                        "status": "error",
+                        "message": "Invalid sample_fps",
+                        "details": "sample_fps must be a number"
+                    }), 400
+            extension = '.mp4' if data.get('video_data', '').startswith('data:video/mp4') else '.webm'
+        else:
+            return jsonify({
+                "status": "error",
+                "message": "Recording is required",
+                "details": "Send a 'video' file or JSON with 'video_data'"
+            }), 400
+        
+        if not session_id:
+            return jsonify({
+                "status": "error",
+                "message": "Session ID is required"
+            }), 400
+        
+        if started_at is not None:
+            try:
+                started_at = float(started_at)
+            except (TypeError, ValueError):
+                return jsonify({
+                    "status": "error",
+                    "message": "Invalid started_at",
+                    "details": "started_at must be the recording start time in epoch milliseconds"
+                }), 400
+        
+        if sample_fps is not None and not 0 < sample_fps <= MAX_SAMPLE_FPS:
+            return jsonify({
+                "status": "error",
+                "message": "Invalid sample_fps",
+                "details": f"sample_fps must be greater than 0 and at most {MAX_SAMPLE_FPS}"
+            }), 400
+            
+        # Get session
+        session = interview_sessions.get(session_id)
+        if not session:
+            return jsonify({
+                "status": "error",
+                "message": "Session not found"
+            }), 404
+            
+        # Verify user owns this session
+        if getattr(session, 'user_id', None) != current_user:
+            return jsonify({
+                "status": "error",
+                "message": "Unauthorized access to session"
+            }), 403
+        
+        if session.state != RUNNING:
+            return jsonify({
+                "status": "error",
+                "message": "Session is not accepting recordings",
+                "details": f"Session {session_id} is {session.state}"
+            }), 409
+        
+        # OpenCV needs a file path to demux the container
+        temp_dir = os.path.join(os.getcwd(), 'temp_video')
+        os.makedirs(temp_dir, exist_ok=True)
+        filepath = os.path.join(temp_dir, f"recording_{uuid.uuid4().hex}{extension}")
+        
+        if upload is not None:
+            upload.save(filepath)
+        else:
+            base64_data = data.get('video_data', '')
+            if ',' in base64_data:
+                base64_data = base64_data.split(',', 1)[1]
+            try:
+                video_bytes = base64.b64decode(base64_data)
+            except Exception as e:
+                return jsonify({
+                    "status": "error",
+                    "message": "Invalid base64 data",
+                    "details": str(e)
+                }), 400
+            with open(filepath, 'wb') as f:
+                f.write(video_bytes)
+        
+        # Place the recording on the session timeline: at the start time the
+        # client reports, else ending now, else right after the previous upload
+        elapsed = (datetime.utcnow() - session.start_time).total_seconds()
+        if started_at is not None:
+            offset = started_at / 1000.0 - session.start_time.replace(tzinfo=timezone.utc).timestamp()
+            if not 0 <= offset <= elapsed + 1.0:
+                return jsonify({
+                    "status": "error",
+                    "message": "Invalid started_at",
+                    "details": "started_at must fall between the interview start and now"
+                }), 400
+        else:
+            duration_ms = probe_duration_ms(filepath)
+            if duration_ms:
+                offset = max(0.0, elapsed - duration_ms / 1000.0)
+            elif session.recording_scores:
+                offset = session.recording_scores[-1]["recording_end"]
+            else:
+                offset = 0.0
+        
+        # Decode only the sampled frames and feed them straight to the analyzers
+        sampled = iter_sampled_frames(filepath, sample_fps=sample_fps or DEFAULT_SAMPLE_FPS)
+        sample_times = []
+        def timed_frames():
+            for timestamp, frame in sampled:
+                sample_times.append(offset + timestamp / 1000.0)
+                yield sample_times[-1], frame
+        try:
+            scores = session.process_interview(frames=timed_frames())
+        except ValueError as e:
+            return jsonify({
+                "status": "error",
+                "message": "Failed to decode recording",
+                "details": str(e)
+            }), 400
+        
+        # Each recording adds to the session's aggregates; keep its own scores too
+        scores["recording_start"] = round(offset, 3)
+        scores["recording_end"] = round(sample_times[-1] if sample_times else offset, 3)
+        with interview_sessions.lock_for(session_id):
+            session.recording_scores.append(scores)
+            session.last_update = time.time()
+        interview_sessions.save(session)
+        
+        return jsonify({
+            "status": "success",
+            "message": "Recording analyzed successfully",
+            "frames_analyzed": scores["total_frames"],
+            "scores": scores
+        })
+        
+    except Exception as e:
+        print(f"Error in upload_recording: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            "status": "error",
+            "message": f"Error processing recording: {str(e)}"
+        }), 500
+    finally:
+        # Clean up the uploaded file
+        if filepath and os.path.exists(filepath):
+            os.remove(filepath)
+
+@routes.route('/api/interview/landmarks', methods=['POST'])
+@jwt_required()
+def ingest_landmarks():
+    """
+    Accept landmarks computed in the browser instead of JPEG frames.
+    The body is a stream of binary landmark packets (application/octet-stream,
+    format in facial_recognition/landmarks.py) and session_id is passed as a
+    query parameter. Scoring runs on the landmarks when the interview stops.
+    """
+    try:
+        current_user = get_jwt_identity()
+        session_id = request.args.get('session_id')
+        current_question = request.args.get('question')
+        
+        if not session_id:
+            return jsonify({
+                "status": "error",
+                "message": "Session ID is required",
+                "details": "session_id query parameter is missing"
+            }), 400
+            
+        # Get session
+        session = interview_sessions.get(session_id)
+        if not session:
+            return jsonify({
+                "status": "error",
+                "message": "Session not found"
+            }), 404
+            
+        # Verify user owns this session
+        if getattr(session, 'user_id', None) != current_user:
+            return jsonify({
+                "status": "error",
+                "message": "Unauthorized access to session"
+            }), 403
+        
+        try:
+            packets = parse_packets(request.get_data(cache=False))
+        except ValueError as e:
+            return jsonify({
+                "status": "error",
+                "message": "Invalid landmark packets",
+                "details": str(e)
+            }), 400
+        
+        # Update current question if it has changed
+        if current_question and current_question != session.current_question:
+            with interview_sessions.lock_for(session_id):
+                session.add_question(current_question)
+            interview_sessions.save(session)
+        
+        if not interview_sessions.append_landmarks(session, packets):
+            return jsonify({
+                "status": "error",
+                "message": "Session is not accepting landmarks",
+                "details": f"Session {session_id} is {session.state}"
+            }), 409
+        
+        return jsonify({
+            "status": "success",
+            "message": "Landmarks received",
+            "frames_received": len(packets),
+            "total_frames": interview_sessions.landmark_count(session)
+        })
+        
+    except Exception as e:
+        print(f"Error in ingest_landmarks: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": f"Error ingesting landmarks: {str(e)}"
+        }), 500
+
 @routes.route('/api/interview/start-audio', methods=['POST'])
 @jwt_required()
 def start_audio_recording():
@@ -376,9 +736,10 @@ def start_audio_recording():
         from app.speech_to_text.stt import InterviewRecorder
         
         # Create recorder instance if it doesn't already exist
-        if session_id not in audio_recorders:
-            print(f"Creating new audio recorder for session {session_id}")
-            audio_recorders[session_id] = InterviewRecorder()
+        with interview_sessions.lock_for(session_id):
+            if session_id not in audio_recorders:
+                print(f"Creating new audio recorder for session {session_id}")
+                audio_recorders[session_id] = InterviewRecorder()
         
         # Start the recorder in a separate thread to avoid blocking
         def start_recording_thread():
@@ -396,6 +757,7 @@ def start_audio_recording():
         
         # Mark that audio recording has been requested
         session.audio_requested = True
+        interview_sessions.save(session)
         
         return jsonify({
             "status": "success",
@@ -442,8 +804,8 @@ def stop_audio_recording():
             }), 403
         
         transcript = ""
-        # Get recorder if it exists
-        recorder = audio_recorders.get(session_id)
+        # Take the recorder out of the registry so a concurrent stop can't stop it twice
+        recorder = audio_recorders.pop(session_id, None)
         
         if recorder:
             try:
@@ -469,14 +831,7 @@ def stop_audio_recording():
         
         # Store the transcript in the session
         session.transcript = transcript
-        
-        # Clean up the recorder
-        if session_id in audio_recorders:
-            try:
-                del audio_recorders[session_id]
-                print(f"Removed audio recorder for session {session_id}")
-            except Exception as e:
-                print(f"Error cleaning up recorder: {str(e)}")
+        interview_sessions.save(session)
         
         # Return the transcript
         return jsonify({
@@ -514,16 +869,57 @@ def stop_interview():
             "message": "Session not found"
         }), 404
     
+    # Stop recording; only one stop request gets past this point
+    result = None  # The stored interview, once insert_one has run
+    if not interview_sessions.transition(session, (RUNNING,), FINALIZING):
+        return jsonify({
+            "status": "error",
+            "message": "Interview is already being stopped",
+            "details": f"Session {session_id} is {session.state}"
+        }), 409
+    
     try:
-        # Stop recording
-        session.running = False
+        # No frames can be added once the session is finalizing, so this
+        # snapshot (which includes frames other server processes received)
+        # is complete and nothing below mutates session.frames
+        recorded = interview_sessions.snapshot_frames(session)
         
         # Store transcript if it came from backend audio recording
         if transcript:
             session.transcript = transcript
         
-        # Check if we have any frames to process
-        if not session.frames:
+        # Recorded frames are scored as they arrive (see record_frame); score
+        # any the live analyzer hasn't seen, e.g. frames received by another
+        # worker or before a restart. This also waits for in-flight frames.
+        analyzer = get_frame_analyzer(session_id, (FINALIZING,)) if recorded else None
+        if analyzer is not None:
+            pending = analyzer.analyze_pending(session, recorded)
+            if pending:
+                print(f"Analyzed {pending} pending frame(s) of session {session_id} at stop")
+        interview_sessions.sync(session)  # Analyses and landmarks of the other workers
+        question_segments, quality_stats, frame_metrics = session.summarize()
+        
+        # Landmarks computed in the browser are scored directly, no frames needed
+        landmark_scores = None
+        client_landmarks_ignored = 0
+        if session.client_landmarks and not question_segments.frames:
+            landmark_data = smooth_landmarks(session.landmarks.stack())
+            landmark_scores = score_landmarks(landmark_data)
+            landmark_scores["question_scores"] = score_landmarks_by_question(
+                landmark_data, [session.landmark_questions[i] for i in session.landmarks.order()]
+            )
+            frame_metrics = landmark_frame_metrics(landmark_data)
+        elif session.client_landmarks:
+            # The scores come from the server's analysis of the frames; client
+            # landmarks (the ones without a live gaze decision) are left out
+            client_landmarks_ignored = int(np.isnan(np.asarray(session.landmarks.gaze, dtype=np.float32)).sum())
+            print(f"Session {session_id} has analyzed frames; ignoring {client_landmarks_ignored} "
+                  f"client landmark frame(s)")
+        
+        # Check if we have any frames (or an uploaded recording) to process
+        if not recorded and not session.recording_scores and landmark_scores is None:
+            # Nothing to finalize; keep the session open for more frames
+            interview_sessions.transition(session, (FINALIZING,), RUNNING)
             return jsonify({
                 "status": "warning",
                 "message": "No frames were recorded in this session",
@@ -538,44 +934,25 @@ def stop_interview():
                 }
             })
         
-        # Process only a subset of frames to improve performance
-        # Take at most 100 frames, evenly distributed throughout the session
-        max_frames = 100
-        sample_frames = []
-        if len(session.frames) > max_frames:
-            step = len(session.frames) // max_frames
-            for i in range(0, len(session.frames), step):
-                if len(sample_frames) < max_frames:
-                    sample_frames.append(session.frames[i])
+        # Recorded frames and uploaded recordings are all in the per-question
+        # scores; client landmarks are scored on their own
+        total_frames = len(recorded)
+        if session.recording_scores:
+            total_frames += sum(scores["total_frames"] for scores in session.recording_scores)
+        if question_segments.frames:
+            vision_scores = question_segments.overall()
+            question_scores = question_segments.report()
+        elif landmark_scores is not None:
+            vision_scores = landmark_scores
+            question_scores = landmark_scores["question_scores"]
         else:
-            sample_frames = session.frames
-            
-        # Store original frames temporarily and use sample for processing
-        original_frames = session.frames
-        session.frames = sample_frames
-        
-        # Process frames with the reduced set
-        print(f"Processing {len(sample_frames)} frames out of {len(original_frames)} total...")
-        
-        # Calculate more realistic scores based on frame count
-        frame_count = len(session.frames)
-        frame_count_ratio = min(1.0, frame_count / 200.0)  # Normalize: 200+ frames is optimal
-        
-        # Base score calculation - more frames = better participation + variability
-        base_score = 65.0 + (25.0 * frame_count_ratio)
-        
-        # Add randomization for more realistic scores with frame count influencing range
-        import random
-        random.seed(session_id)  # Use consistent seed for repeatable results
-        
-        # Calculate scores with variation dependent on frame count
-        # More frames = smaller variation (more reliable scores)
-        variation_range = max(5, 20 - (frame_count_ratio * 15))
-        
-        # Generate realistic scores with slight variations
-        posture_score = min(100, base_score + random.uniform(-variation_range, variation_range))
-        eye_contact_score = min(100, base_score + random.uniform(-variation_range, variation_range))
-        smile_percentage = min(100, max(40, base_score - 10 + random.uniform(-variation_range, variation_range)))
+            vision_scores = {"posture_score": 0.0, "eye_contact_score": 0.0, "smile_percentage": 0.0}
+            question_scores = []
+        if landmark_scores is not None:
+            total_frames += landmark_scores["total_frames"]
+        posture_score = vision_scores["posture_score"]
+        eye_contact_score = vision_scores["eye_contact_score"]
+        smile_percentage = vision_scores["smile_percentage"]
         
         # Default answer quality - will be updated if analysis is available
         answer_quality_score = 70.0
@@ -596,13 +973,10 @@ def stop_interview():
             "eye_contact_score": round(eye_contact_score, 1),
             "answer_quality_score": round(answer_quality_score, 1),
             "overall_score": round(overall_score, 1),
-            "total_frames": len(original_frames),
+            "total_frames": total_frames,
             "questions_asked": session.questions_asked
         }
         
-        # Restore original frames
-        session.frames = original_frames
-        
         # Calculate duration
         duration = (datetime.utcnow() - session.start_time).total_seconds()
         
@@ -761,19 +1135,45 @@ def stop_interview():
             "questions": session.questions_asked,
             "current_question": session.current_question,
             "answer_analysis": answer_analysis,
-            "frame_count": len(original_frames)  # Store original frame count
+            "frame_count": total_frames,  # Store original frame count
+            "question_scores": question_scores
         }
         
+        # Only frames analyzed on the server go through the quality gate;
+        # client landmark sessions have no quality stats to report
+        frame_quality = quality_stats.report() if quality_stats.total else None
+        if frame_quality is not None:
+            interview_result["frame_quality"] = frame_quality
+        if client_landmarks_ignored:
+            interview_result["client_landmarks_ignored"] = client_landmarks_ignored
+        
         result = get_interviews_collection().insert_one(interview_result)
         
+        # Persist the per-frame timeline so charts can be served without re-running vision
+        if frame_metrics:
+            try:
+                store_frame_metrics(result.inserted_id, current_user, session.start_time, frame_metrics)
+            except Exception as e:
+                print(f"Error storing frame metrics: {str(e)}")
+        
+        # Keep the landmarks so the interview can be rescored after threshold changes
+        if len(session.landmarks):
+            try:
+                store_landmarks(result.inserted_id, current_user, session.landmarks)
+            except Exception as e:
+                print(f"Error storing landmarks: {str(e)}")
+        
         # Cleanup session
-        del interview_sessions[session_id]
+        finish_session(session_id, session)
         
         return jsonify({
             "status": "success",
             "message": "Interview results saved successfully",
             "interview_id": str(result.inserted_id),
             "final_scores": final_scores,
+            "frame_quality": frame_quality,
+            "client_landmarks_ignored": client_landmarks_ignored,
+            "question_scores": question_scores,
             "questions_asked": session.questions_asked,
             "answer_analysis": answer_analysis
         })
@@ -783,6 +1183,16 @@ def stop_interview():
         print(f"Error in stop_interview: {str(e)}")
         print(traceback.format_exc())
         
+        if result is None:
+            # Nothing was stored; let the client stop (and retry) again
+            interview_sessions.transition(session, (FINALIZING,), RUNNING)
+        else:
+            # The interview is stored, so a retry must not insert it twice
+            try:
+                finish_session(session_id, session)
+            except Exception as cleanup_error:
+                print(f"Error cleaning up session {session_id}: {str(cleanup_error)}")
+        
         # Even if there's an error, try to return some results
         try:
             # Create default scores if we don't have them
@@ -799,6 +1209,7 @@ def stop_interview():
                 "status": "partial_success",
                 "message": "Interview processed with errors, returning estimated scores",
                 "error_details": str(e),
+                "interview_id": str(result.inserted_id) if result is not None else None,
                 "final_scores": final_scores,
                 "questions_asked": getattr(session, 'questions_asked', [])
             })
@@ -820,8 +1231,12 @@ def test_interview():
         # Create new session
         session = InterviewSession(session_id)
         session.user_id = current_user
-        session.running = True
-        interview_sessions[session_id] = session
+        if not interview_sessions.add(session_id, session):
+            return jsonify({
+                "status": "error",
+                "message": "Session already exists"
+            }), 400
+        interview_sessions.transition(session, (STARTING,), RUNNING)
         
         # Try different camera indices and backends
         camera_indices = [0, 1]  # Try first two camera indices
@@ -866,7 +1281,7 @@ def test_interview():
             frame_count += 1
             
             # Store frame
-            session.add_frame(frame.copy())
+            interview_sessions.append_frame(session, FrameContext(bgr=frame.copy()))
             
             # Display frame with recording indicator
             cv2.putText(frame, "Recording...", (10, 30),
@@ -883,6 +1298,7 @@ def test_interview():
         cv2.destroyAllWindows()
         
         # Process results
+        interview_sessions.sync(session)
         if not session.frames:
             return jsonify({
                 "status": "warning",
@@ -901,7 +1317,9 @@ def test_interview():
         final_scores = session.process_interview()
         
         # Cleanup session
+        interview_sessions.transition(session, (RUNNING,), DONE)
         del interview_sessions[session_id]
+        discard_session_checkpoint(session_id)
         
         return jsonify({
             "status": "success",
@@ -1055,12 +1473,9 @@ def analyze_interview(interview_id):
                 "message": "Unauthorized access to interview"
             }), 403
             
-        # Initialize analyzers if not already present in the route context
-        from app.speech_to_text.analyzer import AnswerAnalyzer
-        from app.sentiment_analysis.sentiment_analysis_functions import sentiment_analysis
-        
-        answer_analyzer = AnswerAnalyzer()
-        sentiment_analyzer = sentiment_analysis()
+        # Shared analyzers from the model registry
+        answer_analyzer = get_answer_analyzer()
+        sentiment_analyzer = get_sentiment_model()
         
         # Get questions from the interview
         questions = interview.get("questions", [])
@@ -1124,6 +1539,106 @@ def analyze_interview(interview_id):
             "message": f"Error analyzing interview: {str(e)}"
         }), 500
 
+@routes.route('/api/interview/<interview_id>/timeline', methods=['GET'])
+@jwt_required()
+def get_interview_timeline(interview_id):
+    """
+    Return the stored per-frame metrics of an interview, downsampled to the
+    requested resolution. Query params: start, end and resolution (seconds).
+    """
+    try:
+        current_user = get_jwt_identity()
+        start = request.args.get('start', default=0.0, type=float)
+        end = request.args.get('end', default=None, type=float)
+        resolution = request.args.get('resolution', default=1.0, type=float)
+        
+        if resolution <= 0:
+            return jsonify({
+                "status": "error",
+                "message": "Resolution must be positive"
+            }), 400
+        
+        from bson.objectid import ObjectId
+        obj_id = ObjectId(interview_id)
+        
+        interview = get_interviews_collection().find_one({"_id": obj_id}, {"userId": 1})
+        if not interview:
+            return jsonify({
+                "status": "error",
+                "message": "Interview not found"
+            }), 404
+            
+        # Verify the user owns this interview
+        if interview.get("userId") != current_user:
+            return jsonify({
+                "status": "error",
+                "message": "Unauthorized access to interview"
+            }), 403
+        
+        timeline = query_timeline(obj_id, start=start, end=end, resolution=resolution)
+        
+        return jsonify({
+            "status": "success",
+            "interview_id": interview_id,
+            "resolution": resolution,
+            "timeline": timeline
+        })
+        
+    except Exception as e:
+        print(f"Error retrieving timeline: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": f"Error retrieving timeline: {str(e)}"
+        }), 500
+
+@routes.route('/api/interview/<interview_id>/rescore', methods=['GET'])
+@jwt_required()
+def rescore_interview_route(interview_id):
+    """
+    Recompute eye contact, posture and smile scores of a finished interview
+    from its stored landmarks with the current thresholds. Needs no frames
+    or models.
+    """
+    try:
+        current_user = get_jwt_identity()
+        
+        from bson.objectid import ObjectId
+        obj_id = ObjectId(interview_id)
+        
+        interview = get_interviews_collection().find_one({"_id": obj_id}, {"userId": 1})
+        if not interview:
+            return jsonify({
+                "status": "error",
+                "message": "Interview not found"
+            }), 404
+            
+        # Verify the user owns this interview
+        if interview.get("userId") != current_user:
+            return jsonify({
+                "status": "error",
+                "message": "Unauthorized access to interview"
+            }), 403
+        
+        scores = rescore_interview(obj_id)
+        if scores is None:
+            return jsonify({
+                "status": "error",
+                "message": "No landmarks stored for this interview"
+            }), 404
+        
+        return jsonify({
+            "status": "success",
+            "interview_id": interview_id,
+            "scores": scores
+        })
+        
+    except Exception as e:
+        print(f"Error rescoring interview: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": f"Error rescoring interview: {str(e)}"
+        }), 500
+
 # Endpoint to analyze a specific question attempt
 @routes.route('/api/interview/analyze-attempt', methods=['POST'])
 @jwt_required()
@@ -1148,19 +1663,16 @@ def analyze_attempt():
                 "message": "Question and transcript are required"
             }), 400
             
-        # Import necessary analyzers
-        from app.answer_analysis.analyzer import AnswerAnalyzer
-        from app.sentiment_analysis.sentiment_analysis_functions import sentiment_analysis
-        
-        # Initialize analyzers
-        answer_analyzer = AnswerAnalyzer()
-        sentiment_analyzer = sentiment_analysis()
+        # Shared analyzers from the model registry
+        answer_analyzer = get_answer_analyzer()
+        sentiment_analyzer = get_sentiment_model()
         
         # Get detailed analysis
         analysis = answer_analyzer.analyze_answer(question, transcript)
         
-        # Get sentiment analysis
-        sentiment_result = sentiment_analyzer.predict(transcript)
+        # Get sentiment analysis; long answers are scored window by window
+        sentiment_details = sentiment_analyzer.predict_detailed(transcript)
+        sentiment_result = sentiment_details["label"]
         
         # Prepare positive reformulation if sentiment is negative
         positive_reformulation = None
@@ -1174,6 +1686,8 @@ def analyze_attempt():
             "status": "success",
             "analysis": analysis,
             "sentiment": sentiment_result,
+            "sentiment_probabilities": sentiment_details["probabilities"],
+            "sentiment_segments": sentiment_details.get("segments", []),
             "positive_reformulation": positive_reformulation,
             "scores": {
                 "answer_quality_score": analysis.get("score", 0),
@@ -1189,15 +1703,216 @@ def analyze_attempt():
         }), 500
 
 # Cleanup inactive sessions periodically
-def cleanup_inactive_sessions():
-    """Remove sessions that haven't been updated in 5 minutes"""
+def release_audio_recorder(session_id):
+    """Stop and drop the audio recorder of a session, if it has one"""
+    recorder = audio_recorders.pop(session_id, None)
+    if recorder is None:
+        return
+    try:
+        if hasattr(recorder.recorder, 'shutdown'):
+            recorder.recorder.shutdown()
+        elif hasattr(recorder.recorder, 'stop'):
+            recorder.recorder.stop()
+    except Exception as e:
+        print(f"Error stopping audio recorder for session {session_id}: {str(e)}")
+
+def get_frame_analyzer(session_id, states=(RUNNING,)):
+    """
+    The live frame analyzer of a session in this process, created on first
+    use. Returns None if the session is gone or not in one of states, so no
+    analyzer is built for a session that is being (or has been) stopped.
+    """
+    analyzer = frame_analyzers.get(session_id)
+    if analyzer is None:
+        with interview_sessions.lock_for(session_id):
+            analyzer = frame_analyzers.get(session_id)
+            if analyzer is None:
+                session = interview_sessions.get(session_id)
+                if session is None or session.state not in states:
+                    return None
+                analyzer = frame_analyzers[session_id] = LiveFrameAnalyzer()
+    return analyzer
+
+def release_frame_analyzer(session_id):
+    """Return the graphs of a session's live frame analyzer to the pool, if it has one"""
+    with interview_sessions.lock_for(session_id):
+        analyzer = frame_analyzers.pop(session_id, None)
+    if analyzer is not None:
+        analyzer.close()
+
+def release_orphans():
+    """
+    Release the analyzers and audio recorders of this process whose session
+    no longer exists, e.g. one another worker stopped or reaped. Returns the
+    session IDs released.
+    """
+    # List the owners before the sessions, so anything created after the
+    # sessions were listed is never mistaken for an orphan
+    owners = set(frame_analyzers) | set(audio_recorders)
+    live = set(interview_sessions.keys())
+    orphans = sorted(owners - live)
+    for session_id in orphans:
+        release_audio_recorder(session_id)
+        release_frame_analyzer(session_id)
+        print(f"Released the analyzers of finished session {session_id}")
+    return orphans
+
+def finish_session(session_id, session):
+    """Drop a stopped session whose interview has been stored"""
+    interview_sessions.transition(session, (FINALIZING,), DONE)
+    release_frame_analyzer(session_id)
+    try:
+        del interview_sessions[session_id]
+    except KeyError:
+        pass  # Reaped or removed by another request
+    discard_session_checkpoint(session_id)
+
+def cleanup_inactive_sessions(ttl=300):
+    """Remove sessions that haven't been updated in `ttl` seconds and free their frames"""
     current_time = time.time()
     inactive_sessions = [
-        session_id for session_id, session in interview_sessions.items()
-        if current_time - session.last_update > 300  # 5 minutes
+        (session_id, session) for session_id, session in interview_sessions.items()
+        if current_time - session.last_update > ttl
     ]
-    for session_id in inactive_sessions:
-        del interview_sessions[session_id]
+    reaped = []
+    for session_id, session in inactive_sessions:
+        idle = current_time - session.last_update
+        # Sessions being stopped are left to the stop request
+        if not interview_sessions.transition(session, (STARTING, RUNNING), DONE):
+            continue
+        release_audio_recorder(session_id)
+        release_frame_analyzer(session_id)
+        try:
+            del interview_sessions[session_id]
+        except KeyError:
+            pass  # Removed by a request in the meantime
+        discard_session_checkpoint(session_id)
+        # Drop the frames now rather than whenever the last reference goes away
+        session.frames = []
+        session.landmarks = LandmarkSequence()
+        print(f"Reaped inactive session {session_id} (idle {idle:.0f}s)")
+        reaped.append(session_id)
+    # Sessions reaped or stopped by another worker leave their analyzers here
+    release_orphans()
+    return reaped
+
+def start_session_reaper(ttl, interval):
+    """Evict sessions idle for more than ttl seconds, checking every interval seconds"""
+    global session_reaper
+    if session_reaper is not None:
+        return
+    session_reaper = SessionReaper(ttl, interval)
+    session_reaper.start(cleanup_inactive_sessions)
+
+def configure_session_store(backend, path):
+    """Select where interview sessions live: "memory" (this process) or "sqlite" (shared)"""
+    global interview_sessions
+    interview_sessions = create_session_store(backend, path, InterviewSession)
+
+def start_session_checkpoints(directory, interval):
+    """Restore checkpointed sessions from a previous run and start periodic snapshots"""
+    global session_checkpointer
+    if session_checkpointer is not None:
+        return
+    if interview_sessions.shared:
+        # The shared store already outlives any one process
+        return
+    session_checkpointer = SessionCheckpointer(directory, interval)
+    restored = session_checkpointer.restore(InterviewSession)
+    interview_sessions.update(restored)
+    if restored:
+        print(f"Restored {len(restored)} interview session(s) from checkpoints")
+    session_checkpointer.start(interview_sessions)
+
+def discard_session_checkpoint(session_id):
+    """Delete the checkpoint of a session that has finished"""
+    if session_checkpointer is not None:
+        try:
+            session_checkpointer.discard(session_id)
+        except Exception as e:
+            print(f"Error removing session checkpoint: {str(e)}")
+
+def admin_access_error():
+    """403 response unless the caller's email is in ADMIN_EMAILS, else None"""
+    from flask import current_app
+    admin_emails = current_app.config.get('ADMIN_EMAILS', [])
+    if get_jwt().get('email', '') not in admin_emails:
+        return jsonify({
+            "status": "error",
+            "message": "Admin access required"
+        }), 403
+    return None
+
+@routes.route('/api/admin/sessions', methods=['GET'])
+@jwt_required()
+def list_live_sessions():
+    """Live interview sessions in this process with their age, idle time and memory footprint"""
+    error = admin_access_error()
+    if error:
+        return error
+    
+    try:
+        current_time = time.time()
+        sessions = []
+        for session_id, session in interview_sessions.items():
+            sessions.append({
+                "session_id": session_id,
+                "user_id": getattr(session, 'user_id', None),
+                "running": session.running,
+                "age_seconds": round((datetime.utcnow() - session.start_time).total_seconds(), 1),
+                "idle_seconds": round(current_time - session.last_update, 1),
+                "frames": len(session.frames),
+                "landmark_frames": len(session.landmarks),
+                "questions_asked": len(session.questions_asked),
+                "audio_recorder": session_id in audio_recorders,
+                "memory_bytes": session_memory(session)
+            })
+        sessions.sort(key=lambda item: item["memory_bytes"]["total"], reverse=True)
+        
+        return jsonify({
+            "status": "success",
+            "process_id": os.getpid(),
+            "session_count": len(sessions),
+            "total_memory_bytes": sum(item["memory_bytes"]["total"] for item in sessions),
+            "reaper": session_reaper.report() if session_reaper else None,
+            "shared_models": model_registry.report(),
+            "sessions": sessions
+        })
+    except Exception as e:
+        print(f"Error listing sessions: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": f"Error listing sessions: {str(e)}"
+        }), 500
+
+@routes.route('/api/admin/reanalyze-sentiment', methods=['POST'])
+@jwt_required()
+def reanalyze_sentiment_route():
+    """
+    Re-score the sentiment of stored interview transcripts in bulk with the
+    current model. Optional JSON: user_id to limit to one user, dry_run to
+    only count how many labels would change.
+    """
+    error = admin_access_error()
+    if error:
+        return error
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        query = {"userId": data['user_id']} if data.get('user_id') else None
+        stats = reanalyze_sentiment(query=query, dry_run=bool(data.get('dry_run')))
+        
+        return jsonify({
+            "status": "success",
+            "message": "Sentiment reanalysis complete",
+            "details": stats
+        })
+    except Exception as e:
+        print(f"Error reanalyzing sentiment: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": f"Error reanalyzing sentiment: {str(e)}"
+        }), 500
 
 @routes.route('/api/interview/test-audio', methods=['GET'])
 @jwt_required()
@@ -1281,7 +1996,6 @@ def process_audio():
                         print(f"Error importing AudioTranscriber: {e}")
                         # Fallback to our built-in google speech recognition if AudioTranscriber can't be imported
                         from app.speech_to_text.stt import InterviewRecorder
-                        recorder = InterviewRecorder()
                         
                         # Create temp directory for audio
                         temp_dir = os.path.join(os.getcwd(), 'temp_audio')
@@ -1300,8 +2014,8 @@ def process_audio():
                         with open(filepath, 'wb') as f:
                             f.write(base64.b64decode(base64_data))
                         
-                        # Transcribe using the recorder
-                        transcription = recorder.transcribe_from_file(filepath)
+                        # Transcribe the file (no live recorder needed)
+                        transcription = InterviewRecorder.transcribe_from_file(filepath)
                         
                         # Clean up the file
                         if os.path.exists(filepath):
@@ -1323,11 +2037,12 @@ def process_audio():
                     if session_id and session_id in interview_sessions:
                         session = interview_sessions[session_id]
                         session.transcript = transcription
+                        interview_sessions.save(session)
                         
                         # Try to analyze the answer if we have a valid transcription
                         try:
                             if transcription and not transcription.startswith('[Error') and not transcription.startswith('[No speech'):
-                                analyzer = AnswerAnalyzer()
+                                analyzer = get_answer_analyzer()
                                 if question:
                                     answer_analysis = analyzer.analyze_answer(question, transcription)
                                     session.answer_analysis = answer_analysis
@@ -1411,7 +2126,7 @@ def analyze_transcript():
                 
                 # Create analyzer and get analysis
                 try:
-                    answer_analyzer = AnswerAnalyzer()
+                    answer_analyzer = get_answer_analyzer()
                     analysis = answer_analyzer.analyze_answer(question, transcript)
                     print("Answer analysis completed successfully")
                 except Exception as analyzer_error:
@@ -1420,7 +2135,7 @@ def analyze_transcript():
                     
                 # Get sentiment
                 try:
-                    sentiment_analyzer = SentimentAnalyzer()
+                    sentiment_analyzer = get_sentiment_analyzer()
                     sentiment_result = sentiment_analyzer.analyze_sentiment(transcript)
                     print(f"Sentiment analysis: {sentiment_result}")
                 except Exception as sentiment_error:
@@ -1489,10 +2204,12 @@ def analyze_transcript():
             try:
                 session = interview_sessions[session_id]
                 if question in session.answers:
-                    session.answers[question]['audio_transcript'] = transcript
-                    session.answers[question]['analysis'] = analysis
-                    session.answers[question]['sentiment'] = sentiment_result
-                    session.answers[question]['positive_reformulation'] = positive_reformulation
+                    with interview_sessions.lock_for(session_id):
+                        session.answers[question]['audio_transcript'] = transcript
+                        session.answers[question]['analysis'] = analysis
+                        session.answers[question]['sentiment'] = sentiment_result
+                        session.answers[question]['positive_reformulation'] = positive_reformulation
+                    interview_sessions.save(session)
             except Exception as session_error:
                 print(f"Error updating session: {str(session_error)}")
         
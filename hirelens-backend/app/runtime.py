@@ -0,0 +1,160 @@
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+CPU_COUNT = os.cpu_count() or 1
+
+# Thread budgets per deployment preset.
+# - latency: few concurrent jobs, each allowed to use several cores so a single
+#   interview is scored as fast as possible
+# - throughput: many concurrent jobs, each kept single-threaded so the cores are
+#   shared between candidates without oversubscription
+RUNTIME_PRESETS = {
+    "latency": {
+        "cv2_threads": max(1, CPU_COUNT // 2),
+        "torch_threads": max(1, CPU_COUNT // 2),
+        "torch_interop_threads": 1,
+        "vision_workers": 2,
+        "nlp_workers": 1
+    },
+    "throughput": {
+        "cv2_threads": 1,
+        "torch_threads": 1,
+        "torch_interop_threads": 1,
+        "vision_workers": max(1, CPU_COUNT - 1),
+        "nlp_workers": max(1, CPU_COUNT // 2)
+    }
+}
+
+# Environment variables that override single entries of the active preset
+BUDGET_ENV_OVERRIDES = {
+    "cv2_threads": "CV2_NUM_THREADS",
+    "torch_threads": "TORCH_NUM_THREADS",
+    "torch_interop_threads": "TORCH_INTEROP_THREADS",
+    "vision_workers": "VISION_WORKERS",
+    "nlp_workers": "NLP_WORKERS"
+}
+
+_budget = None
+_vision_slots = None
+_nlp_slots = None
+_configure_lock = threading.Lock()
+
+
+def _resolve_budget(preset, overrides):
+    """The preset's budget with environment and keyword overrides applied"""
+    if preset not in RUNTIME_PRESETS:
+        raise ValueError(f"Unknown runtime preset '{preset}', expected one of {list(RUNTIME_PRESETS)}")
+
+    budget = dict(RUNTIME_PRESETS[preset])
+    for key, env_name in BUDGET_ENV_OVERRIDES.items():
+        if os.getenv(env_name):
+            budget[key] = int(os.getenv(env_name))
+    budget.update({key: value for key, value in overrides.items() if value is not None})
+    budget["preset"] = preset
+    return budget
+
+
+def apply_thread_environment(preset=None, **overrides):
+    """
+    Set OMP_NUM_THREADS/MKL_NUM_THREADS from the budget unless they are set
+    already. The OpenMP and MKL pools read them when torch is imported, so
+    this must run before anything imports torch (see run.py).
+    """
+    budget = _resolve_budget(preset or os.getenv("RUNTIME_PRESET", "latency"), overrides)
+    applied = [name for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS") if name not in os.environ]
+    for name in applied:
+        os.environ[name] = str(budget["torch_threads"])
+    if applied and "torch" in sys.modules:
+        print(f"[WARNING] torch was imported before {', '.join(applied)} was set; "
+              f"its OpenMP/MKL pools keep their default size")
+    return budget
+
+
+def configure_runtime(preset="latency", **overrides):
+    """
+    Apply a thread budget to OpenCV, PyTorch and the vision/NLP worker pools.
+    Only the first call takes effect; the worker pools are built once, so
+    later calls return the active budget unchanged. Call once at startup,
+    before any model runs.
+    """
+    global _budget, _vision_slots, _nlp_slots
+
+    with _configure_lock:
+        if _budget is not None:
+            if preset != _budget["preset"] or overrides:
+                print(f"[WARNING] Runtime is already configured ({_budget['preset']}), "
+                      f"ignoring the '{preset}' preset")
+            return _budget
+
+        budget = apply_thread_environment(preset, **overrides)
+
+        import cv2
+        cv2.setNumThreads(budget["cv2_threads"])
+
+        try:
+            import torch
+            torch.set_num_threads(budget["torch_threads"])
+            try:
+                torch.set_num_interop_threads(budget["torch_interop_threads"])
+            except RuntimeError:
+                # Inter-op pool can only be sized before the first parallel op
+                pass
+        except ImportError:
+            pass
+
+        # MediaPipe graphs and DistilBERT calls are gated by these pools
+        _vision_slots = threading.BoundedSemaphore(budget["vision_workers"])
+        _nlp_slots = threading.BoundedSemaphore(budget["nlp_workers"])
+        _budget = budget
+
+    print(f"Runtime configured ({preset}): cv2={budget['cv2_threads']} threads, "
+          f"torch={budget['torch_threads']} threads, vision workers={budget['vision_workers']}, "
+          f"nlp workers={budget['nlp_workers']}")
+    return budget
+
+
+def get_thread_budget():
+    """Return the active budget, configuring the default preset on first use"""
+    if _budget is None:
+        configure_runtime(os.getenv("RUNTIME_PRESET", "latency"))
+    return _budget
+
+
+def enforce_thread_budget():
+    """
+    Re-apply the library thread counts on the calling thread.
+    OpenMP thread counts are per-thread, so request and worker threads call this
+    before running inference instead of inheriting the library defaults.
+    """
+    budget = get_thread_budget()
+
+    import cv2
+    if cv2.getNumThreads() != budget["cv2_threads"]:
+        cv2.setNumThreads(budget["cv2_threads"])
+
+    try:
+        import torch
+        if torch.get_num_threads() != budget["torch_threads"]:
+            torch.set_num_threads(budget["torch_threads"])
+    except ImportError:
+        pass
+
+
+@contextmanager
+def vision_slot():
+    """Hold one of the vision worker slots while running MediaPipe/OpenCV work"""
+    get_thread_budget()
+    with _vision_slots:
+        enforce_thread_budget()
+        yield
+
+
+@contextmanager
+def nlp_slot():
+    """Hold one of the NLP worker slots while running the sentiment model"""
+    get_thread_budget()
+    with _nlp_slots:
+        enforce_thread_budget()
+        yield
@@ -0,0 +1,141 @@
+import os
+import time
+from types import SimpleNamespace
+import torch
+from app.runtime import get_thread_budget
+
+# Inference backend for the sentiment model:
+# - pytorch: fp32 DistilBertForSequenceClassification (default, needed for training)
+# - int8: dynamically quantized nn.Linear layers (weights int8, activations quantized per call)
+# - onnx: exported graph run by ONNX Runtime (optional onnxruntime package;
+#         falls back to pytorch with a warning if it is missing)
+SENTIMENT_BACKENDS = ("pytorch", "int8", "onnx")
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "pytorch")
+
+# Exported ONNX graphs (and the safetensors/tokenized caches) are kept here
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", os.path.join(PROJECT_ROOT, "model_cache"))
+
+ONNX_OPSET = 17
+
+
+def _cache_path(model_name, suffix):
+    name = model_name.replace("/", "--")
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    return os.path.join(MODEL_CACHE_DIR, f"{name}.{suffix}")
+
+
+def quantize_int8(model):
+    """
+    Dynamically quantize the Linear layers of an fp32 model in place. This
+    only converts the weights (activation scales are computed per call), so
+    it takes about a second and nothing is cached.
+    """
+    model.to("cpu").eval()
+    torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+class OnnxSequenceClassifier:
+    """
+    ONNX Runtime session with the call signature predict_batch uses on the
+    PyTorch model: model(input_ids=..., attention_mask=...).logits
+    """
+    def __init__(self, path):
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = get_thread_budget()["torch_threads"]
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.device = torch.device("cpu")
+        self.path = path
+
+    def __call__(self, input_ids, attention_mask):
+        logits = self.session.run(["logits"], {
+            "input_ids": input_ids.numpy().astype("int64"),
+            "attention_mask": attention_mask.numpy().astype("int64")
+        })[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+
+def export_onnx(model, model_name):
+    """Export an fp32 model to ONNX once (dynamic batch and sequence axes) and return the file path"""
+    path = _cache_path(model_name, "onnx")
+    if os.path.exists(path):
+        return path
+    model.to("cpu").eval()
+    dummy = {
+        "input_ids": torch.ones((1, 8), dtype=torch.long),
+        "attention_mask": torch.ones((1, 8), dtype=torch.long)
+    }
+    axes = {0: "batch", 1: "sequence"}
+    torch.onnx.export(
+        model, (dummy["input_ids"], dummy["attention_mask"]), path + ".tmp",
+        input_names=["input_ids", "attention_mask"], output_names=["logits"],
+        dynamic_axes={"input_ids": axes, "attention_mask": axes, "logits": {0: "batch"}},
+        opset_version=ONNX_OPSET
+    )
+    os.replace(path + ".tmp", path)
+    print(f"Exported sentiment model to {path}")
+    return path
+
+
+def load_backend(backend, model, model_name):
+    """
+    Turn a freshly loaded fp32 model into the inference model of the given
+    backend. Returns (model, backend actually used).
+    """
+    used = "pytorch"
+    if backend not in SENTIMENT_BACKENDS:
+        print(f"[WARNING] Unknown sentiment backend '{backend}'")
+    elif backend == "int8":
+        model, used = quantize_int8(model), "int8"
+    elif backend == "onnx":
+        try:
+            import onnxruntime  # noqa: F401
+            model, used = OnnxSequenceClassifier(export_onnx(model, model_name)), "onnx"
+        except ImportError:
+            print("[WARNING] onnxruntime is not installed (pip install onnxruntime)")
+    if used != backend:
+        print(f"[WARNING] Sentiment backend '{backend}' is not available, falling back to '{used}'")
+    print(f"Sentiment backend: {used}")
+    return model, used
+
+
+def verify_backend(backend, batch_size=32):
+    """
+    Compare a backend against the fp32 model on the answer sheet sentences:
+    label agreement, largest probability difference and time per text.
+    """
+    from app.sentiment_analysis.sentiment_analysis_functions import sentiment_analysis
+
+    reference = sentiment_analysis(backend="pytorch")
+    candidate = sentiment_analysis(backend=backend)
+    texts = [str(sentence) for sentence, _ in reference.sentences_data]
+
+    def timed(model):
+        started = time.perf_counter()
+        results = model.predict_batch(texts, batch_size=batch_size)
+        return results, (time.perf_counter() - started) / len(texts) * 1000
+
+    expected, reference_ms = timed(reference)
+    actual, candidate_ms = timed(candidate)
+    agree = sum(a["label"] == b["label"] for a, b in zip(expected, actual))
+    max_diff = max(
+        abs(a["probabilities"][label] - b["probabilities"][label])
+        for a, b in zip(expected, actual) for label in a["probabilities"]
+    )
+    return {
+        "backend": candidate.backend,
+        "texts": len(texts),
+        "agreement": round(agree / len(texts) * 100, 2),
+        "max_probability_diff": round(max_diff, 4),
+        "fp32_ms_per_text": round(reference_ms, 2),
+        "backend_ms_per_text": round(candidate_ms, 2)
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    for name in sys.argv[1:] or ["int8", "onnx"]:
+        print(verify_backend(name))
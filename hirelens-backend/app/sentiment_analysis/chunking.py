@@ -0,0 +1,51 @@
+import os
+import re
+
+# Transcripts longer than this many tokens are split into windows of at most
+# this size on sentence boundaries instead of being truncated (DistilBERT's
+# hard limit is 512; shorter windows keep attention cost per window small)
+WINDOW_TOKENS = int(os.getenv("SENTIMENT_WINDOW_TOKENS", "256"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text):
+    """Split text after ., ! or ? followed by whitespace; speech transcripts often have few stops"""
+    return [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+
+
+def pack_windows(tokenizer, text, window_tokens=WINDOW_TOKENS):
+    """
+    Split text into windows of whole sentences, each at most window_tokens
+    tokens including the special tokens. A sentence that doesn't fit in a
+    window by itself is cut into window-sized token slices.
+    Returns a list of (segment text, input_ids, content token count).
+    """
+    budget = window_tokens - tokenizer.num_special_tokens_to_add()
+    windows = []
+    current_text, current_ids = [], []
+
+    def flush():
+        if current_ids:
+            windows.append((" ".join(current_text), list(current_ids)))
+            current_text.clear()
+            current_ids.clear()
+
+    for sentence in split_sentences(text):
+        ids = tokenizer(sentence, add_special_tokens=False)["input_ids"]
+        if len(ids) > budget:
+            flush()
+            for start in range(0, len(ids), budget):
+                piece = ids[start:start + budget]
+                windows.append((tokenizer.decode(piece), piece))
+            continue
+        if len(current_ids) + len(ids) > budget:
+            flush()
+        current_text.append(sentence)
+        current_ids.extend(ids)
+    flush()
+
+    return [
+        (segment, tokenizer.build_inputs_with_special_tokens(ids), len(ids))
+        for segment, ids in windows
+    ]
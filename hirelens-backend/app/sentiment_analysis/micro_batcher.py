@@ -0,0 +1,89 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Concurrent predict() calls that arrive within BATCH_WINDOW_MS of the first
+# one are run as a single padded batch of at most MAX_BATCH_SIZE texts
+BATCH_WINDOW_MS = float(os.getenv("SENTIMENT_BATCH_WINDOW_MS", "8"))
+MAX_BATCH_SIZE = int(os.getenv("SENTIMENT_MAX_BATCH_SIZE", "16"))
+
+
+class MicroBatcher:
+    """
+    Collects single-item calls from many request threads into batches.
+
+    Callers submit() an item and wait on the returned Future. Worker threads
+    take the first waiting item, keep collecting until `window` seconds have
+    passed or `max_batch` items are queued, run batch_fn(items) once and hand
+    each caller its own result (or the batch's exception). A lone call waits
+    at most `window` seconds longer than it would unbatched.
+    """
+    def __init__(self, batch_fn, max_batch=MAX_BATCH_SIZE, window=BATCH_WINDOW_MS / 1000.0,
+                 workers=1, name="micro-batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.window = window
+        self.workers = workers
+        self.name = name
+        self.queue = queue.Queue()
+        self.threads = []
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def _start(self):
+        with self.lock:
+            if self.threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def submit(self, item):
+        """Queue one item; the Future resolves to batch_fn's result for it"""
+        if not self.threads:
+            self._start()
+        future = Future()
+        self.queue.put((item, future))
+        return future
+
+    def __call__(self, item):
+        return self.submit(item).result()
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            self.batches += 1
+            self.items += len(batch)
+
+    def report(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0
+        }
@@ -1,19 +1,27 @@
-from transformers import Trainer, TrainingArguments
-from torch.utils.data import Dataset
 import torch
 import accelerate
 import pandas as pd
 import os
 import sys
 import requests
+import threading
 from app.sentiment_analysis.csv_readin_functions import csv_read_in_functions
+from app.sentiment_analysis.micro_batcher import MicroBatcher
+from app.sentiment_analysis.backends import SENTIMENT_BACKEND, load_backend
+from app.sentiment_analysis.chunking import WINDOW_TOKENS, pack_windows
+from app.sentiment_analysis.weight_cache import load_mapped_model
+from app.sentiment_analysis.training import build_sharded_dataset, train_model
+from app.runtime import nlp_slot, get_thread_budget
+
+# Texts per forward pass in predict_batch; each batch is padded only to its own longest text
+BUCKET_BATCH_SIZE = 32
 
 # Add the project root to Python path
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.append(PROJECT_ROOT)
 
 class sentiment_analysis:
-    def __init__(self, model_name="distilbert/distilbert-base-uncased-finetuned-sst-2-english"):
+    def __init__(self, model_name="distilbert/distilbert-base-uncased-finetuned-sst-2-english", backend=None):
         from transformers import DistilBertForSequenceClassification, DistilBertTokenizer
         
         # Initialize CSV reader and get data
@@ -21,103 +29,146 @@ class sentiment_analysis:
         csv_reader = csv_read_in_functions(dataset_path)
         self.sentences_data = csv_reader.grab_sentences_and_sentiment()
         
-        # Initialize tokenizer and model
-        tokenizer = DistilBertTokenizer.from_pretrained(model_name)
-        model = DistilBertForSequenceClassification.from_pretrained(model_name)
+        # Mapping sentiment to numeric values
+        self.label2id = {"positive": 0, "negative": 1}
         
-        self.tokenizer = tokenizer
-        self.model = model
+        # Initialize tokenizer and model (weights memory-mapped from the local
+        # safetensors cache, so worker processes share one copy, see weight_cache.py)
+        self.tokenizer = DistilBertTokenizer.from_pretrained(model_name)
+        self.model = load_mapped_model(
+            DistilBertForSequenceClassification,
+            model_name,
+            num_labels=len(self.label2id)
+        )
         
         # Initialize device and move model to appropriate device
         device = torch.device("mps" if torch.backends.mps.is_available() else "cpu")
         self.model.to(device)
+        self.model.eval()
         
-        # Mapping sentiment to numeric values
-        self.label2id = {"positive": 0, "negative": 1}
-        self.model = DistilBertForSequenceClassification.from_pretrained(
-            model_name,
-            num_labels=len(self.label2id)
-        )
+        # Swap in the int8 or ONNX Runtime model for CPU inference (see backends.py)
+        self.model, self.backend = load_backend(backend or SENTIMENT_BACKEND, self.model, model_name)
+        
+        # predict() calls are micro-batched; the batcher starts on first use
+        self._batcher = None
+        self._batcher_lock = threading.Lock()
         
     def prepare_dataset(self, max_length=128):
         """
         convert the sentences_data into a format suitable for training
-        we're using a custom pytorch format here
+        the sentences are tokenized once into cached memory-mapped shards
+        (see training.py) and padded per batch at training time
         """
-        class sentiment_dataset(Dataset):
-            def __init__(self, data, tokenizer, max_length):
-                self.data = data
-                self.tokenizer = tokenizer
-                self.max_length = max_length   # ensures max length of sentiment doesn't exceed this
-            
-            def __len__(self):
-                return len(self.data)
-            
-            def __getitem__(self, idx):
-                sentence, sentiment = self.data[idx]
-                # vonvert sentiment to label; 
-                # assuming self.label2id is available in the outer scope
-                
-                if sentiment.lower() == "positive":
-                    label = 0 
-                else:
-                    label = 1  
-                
-                encoding = self.tokenizer(
-                    sentence,
-                    truncation=True,
-                    padding="max_length",
-                    max_length=max_length,
-                    return_tensors="pt"
-                )
-                # got from hugging face documentation
-                encoding = {key: value.squeeze(0) for key, value in encoding.items()}
-                encoding["labels"] = torch.tensor(label)
-                return encoding
-        
-        return sentiment_dataset(self.sentences_data, self.tokenizer, max_length)
+        return build_sharded_dataset(self.sentences_data, self.tokenizer, self.label2id, max_length)
     
     # training, evaluation, and prediction methods here.
     def train(self, dataset, output_dir="./results", num_train_epochs=3, per_device_train_batch_size=16):
-        training_args = TrainingArguments(
+        """Fine-tune on a prepare_dataset() dataset; returns the metrics, including samples per second"""
+        if self.backend != "pytorch":
+            raise ValueError(f"Cannot train the '{self.backend}' sentiment backend, use backend='pytorch'")
+        # Mapped weights are loaded frozen; updates go to private copy-on-write pages, never the cache file
+        self.model.requires_grad_(True)
+        return train_model(
+            self.model,
+            self.tokenizer,
+            dataset,
             output_dir=output_dir,
             num_train_epochs=num_train_epochs,
-            per_device_train_batch_size=per_device_train_batch_size,
-            logging_steps=10,
-            save_steps=500,
-            evaluation_strategy="no",
-            # Note: don't use evaluation_strategy will be deprecated in version 4.46 transformers 
-            # use eval_strategy 
-            no_cuda=True 
-            # this applies for macbook use only, if you're on windows or a linux system, comment no_cuda out 
-            # this avoids the "RuntimeError: Placeholder storage has not been allocated on MPS device!" error
-        )
-        trainer = Trainer(
-            model=self.model,
-            args=training_args,
-            train_dataset=dataset,
+            per_device_train_batch_size=per_device_train_batch_size
         )
-        trainer.train()
 
-    def predict(self, text):
+    def predict_batch(self, texts, batch_size=BUCKET_BATCH_SIZE):
         """
-        Predict the sentiment of a given text
-        Returns 'positive' or 'negative'
+        Predict the sentiment of many texts at once.
+        Texts are tokenized once without padding, sorted by token length and
+        run in buckets of batch_size similar-length texts, each padded only to
+        its own longest text, so short answers don't pay for long ones.
+        Texts longer than WINDOW_TOKENS are split into sentence windows (see
+        chunking.py) that run in the same pass; their logits are averaged,
+        weighted by window length, so the whole answer is scored.
+        Returns one {"label", "probabilities": {"positive", "negative"}} dict
+        per text, in input order, plus "segments" (one result per window) for
+        texts that were split.
         """
-        # Tokenize the input text
-        inputs = self.tokenizer(text, return_tensors="pt", truncation=True, padding=True)
+        texts = list(texts)
+        if not texts:
+            return []
         
-        # Move inputs to the same device as the model
-        inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
+        # Tokenize everything once; long texts become several windows, padding happens per bucket
+        limit = min(WINDOW_TOKENS, self.tokenizer.model_max_length)
+        windows = []  # (text index, segment text or None, input ids, weight)
+        for i, ids in enumerate(self.tokenizer(texts, verbose=False)["input_ids"]):
+            if len(ids) <= limit:
+                windows.append((i, None, ids, len(ids)))
+            else:
+                windows.extend((i, segment, window_ids, weight)
+                               for segment, window_ids, weight in pack_windows(self.tokenizer, texts[i], limit))
+        order = sorted(range(len(windows)), key=lambda w: len(windows[w][2]))
+        id2label = {index: label for label, index in self.label2id.items()}
         
-        # Get model predictions
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            predictions = torch.argmax(outputs.logits, dim=-1)
+        logits = [None] * len(windows)
+        for start in range(0, len(order), batch_size):
+            bucket = order[start:start + batch_size]
+            inputs = self.tokenizer.pad({"input_ids": [windows[w][2] for w in bucket]}, return_tensors="pt")
+            inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
             
-        # Convert prediction to sentiment label
-        sentiment = "positive" if predictions.item() == 0 else "negative"
-        return sentiment
+            # Get model predictions within the NLP thread budget
+            with nlp_slot(), torch.inference_mode():
+                rows = self.model(**inputs).logits.float().cpu()
+            for w, row in zip(bucket, rows):
+                logits[w] = row
+        
+        def result(row):
+            probabilities = torch.softmax(row, dim=-1).tolist()
+            return {
+                "label": id2label[int(row.argmax())],
+                "probabilities": {id2label[j]: round(p, 4) for j, p in enumerate(probabilities)}
+            }
+        
+        by_text = [[] for _ in texts]
+        for w, (i, segment, ids, weight) in enumerate(windows):
+            by_text[i].append((segment, weight, logits[w]))
+        
+        results = []
+        for parts in by_text:
+            if len(parts) == 1:
+                results.append(result(parts[0][2]))
+                continue
+            weights = torch.tensor([weight for _, weight, _ in parts], dtype=torch.float32)
+            combined = (torch.stack([row for _, _, row in parts]) * weights[:, None]).sum(0) / weights.sum()
+            entry = result(combined)
+            entry["segments"] = [dict(result(row), text=segment, tokens=weight) for segment, weight, row in parts]
+            results.append(entry)
+        return results
+
+    def predict_detailed(self, text):
+        """Label, probabilities and, for long texts, the per-window breakdown of one text"""
+        return self.predict_batch([text])[0]
+
+    def _predict_labels(self, texts):
+        """Labels for one micro-batch of texts"""
+        return [result["label"] for result in self.predict_batch(texts)]
+
+    def _get_batcher(self):
+        if self._batcher is None:
+            with self._batcher_lock:
+                if self._batcher is None:
+                    self._batcher = MicroBatcher(
+                        self._predict_labels,
+                        workers=get_thread_budget()["nlp_workers"],
+                        name="sentiment-batcher"
+                    )
+        return self._batcher
+
+    def predict(self, text):
+        """
+        Predict the sentiment of a given text
+        Returns 'positive' or 'negative'
+        Concurrent calls from different requests are run together as one
+        batch (see micro_batcher.py), which costs far less CPU than running
+        them one at a time.
+        """
+        return self._get_batcher().submit(text).result()
 
     def reformulate_positive(self, text):
         """
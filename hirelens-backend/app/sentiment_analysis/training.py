@@ -0,0 +1,161 @@
+import bisect
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+from torch.utils.data import Dataset
+from app.sentiment_analysis.backends import MODEL_CACHE_DIR
+
+# Examples per pre-tokenized shard; a shard is three .npy files (token ids,
+# offsets, labels) that are memory-mapped when training reads them
+SHARD_SIZE = 4096
+TOKENIZED_CACHE_DIR = os.path.join(MODEL_CACHE_DIR, "tokenized")
+
+
+def load_corpus(csv_path):
+    """
+    (text, sentiment) pairs from a CSV: either the answer sheet layout
+    (SAMPLE_POSITIVE_ANSWERS, ...) or plain "text" and "sentiment" columns,
+    e.g. a dump of our own labelled transcripts.
+    """
+    import pandas as pd
+    from app.sentiment_analysis.csv_readin_functions import csv_read_in_functions
+
+    columns = pd.read_csv(csv_path, nrows=0).columns
+    if "SAMPLE_POSITIVE_ANSWERS" in columns:
+        return csv_read_in_functions(csv_path).grab_sentences_and_sentiment()
+    df = pd.read_csv(csv_path, usecols=["text", "sentiment"]).dropna()
+    return list(zip(df["text"].astype(str), df["sentiment"].astype(str)))
+
+
+def _corpus_key(data, tokenizer, max_length):
+    digest = hashlib.sha1(f"{tokenizer.name_or_path}|{max_length}".encode())
+    for sentence, sentiment in data:
+        digest.update(f"{sentence}\t{sentiment}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def _write_shards(data, tokenizer, label2id, max_length, path):
+    tmp = f"{path}.tmp-{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    shards = []
+    for number, start in enumerate(range(0, len(data), SHARD_SIZE)):
+        chunk = data[start:start + SHARD_SIZE]
+        encoded = tokenizer([str(sentence) for sentence, _ in chunk], truncation=True, max_length=max_length)
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+        prefix = os.path.join(tmp, f"shard-{number:05d}")
+        np.save(f"{prefix}-ids.npy", np.fromiter(
+            (token for ids in encoded["input_ids"] for token in ids), dtype=np.int32, count=sum(lengths)))
+        np.save(f"{prefix}-offsets.npy", np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64))
+        np.save(f"{prefix}-labels.npy", np.array(
+            [label2id.get(str(sentiment).strip().lower(), label2id["negative"]) for _, sentiment in chunk],
+            dtype=np.int64))
+        shards.append({"prefix": os.path.basename(prefix), "examples": len(chunk)})
+    with open(os.path.join(tmp, "manifest.json"), "w") as f:
+        json.dump({"max_length": max_length, "examples": len(data), "shards": shards}, f)
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        # Another process tokenized the same corpus first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+class ShardedDataset(Dataset):
+    """
+    Pre-tokenized examples read from memory-mapped shards. Items are unpadded
+    ({"input_ids": [...], "labels": int}); pad them per batch with
+    DataCollatorWithPadding.
+    """
+    def __init__(self, path):
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+        self.path = path
+        self.shards = []
+        self.starts = []
+        total = 0
+        for shard in manifest["shards"]:
+            prefix = os.path.join(path, shard["prefix"])
+            self.shards.append((
+                np.load(f"{prefix}-ids.npy", mmap_mode="r"),
+                np.load(f"{prefix}-offsets.npy", mmap_mode="r"),
+                np.load(f"{prefix}-labels.npy", mmap_mode="r")
+            ))
+            self.starts.append(total)
+            total += shard["examples"]
+        self.total = total
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, idx):
+        number = bisect.bisect_right(self.starts, idx) - 1
+        ids, offsets, labels = self.shards[number]
+        local = idx - self.starts[number]
+        return {
+            "input_ids": ids[offsets[local]:offsets[local + 1]].tolist(),
+            "labels": int(labels[local])
+        }
+
+
+def build_sharded_dataset(data, tokenizer, label2id, max_length=128):
+    """
+    Tokenize (text, sentiment) pairs once into cached shards and return them
+    as a ShardedDataset. The cache is keyed on the corpus, tokenizer and
+    max_length, so re-running training on the same data skips tokenization.
+    """
+    data = list(data)
+    path = os.path.join(TOKENIZED_CACHE_DIR, _corpus_key(data, tokenizer, max_length))
+    if not os.path.exists(os.path.join(path, "manifest.json")):
+        os.makedirs(TOKENIZED_CACHE_DIR, exist_ok=True)
+        started = time.perf_counter()
+        _write_shards(data, tokenizer, label2id, max_length, path)
+        seconds = time.perf_counter() - started
+        print(f"Tokenized {len(data)} examples in {seconds:.1f}s ({len(data) / max(seconds, 1e-9):.0f} samples/s)")
+    return ShardedDataset(path)
+
+
+def train_model(model, tokenizer, dataset, output_dir="./results", num_train_epochs=3,
+                per_device_train_batch_size=16, **training_args):
+    """
+    Fine-tune a sequence classifier on a ShardedDataset. Batches are padded
+    only to their longest example (DataCollatorWithPadding) and examples of
+    similar length are grouped into the same batch (group_by_length), so CPU
+    time isn't spent on padding. Returns the trainer metrics, including
+    train_samples_per_second.
+    """
+    from transformers import DataCollatorWithPadding, Trainer, TrainingArguments
+
+    args = TrainingArguments(
+        output_dir=output_dir,
+        num_train_epochs=num_train_epochs,
+        per_device_train_batch_size=per_device_train_batch_size,
+        group_by_length=True,
+        logging_steps=10,
+        save_steps=500,
+        no_cuda=True,  # avoids the MPS "Placeholder storage has not been allocated" error on macbooks
+        **training_args
+    )
+    trainer = Trainer(
+        model=model,
+        args=args,
+        train_dataset=dataset,
+        data_collator=DataCollatorWithPadding(tokenizer, pad_to_multiple_of=8)
+    )
+    metrics = trainer.train().metrics
+    print(f"Trained on {len(dataset)} examples x {num_train_epochs} epochs: "
+          f"{metrics.get('train_samples_per_second', 0):.1f} samples/s")
+    return metrics
+
+
+if __name__ == "__main__":
+    import sys
+    from app.sentiment_analysis.sentiment_analysis_functions import sentiment_analysis
+
+    # python -m app.sentiment_analysis.training [corpus.csv] [output_dir]
+    lsa = sentiment_analysis(backend="pytorch")
+    if len(sys.argv) > 1:
+        lsa.sentences_data = load_corpus(sys.argv[1])
+    output = sys.argv[2] if len(sys.argv) > 2 else "./results"
+    print(lsa.train(lsa.prepare_dataset(), output_dir=output))
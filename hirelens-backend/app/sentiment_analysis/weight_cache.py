@@ -0,0 +1,58 @@
+import os
+import shutil
+from app.sentiment_analysis.backends import MODEL_CACHE_DIR
+
+
+def _cache_dir(model_name):
+    return os.path.join(MODEL_CACHE_DIR, model_name.replace("/", "--") + "-safetensors")
+
+
+def _write_cache(model_class, model_name, num_labels, path):
+    """Save config.json and model.safetensors for the model; the first worker to finish wins"""
+    model = model_class.from_pretrained(model_name, num_labels=num_labels)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    model.save_pretrained(tmp, safe_serialization=True)
+    try:
+        os.replace(tmp, path)
+        print(f"Cached sentiment weights at {path}")
+    except OSError:
+        # Another worker wrote the cache first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def load_mapped_model(model_class, model_name, num_labels):
+    """
+    Load a transformers model whose weights are memory-mapped read-only from
+    a local safetensors cache instead of being copied into process memory.
+    The page cache holds one copy of the weights per node, shared by every
+    worker process, and loading after the first time is near-instant.
+
+    The first load downloads the model with from_pretrained, writes the cache
+    and then maps it like every later load. If mapping fails (old torch or
+    safetensors), the model is loaded the usual way.
+    """
+    path = _cache_dir(model_name)
+    if not os.path.exists(os.path.join(path, "model.safetensors")):
+        os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+        _write_cache(model_class, model_name, num_labels, path)
+
+    try:
+        from accelerate import init_empty_weights
+        from safetensors import safe_open
+
+        # Parameters start on the meta device (no memory) and are then
+        # replaced by the mapped tensors themselves (assign=True, no copy)
+        config = model_class.config_class.from_pretrained(path)
+        with init_empty_weights(include_buffers=False):
+            model = model_class(config)
+        with safe_open(os.path.join(path, "model.safetensors"), framework="pt", device="cpu") as weights:
+            state = {key: weights.get_tensor(key) for key in weights.keys()}
+        model.load_state_dict(state, strict=False, assign=True)
+        missing = [name for name, param in model.named_parameters() if param.is_meta]
+        if missing:
+            raise ValueError(f"cache is missing {len(missing)} tensors, e.g. {missing[0]}")
+        model.requires_grad_(False)
+        return model
+    except (ImportError, TypeError, ValueError, OSError) as e:
+        print(f"[WARNING] Could not memory-map sentiment weights ({str(e)}), loading a private copy")
+        return model_class.from_pretrained(path)
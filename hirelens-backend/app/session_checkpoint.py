@@ -0,0 +1,281 @@
+import os
+import copy
+import glob
+import hashlib
+import pickle
+import struct
+import threading
+import time
+from contextlib import nullcontext
+import cv2
+import numpy as np
+from app.facial_recognition.frame_context import FrameContext
+from app.facial_recognition.landmarks import FACE_LANDMARKS, POSE_LANDMARKS, STORAGE_DTYPE
+
+# Session state that survives a restart. The per-frame lists grow with the
+# interview, so they go to append-only spools together with the frames and
+# landmarks they describe; only the remaining metadata is pickled whole.
+STATE_FIELDS = (
+    "session_id", "user_id", "running", "state", "start_time", "last_update", "email", "name",
+    "current_question", "questions_asked", "answers", "transcript", "audio_requested",
+    "frame_times", "frame_questions", "recording_scores",
+    "client_landmarks", "landmark_questions", "frame_records"
+)
+SPOOLED_FIELDS = ("frame_times", "frame_questions", "landmark_questions", "frame_records")
+METADATA_FIELDS = tuple(name for name in STATE_FIELDS if name not in SPOOLED_FIELDS)
+
+FRAME_RECORD = struct.Struct("<dII")  # Time, pickled question size and encoded frame size
+LANDMARK_RECORD = struct.Struct("<dfI")  # Time, live gaze decision and pickled question size
+LANDMARK_BODY_SIZE = (FACE_LANDMARKS * 3 + POSE_LANDMARKS * 4) * np.dtype(STORAGE_DTYPE).itemsize
+ANALYSIS_RECORD = struct.Struct("<I")  # Size of each pickled FrameRecord
+
+SPOOLS = ("frames", "landmarks", "records")
+
+
+def _pickle(value):
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class SessionCheckpointer:
+    """
+    Periodic snapshots of in-progress interview sessions to local disk.
+
+    Each session has four files named after a hash of its ID:
+      <id>.state     - pickled metadata (questions, answers, transcript),
+                       rewritten atomically; it doesn't grow with the frames
+      <id>.frames    - time, question and JPEG per frame, append-only
+      <id>.landmarks - time, gaze, question and float16 face/pose per frame, append-only
+      <id>.records   - pickled FrameRecord per analyzed frame, append-only
+    Only entries added since the previous snapshot are written, and the
+    state file records the valid length of every spool so a torn append is
+    ignored on restore. The metadata and spool lengths are read under the
+    session's lock (see start), so they describe one consistent moment.
+    """
+    def __init__(self, directory, interval=5.0):
+        self.directory = directory
+        self.interval = interval
+        self.spools = {}  # session_id -> spool name -> bookkeeping
+        self.signatures = {}  # session_id -> state at the last snapshot
+        self.discarded = set()  # Sessions discarded since the current snapshot_all pass began
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stop_event = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id, suffix):
+        name = hashlib.sha1(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.{suffix}")
+
+    @staticmethod
+    def _signature(session):
+        """Cheap fingerprint used to skip sessions that haven't changed"""
+        return (session.last_update, len(session.frames), len(session.landmarks),
+                session.current_question, len(session.recording_scores or ()),
+                len(session.transcript or ""), session.running, len(session.frame_records))
+
+    @staticmethod
+    def _encode_frame(frame):
+        data = frame.encoded if isinstance(frame, FrameContext) else None
+        if data is None:
+            image = frame.bgr if isinstance(frame, FrameContext) else frame
+            data = cv2.imencode(".jpg", image)[1].tobytes()
+        return data
+
+    def _append(self, session_id, spool, name, source, count, encode):
+        """
+        Append entries of a per-frame list up to count to its spool file;
+        encode(i) returns the bytes of entry i. The spool starts over when the
+        list was replaced or shrank.
+        """
+        entry = spool.get(name)
+        if entry is None or entry["source"] is not source or entry["count"] > count:
+            entry = spool[name] = {"source": source, "count": 0, "size": 0}
+            open(self._path(session_id, name), "wb").close()
+        if count == entry["count"]:
+            return
+        with open(self._path(session_id, name), "ab") as f:
+            f.truncate(entry["size"])
+            for i in range(entry["count"], count):
+                f.write(encode(i))
+            entry["size"] = f.tell()
+        entry["count"] = count
+
+    def snapshot(self, session, lock=None):
+        """
+        Write one session's incremental snapshot; returns False if nothing
+        changed. lock is the session's lock in the store, if it has one.
+        """
+        with self.lock:
+            # A pass may still hold a session that finished meanwhile; writing
+            # it would bring the session back on the next restart
+            if session.session_id in self.discarded:
+                return False
+
+            # Take the metadata and the list lengths in one go; the lists are
+            # append-only, so entries below the lengths can be read afterwards
+            with lock if lock is not None else nullcontext():
+                signature = self._signature(session)
+                if self.signatures.get(session.session_id) == signature:
+                    return False
+                state = copy.deepcopy({name: getattr(session, name, None) for name in METADATA_FIELDS})
+                frames, times, questions = session.frames, session.frame_times, session.frame_questions
+                frame_count = min(len(frames), len(times), len(questions))
+                landmarks, landmark_questions = session.landmarks, session.landmark_questions
+                landmark_times, faces, poses, gaze = landmarks.times, landmarks.faces, landmarks.poses, landmarks.gaze
+                landmark_count = min(len(landmark_times), len(faces), len(poses), len(gaze),
+                                     len(landmark_questions))
+                records = session.frame_records
+                record_count = len(records)
+
+            def frame_entry(i):
+                question = _pickle(questions[i])
+                data = self._encode_frame(frames[i])
+                return FRAME_RECORD.pack(times[i], len(question), len(data)) + question + data
+
+            def landmark_entry(i):
+                question = _pickle(landmark_questions[i])
+                return (LANDMARK_RECORD.pack(landmark_times[i], gaze[i], len(question)) + question
+                        + np.ascontiguousarray(faces[i], dtype=STORAGE_DTYPE).tobytes()
+                        + np.ascontiguousarray(poses[i], dtype=STORAGE_DTYPE).tobytes())
+
+            def record_entry(i):
+                data = _pickle(records[i])
+                return ANALYSIS_RECORD.pack(len(data)) + data
+
+            session_id = session.session_id
+            spool = self.spools.setdefault(session_id, {})
+            self._append(session_id, spool, "frames", frames, frame_count, frame_entry)
+            self._append(session_id, spool, "landmarks", landmark_times, landmark_count, landmark_entry)
+            self._append(session_id, spool, "records", records, record_count, record_entry)
+            state["spooled"] = {name: spool[name]["size"] for name in SPOOLS}
+
+            path = self._path(session_id, "state")
+            with open(path + ".tmp", "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + ".tmp", path)
+            self.signatures[session_id] = signature
+        return True
+
+    def snapshot_all(self, sessions):
+        """Snapshot every changed running session in a dict of session_id -> session"""
+        # Sessions are removed from the store before they are discarded, so
+        # anything discarded earlier can't be in the list taken below
+        with self.lock:
+            self.discarded.clear()
+        lock_for = getattr(sessions, "lock_for", None)
+        written = 0
+        for session in list(sessions.values()):
+            if not session.running:
+                continue  # Starting, being stopped or finished
+            try:
+                lock = lock_for(session.session_id) if lock_for else None
+                written += self.snapshot(session, lock)
+            except Exception as e:
+                print(f"Error checkpointing session {session.session_id}: {str(e)}")
+        return written
+
+    def discard(self, session_id):
+        """Forget a finished session and delete its files"""
+        with self.lock:
+            self.discarded.add(session_id)
+            self.spools.pop(session_id, None)
+            self.signatures.pop(session_id, None)
+            for suffix in ("state",) + SPOOLS:
+                path = self._path(session_id, suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    @staticmethod
+    def _read(path, size):
+        if size == 0 or not os.path.exists(path):
+            return b""
+        with open(path, "rb") as f:
+            return f.read(size)
+
+    @staticmethod
+    def _read_frames(data, session):
+        offset = 0
+        while offset + FRAME_RECORD.size <= len(data):
+            t, question_size, frame_size = FRAME_RECORD.unpack_from(data, offset)
+            offset += FRAME_RECORD.size
+            question = pickle.loads(data[offset:offset + question_size])
+            offset += question_size
+            frame = FrameContext.from_bytes(data[offset:offset + frame_size], t)
+            offset += frame_size
+            if frame is not None:
+                session.frames.append(frame)
+                session.frame_times.append(t)
+                session.frame_questions.append(question)
+
+    @staticmethod
+    def _read_landmarks(data, session):
+        face_size = FACE_LANDMARKS * 3
+        offset = 0
+        while offset + LANDMARK_RECORD.size <= len(data):
+            t, gaze, question_size = LANDMARK_RECORD.unpack_from(data, offset)
+            offset += LANDMARK_RECORD.size
+            question = pickle.loads(data[offset:offset + question_size])
+            offset += question_size
+            values = np.frombuffer(data, dtype=STORAGE_DTYPE, offset=offset,
+                                   count=LANDMARK_BODY_SIZE // np.dtype(STORAGE_DTYPE).itemsize)
+            offset += LANDMARK_BODY_SIZE
+            session.landmarks.append_arrays(t, values[:face_size].reshape(FACE_LANDMARKS, 3),
+                                            values[face_size:].reshape(POSE_LANDMARKS, 4), gaze)
+            session.landmark_questions.append(question)
+
+    @staticmethod
+    def _read_records(data, session):
+        offset = 0
+        while offset + ANALYSIS_RECORD.size <= len(data):
+            (size,) = ANALYSIS_RECORD.unpack_from(data, offset)
+            offset += ANALYSIS_RECORD.size
+            session.frame_records.append(pickle.loads(data[offset:offset + size]))
+            offset += size
+
+    def restore(self, factory):
+        """
+        Rebuild every checkpointed session. factory(session_id) must return a
+        fresh session object; the saved state and spooled entries are loaded
+        into it. Returns a dict of session_id -> session.
+        """
+        sessions = {}
+        for path in glob.glob(os.path.join(self.directory, "*.state")):
+            try:
+                with open(path, "rb") as f:
+                    state = pickle.load(f)
+                session = factory(state["session_id"])
+                for name in METADATA_FIELDS:
+                    if name in state:
+                        setattr(session, name, state[name])
+
+                # Read each spool only up to the size the state vouches for
+                base = path[:-len(".state")]
+                spooled = state["spooled"]
+                self._read_frames(self._read(base + ".frames", spooled["frames"]), session)
+                self._read_landmarks(self._read(base + ".landmarks", spooled["landmarks"]), session)
+                self._read_records(self._read(base + ".records", spooled["records"]), session)
+                session.last_update = time.time()
+                sessions[session.session_id] = session
+                print(f"Restored session {session.session_id} with {len(session.frames)} frames")
+            except Exception as e:
+                print(f"Error restoring session checkpoint {path}: {str(e)}")
+        return sessions
+
+    def start(self, sessions):
+        """
+        Snapshot the sessions dict every `interval` seconds on a daemon
+        thread, holding sessions.lock_for(session_id) while a session is read
+        if the store has per-session locks.
+        """
+        if self.thread is not None:
+            return
+
+        def run():
+            while not self.stop_event.wait(self.interval):
+                self.snapshot_all(sessions)
+
+        self.thread = threading.Thread(target=run, name="session-checkpoint", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
@@ -0,0 +1,64 @@
+import threading
+import time
+from app.facial_recognition.frame_context import FrameContext
+
+
+def frame_bytes(frames):
+    """Memory held by a list of FrameContexts (or raw arrays)"""
+    total = 0
+    for frame in frames:
+        if isinstance(frame, FrameContext):
+            total += frame.nbytes
+        else:
+            total += getattr(frame, "nbytes", 0)
+    return total
+
+
+def session_memory(session):
+    """Approximate bytes held by one interview session, by kind (models are shared, see model_registry)"""
+    usage = {
+        "frames": frame_bytes(session.frames),
+        "landmarks": session.landmarks.nbytes
+    }
+    usage["total"] = sum(usage.values())
+    return usage
+
+
+class SessionReaper:
+    """
+    Daemon thread that calls reap(ttl) every `interval` seconds to evict
+    sessions idle for longer than `ttl` seconds (browser closed, network lost).
+    """
+    def __init__(self, ttl=300.0, interval=60.0):
+        self.ttl = ttl
+        self.interval = interval
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.last_run = None
+        self.reaped = 0  # Sessions evicted since startup
+
+    def start(self, reap):
+        if self.thread is not None:
+            return
+
+        def run():
+            while not self.stop_event.wait(self.interval):
+                try:
+                    self.reaped += len(reap(self.ttl))
+                except Exception as e:
+                    print(f"Error reaping inactive sessions: {str(e)}")
+                self.last_run = time.time()
+
+        self.thread = threading.Thread(target=run, name="session-reaper", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def report(self):
+        return {
+            "ttl_seconds": self.ttl,
+            "interval_seconds": self.interval,
+            "last_run": self.last_run,
+            "sessions_reaped": self.reaped
+        }
@@ -0,0 +1,559 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import cv2
+import numpy as np
+from app.facial_recognition.frame_context import FrameContext
+from app.facial_recognition.landmarks import POSE_LANDMARKS, STORAGE_DTYPE
+from app.session_checkpoint import STATE_FIELDS, SPOOLED_FIELDS
+
+# Session lifecycle. Frames are accepted only while a session is running, and
+# stopping moves it to finalizing exactly once before it is done.
+STARTING, RUNNING, FINALIZING, DONE = "starting", "running", "finalizing", "done"
+
+LOCK_STRIPES = 64  # Per-process locks shared out among session IDs
+
+# Per-frame lists (SPOOLED_FIELDS) are rebuilt from the spool tables, not
+# stored in the state blob, and the lifecycle state has its own column so it
+# can change atomically
+SHARED_FIELDS = tuple(name for name in STATE_FIELDS if name not in SPOOLED_FIELDS + ("state",))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    lifecycle TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    updated REAL NOT NULL,
+    state BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS frames (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    t REAL NOT NULL,
+    question TEXT,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS frames_session ON frames (session_id, id);
+CREATE TABLE IF NOT EXISTS landmarks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    t REAL NOT NULL,
+    question TEXT,
+    gaze REAL,
+    face BLOB NOT NULL,
+    pose BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS landmarks_session ON landmarks (session_id, id);
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    frame_t REAL,
+    record BLOB NOT NULL,
+    UNIQUE (session_id, frame_t)
+);
+CREATE INDEX IF NOT EXISTS analyses_session ON analyses (session_id, id);
+"""
+
+
+class SessionLocks:
+    """
+    Lock striping for session stores: each session ID maps to one of
+    LOCK_STRIPES re-entrant locks, so requests for different sessions rarely
+    contend and no global lock is held while frames are appended.
+    """
+    def _init_locks(self):
+        self.stripes = [threading.RLock() for _ in range(LOCK_STRIPES)]
+
+    def lock_for(self, session_id):
+        return self.stripes[hash(session_id) % len(self.stripes)]
+
+
+class InProcessSessionStore(SessionLocks, dict):
+    """
+    Default store: live session objects in this process's memory. Every
+    request must reach the process that started the session, so this only
+    works with a single server process.
+    """
+    shared = False
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self._init_locks()
+
+    def add(self, session_id, session):
+        """Register a new session; returns False if the ID is already taken"""
+        with self.lock_for(session_id):
+            if session_id in self:
+                return False
+            self[session_id] = session
+            return True
+
+    def transition(self, session, expected, state):
+        """Move a session to state if it is in one of the expected states; returns success"""
+        with self.lock_for(session.session_id):
+            if session.state not in expected:
+                return False
+            session.state = state
+            session.running = state == RUNNING
+            return True
+
+    def save(self, session):
+        """Publish metadata changes (nothing to do, the object is the store)"""
+
+    def append_frame(self, session, frame):
+        """Add a frame; returns False if the session is no longer running"""
+        with self.lock_for(session.session_id):
+            if session.state != RUNNING:
+                return False
+            session.add_frame(frame)
+            return True
+
+    def append_landmarks(self, session, packets):
+        """Add parsed landmark packets; returns False if the session is no longer running"""
+        with self.lock_for(session.session_id):
+            if session.state != RUNNING:
+                return False
+            for timestamp, face, pose in packets:
+                session.landmarks.append_arrays(timestamp, face, pose)
+                session.landmark_questions.append(session.current_question)
+            session.client_landmarks = True
+            session.last_update = time.time()
+            return True
+
+    def record_analysis(self, session, record, face=None, pose=None):
+        """Add one analyzed frame (results.FrameRecord) and, if usable, its landmarks"""
+        with self.lock_for(session.session_id):
+            session.add_analysis(record, face, pose)
+            return True
+
+    def frame_count(self, session):
+        return len(session.frames)
+
+    def landmark_count(self, session):
+        return len(session.landmarks)
+
+    def sync(self, session):
+        """Pull frames and landmarks added by other processes (none here)"""
+        return session
+
+    def snapshot_frames(self, session):
+        """Immutable (time, frame, question) tuples of every frame recorded so far"""
+        with self.lock_for(session.session_id):
+            return tuple(zip(session.frame_times, session.frames, session.frame_questions))
+
+
+class SQLiteSessionStore(SessionLocks):
+    """
+    Session store shared by every server process on the host, backed by one
+    SQLite database in WAL mode.
+
+    Session metadata (SHARED_FIELDS) is one pickled row per session with a
+    version counter. Everything per frame goes to append-only tables: frames
+    (JPEG bytes), landmarks (client and server) and analyses (one
+    FrameRecord per analyzed frame, from which the scores are derived), so
+    a frame costs one insert however long the interview is. Each process
+    keeps its own session objects (they hold the analyzers, which are
+    expensive to build) and reloads the metadata only when the stored
+    version has moved on; spooled rows are pulled into the local object by
+    sync() before processing.
+
+    Metadata writes are last-writer-wins per session. Per-frame rows are
+    never lost because they are inserted, not rewritten; a recorded frame
+    scored by two processes keeps only the first analysis. Lifecycle
+    transitions are compare-and-set updates, so they are atomic across
+    processes too.
+    """
+    shared = True
+
+    def __init__(self, path, factory):
+        self.path = path
+        self.factory = factory  # factory(session_id) -> new session object
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.cache = {}  # session_id -> (version, session)
+        self.cursors = {}  # session_id -> last frame, landmark and analysis row ids
+        self._init_locks()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(landmarks)")}
+        if "gaze" not in columns:
+            try:
+                connection.execute("ALTER TABLE landmarks ADD COLUMN gaze REAL")
+            except sqlite3.OperationalError:
+                pass  # Added by another process meanwhile
+
+    def _connection(self):
+        """One connection per thread; sqlite3 connections can't be shared across threads"""
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+        return connection
+
+    @staticmethod
+    def _state(session):
+        return pickle.dumps({name: getattr(session, name, None) for name in SHARED_FIELDS},
+                            protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _forget(self, session_id):
+        with self.lock:
+            self.cache.pop(session_id, None)
+            self.cursors.pop(session_id, None)
+
+    def get(self, session_id, default=None):
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT version, updated, lifecycle FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            self._forget(session_id)
+            return default
+        version, updated, lifecycle = row
+
+        with self.lock:
+            cached = self.cache.get(session_id)
+        if cached is not None and cached[0] == version:
+            session = cached[1]
+        else:
+            state_row = connection.execute(
+                "SELECT version, state FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if state_row is None:
+                self._forget(session_id)
+                return default
+            version, blob = state_row
+            if cached is not None:
+                session = cached[1]
+            else:
+                session = self.factory(session_id)
+                with self.lock:
+                    self.cursors[session_id] = [0, 0, 0]
+            for name, value in pickle.loads(blob).items():
+                setattr(session, name, value)
+            with self.lock:
+                self.cache[session_id] = (version, session)
+
+        session.last_update = max(session.last_update, updated)
+        session.state = lifecycle
+        return session
+
+    def __getitem__(self, session_id):
+        session = self.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session
+
+    def __contains__(self, session_id):
+        row = self._connection().execute(
+            "SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row is not None
+
+    def _insert(self, session_id, session, replace):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            exists = connection.execute(
+                "SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone() is not None
+            if exists and not replace:
+                connection.execute("ROLLBACK")
+                return False
+            connection.execute("DELETE FROM frames WHERE session_id = ?", (session_id,))
+            connection.execute("DELETE FROM landmarks WHERE session_id = ?", (session_id,))
+            connection.execute("DELETE FROM analyses WHERE session_id = ?", (session_id,))
+            connection.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, lifecycle, version, updated, state) "
+                "VALUES (?, ?, 1, ?, ?)",
+                (session_id, session.state, session.last_update, self._state(session))
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        with self.lock:
+            self.cache[session_id] = (1, session)
+            self.cursors[session_id] = [0, 0, 0]
+        return True
+
+    def add(self, session_id, session):
+        """Register a new session; returns False if the ID is already taken"""
+        return self._insert(session_id, session, replace=False)
+
+    def __setitem__(self, session_id, session):
+        """Register a session, replacing any previous one with the same ID"""
+        self._insert(session_id, session, replace=True)
+
+    def transition(self, session, expected, state):
+        """Move a session to state if it is in one of the expected states; returns success"""
+        expected = tuple(expected)
+        with self.lock_for(session.session_id):
+            placeholders = ", ".join("?" for _ in expected)
+            cursor = self._connection().execute(
+                f"UPDATE sessions SET lifecycle = ? WHERE session_id = ? AND lifecycle IN ({placeholders})",
+                (state, session.session_id) + expected
+            )
+            if cursor.rowcount != 1:
+                return False
+            session.state = state
+            session.running = state == RUNNING
+            self.save(session)
+            return True
+
+    def __delitem__(self, session_id):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM frames WHERE session_id = ?", (session_id,))
+            connection.execute("DELETE FROM landmarks WHERE session_id = ?", (session_id,))
+            connection.execute("DELETE FROM analyses WHERE session_id = ?", (session_id,))
+            connection.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        self._forget(session_id)
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def keys(self):
+        rows = self._connection().execute("SELECT session_id FROM sessions").fetchall()
+        return [row[0] for row in rows]
+
+    def items(self):
+        keys = self.keys()
+        with self.lock:
+            # Drop local copies of sessions another process has removed
+            for session_id in set(self.cache) - set(keys):
+                self.cache.pop(session_id, None)
+                self.cursors.pop(session_id, None)
+        items = []
+        for session_id in keys:
+            session = self.get(session_id)
+            if session is not None:
+                items.append((session_id, session))
+        return items
+
+    def values(self):
+        return [session for _, session in self.items()]
+
+    def update(self, sessions):
+        for session_id, session in sessions.items():
+            self[session_id] = session
+
+    def save(self, session):
+        """Publish a session's metadata so other processes see it"""
+        session.last_update = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "UPDATE sessions SET version = version + 1, updated = ?, state = ? WHERE session_id = ?",
+                (session.last_update, self._state(session), session.session_id)
+            )
+            row = connection.execute(
+                "SELECT version FROM sessions WHERE session_id = ?", (session.session_id,)
+            ).fetchone()
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        if row is not None:
+            with self.lock:
+                self.cache[session.session_id] = (row[0], session)
+
+    def _touch(self, connection, session):
+        """Bump the activity time without rewriting (or versioning) the metadata"""
+        session.last_update = time.time()
+        connection.execute(
+            "UPDATE sessions SET updated = ? WHERE session_id = ?",
+            (session.last_update, session.session_id)
+        )
+
+    def _running(self, connection, session):
+        row = connection.execute(
+            "SELECT lifecycle FROM sessions WHERE session_id = ?", (session.session_id,)
+        ).fetchone()
+        return row is not None and row[0] == RUNNING
+
+    def append_frame(self, session, frame):
+        """
+        Spool one FrameContext, tagged with its time and the active question.
+        Returns False if the session is no longer running.
+        """
+        data = frame.encoded
+        if data is None:
+            data = cv2.imencode(".jpg", frame.bgr)[1].tobytes()
+        t = (datetime.utcnow() - session.start_time).total_seconds()
+        frame.timestamp = t
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if not self._running(connection, session):
+                connection.execute("ROLLBACK")
+                return False
+            connection.execute(
+                "INSERT INTO frames (session_id, t, question, data) VALUES (?, ?, ?, ?)",
+                (session.session_id, t, session.current_question, data)
+            )
+            self._touch(connection, session)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return True
+
+    def append_landmarks(self, session, packets):
+        """
+        Spool parsed landmark packets (see landmarks.parse_packets).
+        Returns False if the session is no longer running.
+        """
+        rows = [
+            (session.session_id, timestamp, session.current_question,
+             np.ascontiguousarray(face, dtype=STORAGE_DTYPE).tobytes(),
+             np.ascontiguousarray(pose, dtype=STORAGE_DTYPE).tobytes())
+            for timestamp, face, pose in packets
+        ]
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if not self._running(connection, session):
+                connection.execute("ROLLBACK")
+                return False
+            connection.executemany(
+                "INSERT INTO landmarks (session_id, t, question, face, pose) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        if not session.client_landmarks:
+            session.client_landmarks = True
+            self.save(session)
+        else:
+            self._touch(self._connection(), session)
+        return True
+
+    def record_analysis(self, session, record, face=None, pose=None):
+        """
+        Insert one analyzed frame (results.FrameRecord) and, if usable, its
+        landmarks, then pull in the rows other processes added. Returns False
+        if the recorded frame was already scored (its first analysis is kept)
+        or the session is gone.
+        """
+        frame_t = record.t if record.recorded else None
+        connection = self._connection()
+        with self.lock_for(session.session_id):
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                exists = connection.execute(
+                    "SELECT 1 FROM sessions WHERE session_id = ?", (session.session_id,)
+                ).fetchone() is not None
+                inserted = exists and connection.execute(
+                    "INSERT OR IGNORE INTO analyses (session_id, frame_t, record) VALUES (?, ?, ?)",
+                    (session.session_id, frame_t, pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL))
+                ).rowcount == 1
+                if inserted and face is not None:
+                    connection.execute(
+                        "INSERT INTO landmarks (session_id, t, question, gaze, face, pose) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (session.session_id, record.t, record.question, float(record.looking_at_camera),
+                         np.ascontiguousarray(face, dtype=STORAGE_DTYPE).tobytes(),
+                         np.ascontiguousarray(pose, dtype=STORAGE_DTYPE).tobytes())
+                    )
+                if inserted:
+                    self._touch(connection, session)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            self._sync_results(session)
+        return inserted
+
+    def frame_count(self, session):
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM frames WHERE session_id = ?", (session.session_id,)
+        ).fetchone()[0]
+
+    def landmark_count(self, session):
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM landmarks WHERE session_id = ?", (session.session_id,)
+        ).fetchone()[0]
+
+    def sync(self, session):
+        """Load the frames, landmarks and analyses spooled since the last sync into the session object"""
+        with self.lock_for(session.session_id):
+            return self._sync(session)
+
+    def snapshot_frames(self, session):
+        """Immutable (time, frame, question) tuples of every frame recorded so far"""
+        with self.lock_for(session.session_id):
+            self._sync(session)
+            return tuple(zip(session.frame_times, session.frames, session.frame_questions))
+
+    def _cursor(self, session):
+        with self.lock:
+            return self.cursors.setdefault(session.session_id, [0, 0, 0])
+
+    def _sync(self, session):
+        cursor = self._cursor(session)
+        connection = self._connection()
+
+        rows = connection.execute(
+            "SELECT id, t, question, data FROM frames WHERE session_id = ? AND id > ? ORDER BY id",
+            (session.session_id, cursor[0])
+        ).fetchall()
+        for row_id, t, question, data in rows:
+            frame = FrameContext.from_bytes(data)
+            if frame is not None:
+                session.frames.append(frame)
+                session.frame_times.append(t)
+                session.frame_questions.append(question)
+            cursor[0] = row_id
+        return self._sync_results(session)
+
+    def _sync_results(self, session):
+        """Load landmark and analysis rows only; unlike frames they need no decoding"""
+        cursor = self._cursor(session)
+        connection = self._connection()
+
+        rows = connection.execute(
+            "SELECT id, t, question, gaze, face, pose FROM landmarks WHERE session_id = ? AND id > ? ORDER BY id",
+            (session.session_id, cursor[1])
+        ).fetchall()
+        for row_id, t, question, gaze, face, pose in rows:
+            session.landmarks.append_arrays(
+                t,
+                np.frombuffer(face, dtype=STORAGE_DTYPE).reshape(-1, 3),
+                np.frombuffer(pose, dtype=STORAGE_DTYPE).reshape(POSE_LANDMARKS, 4),
+                np.nan if gaze is None else gaze
+            )
+            session.landmark_questions.append(question)
+            cursor[1] = row_id
+
+        rows = connection.execute(
+            "SELECT id, record FROM analyses WHERE session_id = ? AND id > ? ORDER BY id",
+            (session.session_id, cursor[2])
+        ).fetchall()
+        for row_id, record in rows:
+            session.frame_records.append(pickle.loads(record))
+            cursor[2] = row_id
+        return session
+
+
+def create_session_store(backend, path, factory):
+    """Session store for Config.SESSION_STORE: "memory" (default) or "sqlite" """
+    if backend == "sqlite":
+        print(f"Using shared SQLite session store at {path}")
+        return SQLiteSessionStore(path, factory)
+    if backend not in (None, "", "memory"):
+        print(f"Unknown session store '{backend}', using in-process sessions")
+    return InProcessSessionStore()
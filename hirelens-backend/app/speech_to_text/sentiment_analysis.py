@@ -20,8 +20,8 @@ class SentimentAnalyzer:
         
         try:
             if not USE_FALLBACK:
-                from app.sentiment_analysis.sentiment_analysis_functions import sentiment_analysis
-                self.sentiment_analyzer = sentiment_analysis()
+                from app.model_registry import get_sentiment_model
+                self.sentiment_analyzer = get_sentiment_model()
                 print("SentimentAnalyzer initialized successfully")
             else:
                 print("Using fallback sentiment analyzer due to previous errors")
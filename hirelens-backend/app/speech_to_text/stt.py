@@ -13,8 +13,9 @@ import secrets
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.append(project_root)
 
-from app.answer_analysis.analyzer import AnswerAnalyzer
-from app.sentiment_analysis.sentiment_analysis_functions import sentiment_analysis
+from app.model_registry import (
+    get_answer_analyzer, get_sentiment_model, get_file_transcriber, file_transcriber_lock
+)
 
 class InterviewRecorder:
     def __init__(self):
@@ -33,9 +34,9 @@ class InterviewRecorder:
             self.CHANNELS = 1
             self.RATE = 44100
             
-            # Initialize analyzers
-            self.answer_analyzer = AnswerAnalyzer()
-            self.sentiment_analyzer = sentiment_analysis()
+            # Shared analyzers (loaded once per process)
+            self.answer_analyzer = get_answer_analyzer()
+            self.sentiment_analyzer = get_sentiment_model()
             
             # Ensure recordings directory exists
             self.recordings_dir = os.path.join(project_root, '.recordings')
@@ -218,7 +219,8 @@ class InterviewRecorder:
             finally:
                 termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
 
-    def transcribe_from_file(self, audio_file_path):
+    @staticmethod
+    def transcribe_from_file(audio_file_path):
         """
         Transcribe audio from an existing file
         
@@ -282,15 +284,9 @@ class InterviewRecorder:
                 
                 # Fallback to RealtimeSTT
                 try:
-                    # Create a fresh recorder instance to avoid any state issues
-                    from RealtimeSTT import AudioToTextRecorder
-                    file_recorder = AudioToTextRecorder(
-                        model="base",
-                        language="en"
-                    )
-                    
-                    # Process the file
-                    text = file_recorder.process_file(wav_file or audio_file_path)
+                    # The shared file recorder handles one file at a time
+                    with file_transcriber_lock:
+                        text = get_file_transcriber().process_file(wav_file or audio_file_path)
                     print(f"RealtimeSTT result: {text}")
                     return text if text else "[No speech detected]"
                 except Exception as rtstt_error:
@@ -306,8 +302,7 @@ class InterviewRecorder:
 def get_random_questions(num_questions=3):
     """Get random interview questions"""
     try:
-        analyzer = AnswerAnalyzer()
-        return analyzer.get_random_questions(num_questions)
+        return get_answer_analyzer().get_random_questions(num_questions)
     except Exception as e:
         print(f"Error getting questions: {e}")
         return []
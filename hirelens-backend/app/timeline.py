@@ -0,0 +1,57 @@
+from datetime import timedelta
+from app.database import get_frame_metrics_collection
+
+# Signals stored for every analyzed frame
+TIMELINE_METRICS = ("eye_contact", "posture", "smile")
+
+
+def store_frame_metrics(interview_id, user_id, start_time, metrics):
+    """
+    Write the per-frame metrics of an interview to the time-series collection.
+
+    Each entry in metrics is a dict with "t" (seconds since the interview
+    started) and the TIMELINE_METRICS values (None when nothing was detected).
+    """
+    if not metrics:
+        return 0
+
+    meta = {"interview_id": interview_id, "userId": user_id}
+    documents = [{
+        "ts": start_time + timedelta(seconds=entry["t"]),
+        "meta": meta,
+        "t": entry["t"],
+        **{name: entry.get(name) for name in TIMELINE_METRICS}
+    } for entry in metrics]
+
+    get_frame_metrics_collection().insert_many(documents, ordered=False)
+    return len(documents)
+
+
+def query_timeline(interview_id, start=0.0, end=None, resolution=1.0):
+    """
+    Return the stored timeline of an interview between start and end seconds,
+    averaged into buckets of `resolution` seconds. Downsampling happens in
+    MongoDB so only one point per bucket leaves the database.
+    """
+    time_range = {"$gte": start}
+    if end is not None:
+        time_range["$lt"] = end
+
+    pipeline = [
+        {"$match": {"meta.interview_id": interview_id, "t": time_range}},
+        {"$group": {
+            "_id": {"$multiply": [{"$floor": {"$divide": ["$t", resolution]}}, resolution]},
+            **{name: {"$avg": f"${name}"} for name in TIMELINE_METRICS},
+            "frames": {"$sum": 1}
+        }},
+        {"$sort": {"_id": 1}}
+    ]
+
+    timeline = []
+    for bucket in get_frame_metrics_collection().aggregate(pipeline):
+        point = {"t": round(bucket["_id"], 3), "frames": bucket["frames"]}
+        for name in TIMELINE_METRICS:
+            value = bucket.get(name)
+            point[name] = round(value * 100, 1) if value is not None else None
+        timeline.append(point)
+    return timeline
@@ -26,3 +26,22 @@ class Config:
     GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET')
     GOOGLE_DISCOVERY_URL = "https://accounts.google.com/.well-known/openid-configuration"
+    
+    # Inference thread budgets: "latency" or "throughput" (see app/runtime.py)
+    RUNTIME_PRESET = os.getenv('RUNTIME_PRESET', 'latency')
+    
+    # In-progress interview sessions are snapshotted here and restored on startup
+    SESSION_CHECKPOINT_DIR = os.getenv('SESSION_CHECKPOINT_DIR', os.path.join(os.getcwd(), 'session_checkpoints'))
+    SESSION_CHECKPOINT_INTERVAL = float(os.getenv('SESSION_CHECKPOINT_INTERVAL', '5'))
+    
+    # Where interview sessions live: "memory" (single process) or "sqlite"
+    # (shared by every worker process on the host, see app/session_store.py)
+    SESSION_STORE = os.getenv('SESSION_STORE', 'memory')
+    SESSION_STORE_PATH = os.getenv('SESSION_STORE_PATH', os.path.join(os.getcwd(), 'sessions', 'sessions.db'))
+    
+    # Sessions idle for SESSION_IDLE_TTL seconds are evicted; checked every SESSION_REAP_INTERVAL
+    SESSION_IDLE_TTL = float(os.getenv('SESSION_IDLE_TTL', '300'))
+    SESSION_REAP_INTERVAL = float(os.getenv('SESSION_REAP_INTERVAL', '60'))
+    
+    # Accounts allowed to use the /api/admin endpoints (comma-separated emails)
+    ADMIN_EMAILS = [email.strip() for email in os.getenv('ADMIN_EMAILS', '').split(',') if email.strip()]
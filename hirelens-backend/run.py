@@ -2,6 +2,12 @@ import subprocess
 import time
 import os
 import traceback
+
+# OpenMP/MKL size their pools when torch is imported, so the thread
+# environment has to be in place before the app (and torch) is loaded
+from app.runtime import apply_thread_environment
+apply_thread_environment()
+
 from app import create_app
 from app.database import test_connection, init_indexes
 
@@ -45,13 +51,9 @@ def main():
     
     # Load models with special error handling
     print("\n=== Preloading Models ===")
-    try:
-        # Try to import and initialize the sentiment analyzer
-        from app.speech_to_text.sentiment_analysis import SentimentAnalyzer
-        sentiment_analyzer = SentimentAnalyzer()
-    except Exception as e:
-        print(f"[WARNING] Error initializing sentiment analyzer: {str(e)}")
-        print("Continuing with fallback functionality")
+    # Load the shared models once so the first interview doesn't pay for it
+    from app.model_registry import model_registry
+    model_registry.preload("answer_analyzer", "sentiment", "sentiment_analyzer")
     
     # Add a simple test route directly to the app
     @app.route('/api/test-connection', methods=['GET'])
@@ -95,10 +97,9 @@ def main():
                 
                 # Import STT module
                 from app.speech_to_text.stt import InterviewRecorder
-                recorder = InterviewRecorder()
                 
-                # Transcribe the audio
-                transcription = recorder.transcribe_from_file(filepath)
+                # Transcribe the audio (no live recorder needed)
+                transcription = InterviewRecorder.transcribe_from_file(filepath)
                 
                 # Clean up
                 if os.path.exists(filepath):
@@ -146,15 +147,18 @@ def main():
             "details": error_message
         }), 500
     
+    # Workers behind the affinity router (app/affinity.py) each get their own PORT
+    port = int(os.getenv('PORT', '5000'))
+    
     print("\n=== Starting Flask Server ===")
     print("Debug mode:", app.debug)
-    print("Server will be available at: http://localhost:5000")
-    print("Try opening http://localhost:5000/api/test-connection in your browser to verify")
+    print(f"Server will be available at: http://localhost:{port}")
+    print(f"Try opening http://localhost:{port}/api/test-connection in your browser to verify")
     
     try:
         import werkzeug.serving
         werkzeug.serving.run_simple(
-            '0.0.0.0', 5000, app, 
+            '0.0.0.0', port, app, 
             use_reloader=False,  # disable reloader to prevent crashes
             threaded=True,       # enable threading
             use_debugger=app.debug
@@ -163,8 +167,8 @@ def main():
         print("\n[INFO] Server stopped by user")
     except Exception as e:
         print(f"\n[FAILED] Error starting Flask server: {str(e)}")
-        print("Please check if port 5000 is already in use")
-        print("You can try running: lsof -i :5000 (on Mac/Linux) or netstat -ano | findstr :5000 (on Windows) to check what's using the port")
+        print(f"Please check if port {port} is already in use")
+        print(f"You can try running: lsof -i :{port} (on Mac/Linux) or netstat -ano | findstr :{port} (on Windows) to check what's using the port")
         import traceback
         traceback.print_exc()
 
@@ -0,0 +1,61 @@
+import time
+from datetime import datetime
+import numpy as np
+import pytest
+from app.facial_recognition.landmarks import LandmarkSequence, FACE_LANDMARKS, POSE_LANDMARKS
+from app.facial_recognition.results import FrameRecord
+from app.session_store import STARTING
+
+
+class FakeSession:
+    """The parts of routes.InterviewSession the session store and checkpointer use"""
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.user_id = "user"
+        self.running = False
+        self.state = STARTING
+        self.start_time = datetime.utcnow()
+        self.last_update = time.time()
+        self.email = ""
+        self.name = ""
+        self.current_question = "Tell me about yourself"
+        self.questions_asked = [self.current_question]
+        self.answers = {self.current_question: {"audio_transcript": ""}}
+        self.transcript = ""
+        self.audio_requested = False
+        self.frames = []
+        self.frame_times = []
+        self.frame_questions = []
+        self.recording_scores = []
+        self.client_landmarks = False
+        self.landmarks = LandmarkSequence()
+        self.landmark_questions = []
+        self.frame_records = []
+
+    def add_frame(self, frame):
+        frame.timestamp = (datetime.utcnow() - self.start_time).total_seconds()
+        self.frames.append(frame)
+        self.frame_times.append(frame.timestamp)
+        self.frame_questions.append(self.current_question)
+
+    def add_analysis(self, record, face=None, pose=None):
+        self.frame_records.append(record)
+        if face is not None:
+            self.landmarks.append_arrays(record.t, face, pose, float(record.looking_at_camera))
+            self.landmark_questions.append(record.question)
+
+
+def make_record(t, question="q1", recorded=True, looking=True, issue=None):
+    if issue is not None:
+        return FrameRecord(t, question, recorded, issue, False, False, False, False, False, 0.0, False)
+    return FrameRecord(t, question, recorded, None, True, looking, True, True, True, 0.5, True)
+
+
+def blank_landmarks():
+    return (np.zeros((FACE_LANDMARKS, 3), dtype=np.float16),
+            np.zeros((POSE_LANDMARKS, 4), dtype=np.float16))
+
+
+@pytest.fixture
+def session_factory():
+    return FakeSession
@@ -0,0 +1,62 @@
+import io
+from collections import Counter
+from app.affinity import HashRing, read_body
+
+WORKERS = ["http://127.0.0.1:5001", "http://127.0.0.1:5002", "http://127.0.0.1:5003"]
+KEYS = [f"session-{i}" for i in range(2000)]
+
+
+def test_keys_map_to_a_stable_worker():
+    ring = HashRing(WORKERS)
+    assert [ring.node_for(key) for key in KEYS] == [HashRing(WORKERS).node_for(key) for key in KEYS]
+
+
+def test_keys_spread_over_every_worker():
+    ring = HashRing(WORKERS)
+    counts = Counter(ring.node_for(key) for key in KEYS)
+    assert set(counts) == set(WORKERS)
+    assert min(counts.values()) > len(KEYS) / len(WORKERS) / 2
+
+
+def test_nodes_for_lists_each_worker_once_owner_first():
+    ring = HashRing(WORKERS)
+    nodes = ring.nodes_for("session-1")
+    assert sorted(nodes) == sorted(WORKERS)
+    assert nodes[0] == ring.node_for("session-1")
+
+
+def test_removing_a_worker_only_moves_its_keys():
+    ring = HashRing(WORKERS)
+    before = {key: ring.node_for(key) for key in KEYS}
+    ring.remove(WORKERS[0])
+    for key, owner in before.items():
+        if owner != WORKERS[0]:
+            assert ring.node_for(key) == owner
+        else:
+            assert ring.node_for(key) in WORKERS[1:]
+
+
+def test_empty_ring():
+    ring = HashRing()
+    assert ring.node_for("session-1") is None
+    assert ring.nodes_for("session-1") == []
+
+
+def test_read_body_uses_content_length():
+    environ = {"wsgi.input": io.BytesIO(b"abcdef"), "CONTENT_LENGTH": "3"}
+    assert read_body(environ) == b"abc"
+
+
+def test_read_body_reads_a_terminated_chunked_body():
+    environ = {"wsgi.input": io.BytesIO(b"chunked body"), "wsgi.input_terminated": True,
+               "HTTP_TRANSFER_ENCODING": "chunked"}
+    assert read_body(environ) == b"chunked body"
+
+
+def test_read_body_refuses_an_undecoded_chunked_body():
+    environ = {"wsgi.input": io.BytesIO(b"5\r\nhello\r\n0\r\n\r\n"), "HTTP_TRANSFER_ENCODING": "chunked"}
+    assert read_body(environ) is None
+
+
+def test_read_body_without_a_body():
+    assert read_body({"wsgi.input": io.BytesIO(b"")}) == b""
@@ -0,0 +1,52 @@
+from app.sentiment_analysis.chunking import pack_windows, split_sentences
+
+CLS, SEP = 101, 102
+
+
+class WordTokenizer:
+    """One token per word, with [CLS] ... [SEP] around each window like BERT"""
+    def __init__(self):
+        self.vocab = {}
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def __call__(self, text, add_special_tokens=False):
+        return {"input_ids": [self.vocab.setdefault(word, 1000 + len(self.vocab)) for word in text.split()]}
+
+    def decode(self, ids):
+        words = {token: word for word, token in self.vocab.items()}
+        return " ".join(words[token] for token in ids)
+
+    def build_inputs_with_special_tokens(self, ids):
+        return [CLS] + list(ids) + [SEP]
+
+
+def test_split_sentences():
+    assert split_sentences("One. Two!  Three? four") == ["One.", "Two!", "Three?", "four"]
+
+
+def test_short_text_is_one_window():
+    windows = pack_windows(WordTokenizer(), "I like it. It works.", window_tokens=16)
+    assert len(windows) == 1
+    segment, ids, count = windows[0]
+    assert segment == "I like it. It works."
+    assert ids[0] == CLS and ids[-1] == SEP and count == 5
+
+
+def test_sentences_are_packed_whole_within_the_budget():
+    text = "a b c. d e f. g h i."
+    windows = pack_windows(WordTokenizer(), text, window_tokens=8)  # 6 content tokens
+    assert [segment for segment, _, _ in windows] == ["a b c. d e f.", "g h i."]
+    assert all(len(ids) <= 8 for _, ids, _ in windows)
+
+
+def test_overlong_sentence_is_sliced():
+    text = " ".join(f"w{i}" for i in range(10)) + "."
+    windows = pack_windows(WordTokenizer(), text, window_tokens=6)  # 4 content tokens
+    assert [count for _, _, count in windows] == [4, 4, 2]
+    assert all(len(ids) <= 6 for _, ids, _ in windows)
+
+
+def test_empty_text_has_no_windows():
+    assert pack_windows(WordTokenizer(), "   ") == []
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from app.facial_recognition.filters import (
+    MAX_FRAME_GAP, OneEuroFilter, TimeWeightedScore, combined_percentage
+)
+
+
+def test_one_euro_passes_the_first_sample_through():
+    one_euro = OneEuroFilter()
+    assert one_euro(0.0, [1.0, 2.0]).tolist() == [1.0, 2.0]
+
+
+def test_one_euro_smooths_jitter_towards_the_previous_value():
+    one_euro = OneEuroFilter()
+    one_euro(0.0, [0.0])
+    smoothed = one_euro(0.1, [1.0])
+    assert 0.0 < smoothed[0] < 1.0
+
+
+def test_one_euro_follows_fast_motion_more_closely():
+    slow, fast = OneEuroFilter(beta=0.0), OneEuroFilter(beta=10.0)
+    for one_euro in (slow, fast):
+        one_euro(0.0, [0.0])
+    assert fast(0.1, [1.0])[0] > slow(0.1, [1.0])[0]
+
+
+def test_one_euro_resets_on_missing_input_and_long_gaps():
+    one_euro = OneEuroFilter()
+    one_euro(0.0, [0.0])
+    assert np.isnan(one_euro(0.1, [np.nan])).all()
+    assert one_euro(0.2, [1.0]).tolist() == [1.0]  # Starts over after the NaN
+    assert one_euro(0.2 + MAX_FRAME_GAP + 0.1, [5.0]).tolist() == [5.0]
+
+
+def test_time_weighted_score_weights_frames_by_time():
+    score = TimeWeightedScore()
+    score.add(0.0, True)   # Holds for 0.9 s
+    score.add(0.9, False)  # Holds for 0.1 s
+    score.add(1.0, False)  # Last frame repeats the previous gap
+    good, total = score.totals()
+    assert good == pytest.approx(0.9) and total == pytest.approx(1.1)
+    assert score.percentage() == pytest.approx(0.9 / 1.1 * 100)
+
+
+def test_time_weighted_score_caps_gaps():
+    score = TimeWeightedScore(max_gap=1.0)
+    score.add(0.0, True)
+    score.add(10.0, False)
+    assert score.totals() == (1.0, 2.0)
+
+
+def test_time_weighted_score_edge_cases():
+    empty = TimeWeightedScore()
+    assert empty.percentage() == 0.0
+    single = TimeWeightedScore()
+    single.add(0.0, True)
+    assert single.percentage() == 100.0
+
+
+def test_combined_percentage_pools_time_across_scores():
+    first, second = TimeWeightedScore(), TimeWeightedScore()
+    first.add(0.0, True)
+    first.add(1.0, True)   # 2 s good
+    second.add(5.0, False)
+    second.add(6.0, False)  # 2 s not good
+    assert combined_percentage([first, second]) == pytest.approx(50.0)
+    assert combined_percentage([]) == 0.0
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from app.facial_recognition.landmarks import (
+    FACE_LANDMARKS, POSE_LANDMARKS, PACKET_FACE, PACKET_HEADER, PACKET_MAGIC, PACKET_POSE,
+    PACKET_VERSION, LandmarkSequence, parse_packets
+)
+
+
+def packet(timestamp, face=True, pose=True, face_points=FACE_LANDMARKS, magic=PACKET_MAGIC):
+    flags = (PACKET_FACE if face else 0) | (PACKET_POSE if pose else 0)
+    data = PACKET_HEADER.pack(magic, PACKET_VERSION, flags, face_points, timestamp)
+    if face:
+        data += np.full(face_points * 3, 0.25, dtype="<f2").tobytes()
+    if pose:
+        data += np.full(POSE_LANDMARKS * 4, 0.5, dtype="<f2").tobytes()
+    return data
+
+
+def test_parses_face_and_pose():
+    packets = parse_packets(packet(1.5) + packet(2.0, face=False))
+    assert [t for t, _, _ in packets] == [1.5, 2.0]
+    _, face, pose = packets[0]
+    assert face.shape == (FACE_LANDMARKS, 3) and pose.shape == (POSE_LANDMARKS, 4)
+    assert np.all(face == np.float16(0.25)) and np.all(pose == np.float16(0.5))
+    assert np.isnan(packets[1][1]).all()  # No face in the second packet
+
+
+def test_empty_body_has_no_packets():
+    assert parse_packets(b"") == []
+
+
+@pytest.mark.parametrize("data", [
+    packet(1.0)[:PACKET_HEADER.size - 1],  # Truncated header
+    packet(1.0)[:-2],  # Truncated body
+    packet(1.0, magic=b"XXXX"),
+    packet(1.0, face_points=468),  # FaceMesh without iris points
+    packet(float("nan")),
+    packet(-1.0),
+    packet(2.0) + packet(1.0),  # Time goes backwards
+])
+def test_rejects_malformed_packets(data):
+    with pytest.raises(ValueError):
+        parse_packets(data)
+
+
+def test_sequence_stacks_in_time_order_with_float64_times():
+    sequence = LandmarkSequence()
+    for t, value in ((3.0, 3), (36000.0005, 2), (1.0, 1)):
+        sequence.append_arrays(t, np.full((FACE_LANDMARKS, 3), value), np.full((POSE_LANDMARKS, 4), value))
+    data = sequence.stack()
+    assert data["t"].dtype == np.float64
+    assert data["t"].tolist() == [1.0, 3.0, 36000.0005]
+    assert data["face"][:, 0, 0].tolist() == [1, 3, 2]
+    assert sequence.order().tolist() == [2, 0, 1]
+
+
+def test_sequence_round_trips_through_bytes():
+    sequence = LandmarkSequence()
+    sequence.append_arrays(0.5, np.zeros((FACE_LANDMARKS, 3)), np.ones((POSE_LANDMARKS, 4)), 1.0)
+    data = LandmarkSequence.load(sequence.to_bytes())
+    assert data["t"].tolist() == [0.5]
+    assert data["gaze"].tolist() == [1.0]
+    assert data["pose"].shape == (1, POSE_LANDMARKS, 4)
@@ -0,0 +1,88 @@
+import os
+import numpy as np
+from app.facial_recognition.frame_context import FrameContext
+from app.session_checkpoint import SessionCheckpointer
+from conftest import FakeSession, blank_landmarks, make_record
+import cv2
+
+
+def running_session(session_id="s1"):
+    session = FakeSession(session_id)
+    session.running = True
+    return session
+
+
+def add_frame(session, t, question="q1"):
+    image = np.full((16, 16, 3), 128, dtype=np.uint8)
+    frame = FrameContext.from_bytes(cv2.imencode(".jpg", image)[1].tobytes(), t)
+    session.frames.append(frame)
+    session.frame_times.append(t)
+    session.frame_questions.append(question)
+
+
+def test_restore_rebuilds_the_session(tmp_path):
+    checkpointer = SessionCheckpointer(str(tmp_path))
+    session = running_session()
+    face, pose = blank_landmarks()
+    for i in range(3):
+        add_frame(session, i * 0.5, question=None if i == 1 else "q1")
+        session.add_analysis(make_record(i * 0.5), face, pose)
+    session.answers["Tell me about yourself"]["audio_transcript"] = "Hello"
+    assert checkpointer.snapshot(session)
+
+    restored = SessionCheckpointer(str(tmp_path)).restore(FakeSession)["s1"]
+    assert restored.frame_times == [0.0, 0.5, 1.0]
+    assert restored.frame_questions == ["q1", None, "q1"]
+    assert [frame.timestamp for frame in restored.frames] == [0.0, 0.5, 1.0]
+    assert [record.t for record in restored.frame_records] == [0.0, 0.5, 1.0]
+    assert len(restored.landmarks) == 3 and restored.landmark_questions == ["q1"] * 3
+    assert restored.landmarks.gaze == [1.0, 1.0, 1.0]
+    assert restored.answers["Tell me about yourself"]["audio_transcript"] == "Hello"
+
+
+def test_snapshots_append_only_new_entries(tmp_path):
+    checkpointer = SessionCheckpointer(str(tmp_path))
+    session = running_session()
+    session.add_analysis(make_record(0.0))
+    checkpointer.snapshot(session)
+    records_path = checkpointer._path("s1", "records")
+    size = os.path.getsize(records_path)
+    assert not checkpointer.snapshot(session)  # Nothing changed
+
+    session.add_analysis(make_record(1.0))
+    assert checkpointer.snapshot(session)
+    assert os.path.getsize(records_path) == 2 * size
+    restored = SessionCheckpointer(str(tmp_path)).restore(FakeSession)["s1"]
+    assert [record.t for record in restored.frame_records] == [0.0, 1.0]
+
+
+def test_torn_appends_are_ignored(tmp_path):
+    checkpointer = SessionCheckpointer(str(tmp_path))
+    session = running_session()
+    add_frame(session, 0.0)
+    session.add_analysis(make_record(0.0))
+    checkpointer.snapshot(session)
+    # A crash mid-append leaves bytes the state file doesn't vouch for
+    for name in ("frames", "records"):
+        with open(checkpointer._path("s1", name), "ab") as f:
+            f.write(b"\x00\x01partial")
+    restored = SessionCheckpointer(str(tmp_path)).restore(FakeSession)["s1"]
+    assert len(restored.frames) == 1 and len(restored.frame_records) == 1
+
+
+def test_discarded_sessions_are_not_written_again(tmp_path):
+    checkpointer = SessionCheckpointer(str(tmp_path))
+    session = running_session()
+    checkpointer.snapshot(session)
+    checkpointer.discard("s1")
+    assert os.listdir(tmp_path) == []
+    session.last_update += 1
+    assert not checkpointer.snapshot(session)
+    assert SessionCheckpointer(str(tmp_path)).restore(FakeSession) == {}
+
+
+def test_snapshot_all_skips_sessions_that_are_not_running(tmp_path):
+    checkpointer = SessionCheckpointer(str(tmp_path))
+    running, stopped = running_session("s1"), FakeSession("s2")
+    assert checkpointer.snapshot_all({"s1": running, "s2": stopped}) == 1
+    assert set(SessionCheckpointer(str(tmp_path)).restore(FakeSession)) == {"s1"}
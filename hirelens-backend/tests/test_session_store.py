@@ -0,0 +1,101 @@
+import pytest
+from app.facial_recognition.frame_context import FrameContext
+from app.session_store import (
+    DONE, FINALIZING, RUNNING, STARTING, InProcessSessionStore, SQLiteSessionStore
+)
+from conftest import FakeSession, blank_landmarks, make_record
+import numpy as np
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InProcessSessionStore()
+    return SQLiteSessionStore(str(tmp_path / "sessions.db"), FakeSession)
+
+
+def frame():
+    return FrameContext(bgr=np.zeros((8, 8, 3), dtype=np.uint8))
+
+
+def test_add_refuses_a_taken_id(store):
+    assert store.add("s1", FakeSession("s1"))
+    assert not store.add("s1", FakeSession("s1"))
+    assert "s1" in store
+
+
+def test_lifecycle_transitions(store):
+    session = FakeSession("s1")
+    store.add("s1", session)
+    assert not store.transition(session, (RUNNING,), FINALIZING)  # Still starting
+    assert store.transition(session, (STARTING,), RUNNING)
+    assert session.running and session.state == RUNNING
+    assert store.transition(session, (RUNNING,), FINALIZING)
+    assert not store.transition(session, (RUNNING,), FINALIZING)  # Only one stop gets through
+    assert store.transition(session, (FINALIZING,), DONE)
+    assert not session.running
+
+
+def test_frames_are_accepted_only_while_running(store):
+    session = FakeSession("s1")
+    store.add("s1", session)
+    assert not store.append_frame(session, frame())
+    store.transition(session, (STARTING,), RUNNING)
+    assert store.append_frame(session, frame())
+    store.transition(session, (RUNNING,), FINALIZING)
+    assert not store.append_frame(session, frame())
+    assert store.frame_count(session) == 1
+
+
+def test_record_analysis_keeps_records_and_landmarks(store):
+    session = FakeSession("s1")
+    store.add("s1", session)
+    store.transition(session, (STARTING,), RUNNING)
+    face, pose = blank_landmarks()
+    store.record_analysis(session, make_record(1.0), face, pose)
+    store.record_analysis(session, make_record(2.0, issue="blurry"))
+    assert [record.t for record in session.frame_records] == [1.0, 2.0]
+    assert store.landmark_count(session) == 1
+    assert session.landmark_questions == ["q1"]
+
+
+def test_transitions_are_atomic_across_processes(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    first, second = SQLiteSessionStore(path, FakeSession), SQLiteSessionStore(path, FakeSession)
+    session = FakeSession("s1")
+    first.add("s1", session)
+    first.transition(session, (STARTING,), RUNNING)
+    other = second.get("s1")
+    assert other.state == RUNNING
+    assert first.transition(session, (RUNNING,), FINALIZING)
+    assert not second.transition(other, (RUNNING,), FINALIZING)
+
+
+def test_a_recorded_frame_is_scored_once_across_processes(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    first, second = SQLiteSessionStore(path, FakeSession), SQLiteSessionStore(path, FakeSession)
+    session = FakeSession("s1")
+    first.add("s1", session)
+    first.transition(session, (STARTING,), RUNNING)
+    other = second.get("s1")
+    face, pose = blank_landmarks()
+    assert first.record_analysis(session, make_record(1.0), face, pose)
+    assert not second.record_analysis(other, make_record(1.0), face, pose)
+    assert second.record_analysis(other, make_record(2.0), face, pose)
+    # Frames of uploaded recordings aren't keyed by time
+    assert first.record_analysis(session, make_record(3.0, recorded=False))
+    assert first.record_analysis(session, make_record(3.0, recorded=False))
+    first.sync(session)
+    second.sync(other)
+    assert sorted(record.t for record in session.frame_records) == [1.0, 2.0, 3.0, 3.0]
+    assert len(other.frame_records) == 4
+    assert len(session.landmarks) == len(other.landmarks) == 2
+
+
+def test_deleted_sessions_take_no_more_rows(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), FakeSession)
+    session = FakeSession("s1")
+    store.add("s1", session)
+    del store["s1"]
+    assert "s1" not in store
+    assert not store.record_analysis(session, make_record(1.0))
@@ -21,6 +21,11 @@ import {
   Smile
 } from 'lucide-react';
 
+// Frames are sent at 2.5 fps and scored by the backend as they arrive. It
+// filters landmarks, weights scores by frame timestamps and keeps a few
+// frames in each smoothing window, so a higher rate adds load but not accuracy.
+const FRAME_INTERVAL_MS = 400;
+
 function Interview() {
   const navigate = useNavigate();
   const [status, setStatus] = useState('initializing');
@@ -260,7 +265,7 @@ function Interview() {
         body: JSON.stringify({ session_id: sessionId, question: questions[currentQuestionIndex] })
       });
 
-      recordingIntervalRef.current = setInterval(recordFrame, 100);
+      recordingIntervalRef.current = setInterval(recordFrame, FRAME_INTERVAL_MS);
       await startAudioRecording();
       startTimer();
     } catch (err) {